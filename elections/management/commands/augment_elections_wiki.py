@@ -1,7 +1,6 @@
 from bs4 import BeautifulSoup
+from federal_common.bulk import BatchedCommand
 from tqdm import tqdm
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from federal_common import sources
 from federal_common.sources import EN
 from federal_common.utils import fetch_url, url_tweak
@@ -13,9 +12,8 @@ import re
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
-    @transaction.atomic
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
@@ -26,6 +24,7 @@ class Command(BaseCommand):
             unit="election",
         ):
             self.augment_election_wiki(election)
+        self.batcher.flush()
 
     def augment_election_wiki(self, election):
         soup = BeautifulSoup(fetch_url(url_tweak(
@@ -53,4 +52,4 @@ class Command(BaseCommand):
             except ValueError:
                 infobox[key] = value
         election.wiki_info_box = infobox
-        election.save()
+        self.batcher.add(election, update_fields=("wiki_info_box", ))
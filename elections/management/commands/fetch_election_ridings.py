@@ -1,11 +1,10 @@
 from bs4 import BeautifulSoup
 from collections import namedtuple
 from decimal import Decimal
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils.text import slugify
 from elections import models
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak
 from parliaments.models import Province, Riding, Parliamentarian, Party
@@ -40,7 +39,7 @@ PARTY_POPUP = re.compile("Party=([0-9]+)")
 PopulationRow = namedtuple("PopulationRow", ("population", "registered", "ballots_rejected"))
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     cached_provinces = {}
     cached_ridings = {}
@@ -48,6 +47,7 @@ class Command(BaseCommand):
     cached_parties = {}
 
     def add_arguments(self, parser):
+        super().add_arguments(parser)
         parser.add_argument("ods file")
 
     def handle(self, *args, **options):
@@ -69,7 +69,6 @@ class Command(BaseCommand):
         ):
             self.fetch_ridings(election)
 
-    @transaction.atomic
     def fetch_ridings(self, election, populations=None):
         if populations:
             populations = dict(
@@ -85,6 +84,13 @@ class Command(BaseCommand):
             kwargs = {"by_election": election}
         soup = BeautifulSoup(fetch_url(url), "html.parser")
 
+        # Rows are accumulated while fetching and written once the election is parsed
+        self.updated_ridings = {}
+        self.new_parties = []
+        updated_parliamentarians = {}
+        election_ridings = []
+        election_candidates = []
+
         province = None
         election_riding = None
         for tr in soup.select("#MainContent table")[0].find_all("tr", recursive=False):
@@ -117,7 +123,7 @@ class Command(BaseCommand):
                     election_riding.population = population_row.population
                     election_riding.registered = population_row.registered
                     election_riding.ballots_rejected = population_row.ballots_rejected
-                election_riding.save()
+                election_ridings.append(election_riding)
 
             elif "Votes (%)" in tr.text or "Votes\xa0(%)" in tr.text:
                 pass  # Header tr
@@ -135,14 +141,17 @@ class Command(BaseCommand):
                         lop_item_code = PARLIAMENTARIAN_NAME_MAPPINGS[(name, riding.slug)]
                     except KeyError:
                         lop_item_code = sources.LOP_CODE.search(cells[0].find("a").attrs["href"]).group().lower()
-                    parliamentarian = Parliamentarian.objects.get(lop_item_code=lop_item_code)
+                    try:
+                        parliamentarian = updated_parliamentarians[lop_item_code]
+                    except KeyError:
+                        parliamentarian = Parliamentarian.objects.get(lop_item_code=lop_item_code)
                     for lang in (EN, FR):
                         if name not in parliamentarian.names[lang].values():
                             parliamentarian.names[lang]["{}, {}".format(
                                 sources.NAME_LOP_RIDING_HISTORY[lang],
                                 election.name(lang),
                             )] = name  # While the name we pull is from the English source, HFER names never differ
-                            parliamentarian.save()
+                            updated_parliamentarians[lop_item_code] = parliamentarian
                 else:
                     parliamentarian = None
 
@@ -164,7 +173,14 @@ class Command(BaseCommand):
                     ballots=int(ballots) if ballots else None,
                     ballots_percentage=(Decimal(ballots_percentage) / 100) if ballots_percentage else None,
                 )
-                election_candidate.save()
+                election_candidates.append(election_candidate)
+
+        self.batcher.extend(self.new_parties)
+        self.batcher.extend(self.updated_ridings.values(), update_fields=("links", ))
+        self.batcher.extend(updated_parliamentarians.values(), update_fields=("names", ))
+        self.batcher.extend(election_ridings)
+        self.batcher.extend(election_candidates)
+        self.batcher.flush()
 
     def fetch_riding(self, riding, url):
         for lang in (EN, FR):
@@ -173,7 +189,7 @@ class Command(BaseCommand):
                 fetch_url(riding.links[lang][sources.NAME_LOP_RIDING_HISTORY[lang]])
             except Exception as e:
                 logger.exception(e)
-        riding.save()
+        self.updated_ridings[riding.slug] = riding
         self.cached_ridings[riding.slug] = riding
 
     def fetch_party(self, name, popup, election_riding):
@@ -211,6 +227,6 @@ class Command(BaseCommand):
                 party.names[lang][sources.NAME_LOP_RIDING_HISTORY[lang]] = popup_soup.find_all("td")[1].text.strip()
             party.slug = slugify(name)
             party.lop_item_code = None
-            party.save()
+            self.new_parties.append(party)
             self.cached_parties[name] = party
         return party
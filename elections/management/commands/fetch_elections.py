@@ -2,12 +2,11 @@ from bs4 import BeautifulSoup
 from collections import defaultdict
 from datetime import datetime
 from decimal import Decimal
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.db.models import Q
 from elections import models
 from elections.management.commands.fetch_election_ridings import LOP_ROW_RIDING
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak, one_or_none, dateparse, REVERSE_ORDINAL
 from parliaments.models import Parliament
@@ -18,11 +17,10 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     general_election_data = defaultdict(dict)
 
-    @transaction.atomic
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
@@ -83,6 +81,7 @@ class Command(BaseCommand):
                 unit="general election",
             ):
                 self.fetch_general_election(parliament)
+        self.batcher.flush()
 
     def fetch_general_election(self, parliament):
         logger.debug("Fetching general election, {}".format(parliament))
@@ -102,7 +101,7 @@ class Command(BaseCommand):
             },
             **self.general_election_data[parliament.number],
         )
-        election.save()
+        self.batcher.add(election)
 
     def fetch_by_elections(self, parliament):
         logger.debug("Fetching by-elections, {}".format(parliament))
@@ -115,7 +114,7 @@ class Command(BaseCommand):
         for row in soup.select(".rid"):
             dates.add(dateparse(LOP_ROW_RIDING.search(row.text.strip()).groupdict()["date"]))
         for date in dates:
-            models.ByElection.objects.get_or_create(
+            self.batcher.add(models.ByElection(
                 slug=f"{parliament.number}-{date}",
                 parliament=parliament,
                 date=date,
@@ -123,4 +122,4 @@ class Command(BaseCommand):
                     EN: {sources.NAME_LOP_BY_ELECTION[EN]: url_tweak(url, remove=("genElection", ), update={"byElection": date.strftime("%Y/%m/%d")})},
                     FR: {sources.NAME_LOP_BY_ELECTION[FR]: url_tweak(url, remove=("genElection", ), update={"byElection": date.strftime("%Y/%m/%d"), "Language": sources.LANG_LOP[FR]})},
                 },
-            )
+            ), update_fields=())  # As with get_or_create, existing by-elections are left as they are
@@ -115,6 +115,11 @@ class ElectionCandidate(SlugMixin, models.Model):
 
         * A candidate might run in one election as John Doe, but in the next as Jonny Doe. More frustrating still, a John Doe may run in one election, and a different John Doe in the next election in the same riding. [The Library of Parliament's History of Federal Ridings (HFER)](https://lop.parl.ca/About/Parliament/FederalRidingsHistory/HFER.asp) doesn't uniquely identify candidates and the research involved in doing so is well beyond the scope of this project. As such, only candidates that win are linked with their [parliamentarian](/parliamentarians/) object as per the available data. This means that looking at a parliamentarian, one can't get the list of failed candidacies as I don't have a solid enough source for that. Omitting spotty data seems a safer bet than including it.
         * Historically, a candidate's party affilialtion might be harder to deduce than one might expect. Take the case of [Norman James Macdonald Lockhart](https://lop.parl.ca/parlinfo/Files/Parliamentarian.aspx?Item=8071f7cb-6056-4879-99dc-e913be0cb2ec) who runs in the 19th General Election [as a member of the National Government Party](https://lop.parl.ca/About/Parliament/FederalRidingsHistory/hfer.asp?Language=E&Search=Gres&genElection=19&ridProvince=9), yet appears in ParlInfo [as a member of the Conservative Party (1867-1942)](https://lop.parl.ca/parlinfo/Files/Parliament.aspx?Item=09eeff1b-e930-4148-b062-729f06cd6860&Language=E&Section=Elections). Dave Tessier, ParlInfo Coordinator, explains: *A word of caution; the early elections were very difficult to compile and if you research other sources you will indeed find conflicting information at times. We focused on the most authoritative sources at our disposal during the time that this data was assembled, and when we discovered a conflict we simply tried to determine which information was the most reliable. Further, party affiliations in the early years are very difficult if not impossible to determine. Although not always clear, you can assume that HFER shows the "candidate affiliation" and the Parliamentarian file will show the affiliation in the House of Commons. Some of the affiliations for the earlier parliaments where very difficult to confirm.*
+
+        ## Aggregation examples
+
+        * [Seats won per party per general election](aggregate/?elected=True&group_by=election_riding__general_election,party)
+        * [Ballots cast per party per general election](aggregate/?group_by=election_riding__general_election,party&sum=ballots)
     """
     election_riding = models.ForeignKey(ElectionRiding, related_name="election_candidates", db_index=True)
     name = models.CharField(max_length=200, db_index=True)
@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+from federal_common.models import NamesMixin, NameIndex
+
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def upsert(model, objs, batch_size=DEFAULT_BATCH_SIZE, update_fields=None):
+    """
+        Inserts the given unsaved instances, updating any whose primary key
+        (or other unique key, on MySQL) already exists, with one multi-row
+        statement per batch. Like bulk_create, save() isn't called and no
+        signals are sent. Only update_fields (all but the primary key by
+        default) are overwritten on existing rows. Names written this way are
+        reindexed, as they would be by save().
+    """
+    objs = list({obj.pk: obj for obj in objs}.values())  # As with successive saves, the last duplicate wins
+    if not objs:
+        return
+    database = router.db_for_write(model)
+    connection = connections[database]
+    fields = model._meta.concrete_fields
+    update_fields = [
+        field
+        for field in fields
+        if not field.primary_key and (update_fields is None or field.name in update_fields or field.attname in update_fields)
+    ]
+    statement = " ".join((
+        "INSERT INTO {table} ({columns}) VALUES",
+        "{rows}",
+        get_conflict_clause(connection, model, update_fields),
+    ))
+    index_names = issubclass(model, NamesMixin) and model.name_indexed and any(field.name == "names" for field in update_fields)
+    row = "({})".format(", ".join(["%s"] * len(fields)))
+    batch_size = min(batch_size, connection.ops.bulk_batch_size(fields, objs))  # e.g. SQLite's cap on query parameters
+    for obj in objs:
+        if hasattr(obj, "consistency_check"):
+            obj.consistency_check()
+
+    for offset in range(0, len(objs), batch_size):
+        batch = objs[offset:offset + batch_size]
+        with transaction.atomic(using=database, savepoint=False), connection.cursor() as cursor:
+            cursor.execute(
+                statement.format(
+                    table=connection.ops.quote_name(model._meta.db_table),
+                    columns=", ".join(connection.ops.quote_name(field.column) for field in fields),
+                    rows=", ".join([row] * len(batch)),
+                ),
+                [
+                    field.get_db_prep_save(field.pre_save(obj, True), connection=connection)
+                    for obj in batch
+                    for field in fields
+                ],
+            )
+            if index_names:
+                NameIndex.update_index(model, [obj for obj in batch if obj.names_changed()])
+
+
+def get_conflict_clause(connection, model, update_fields):
+    quote = connection.ops.quote_name
+    if connection.vendor == "mysql":
+        return "ON DUPLICATE KEY UPDATE {}".format(", ".join(
+            "{column} = VALUES({column})".format(column=quote(field.column))
+            for field in update_fields or [model._meta.pk]
+        ))
+    elif connection.vendor in ("sqlite", "postgresql"):
+        return "ON CONFLICT ({}) {}".format(
+            quote(model._meta.pk.column),
+            "DO UPDATE SET {}".format(", ".join(
+                "{column} = excluded.{column}".format(column=quote(field.column))
+                for field in update_fields
+            )) if update_fields else "DO NOTHING",
+        )
+    raise NotImplementedError("No upsert support for {}".format(connection.vendor))
+
+
+class Batcher(object):
+    """
+        Accumulates parsed instances outside of any transaction and upserts
+        them in bounded chunks, so that no transaction is ever held open
+        across network I/O. Models are flushed parents first, following
+        their foreign keys.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.pending = OrderedDict()
+        self.count = 0
+
+    def add(self, obj, update_fields=None):
+        # Instances of a model written with different update_fields are upserted separately
+        key = (type(obj), None if update_fields is None else tuple(update_fields))
+        self.pending.setdefault(key, []).append(obj)
+        self.count += 1
+        if self.count >= self.batch_size:
+            self.flush()
+
+    def extend(self, objs, update_fields=None):
+        for obj in objs:
+            self.add(obj, update_fields)
+
+    def flush(self):
+        for model in get_dependency_order(set(model for model, update_fields in self.pending)):
+            for (pending_model, update_fields), objs in self.pending.items():
+                if pending_model is model:
+                    upsert(model, objs, self.batch_size, update_fields)
+        self.pending.clear()
+        self.count = 0
+
+
+def get_dependency_order(models):
+    ordered = []
+    visited = set()
+
+    def visit(model):
+        if model not in visited:
+            visited.add(model)
+            for field in model._meta.concrete_fields:
+                if field.is_relation and field.related_model in models:
+                    visit(field.related_model)
+            ordered.append(model)
+
+    for model in models:
+        visit(model)
+    return ordered
+
+
+class BatchedCommand(BaseCommand):
+    batch_size = DEFAULT_BATCH_SIZE
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=self.batch_size, help="Rows written per transaction")
+
+    def execute(self, *args, **options):
+        self.batcher = Batcher(options.get("batch_size", self.batch_size))
+        return super().execute(*args, **options)
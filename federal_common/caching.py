@@ -0,0 +1,162 @@
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+import hashlib
+import json
+import os
+import threading
+import time
+import wsgiref.util
+
+
+build = {}
+LOCK_POLL_INTERVAL = 0.05
+local_locks = {}  # Per key, and only while some thread holds or awaits one
+local_locks_lock = threading.Lock()
+
+
+def get_build():
+    # The version stamped by publish_build, reread whenever it's republished
+    try:
+        modified = os.path.getmtime(settings.BUILD_VERSION_PATH)
+    except OSError:
+        return None
+    if build.get("modified") != modified:
+        with open(settings.BUILD_VERSION_PATH, "r") as f:
+            build.clear()
+            build.update(json.load(f), modified=modified)
+    return build
+
+
+def get_etag(build, request):
+    return quote_etag(hashlib.md5("\n".join((
+        build["version"],
+        request.build_absolute_uri(),  # Hyperlinks in the response carry the host
+        request.META.get("HTTP_ACCEPT", ""),
+    )).encode("utf-8")).hexdigest())
+
+
+def get_cache_key(build, request):
+    # Parameter order doesn't change the response, so it shouldn't change the key
+    return "response.{}".format(hashlib.md5("\n".join((
+        build["version"],
+        request.build_absolute_uri(request.path),
+        json.dumps(sorted(request.GET.lists())),
+        request.META.get("HTTP_ACCEPT", ""),
+    )).encode("utf-8")).hexdigest())
+
+
+@contextmanager
+def local_lock(key):
+    with local_locks_lock:
+        lock, users = local_locks.get(key, (threading.Lock(), 0))
+        local_locks[key] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with local_locks_lock:
+            lock, users = local_locks[key]
+            if users > 1:
+                local_locks[key] = (lock, users - 1)
+            else:
+                del local_locks[key]
+
+
+def single_flight(cache, key, compute):
+    """
+        Returns the cached value for key, computing and caching it on a miss.
+        Concurrent misses for the same key within a process wait on the first
+        one's result rather than all computing it. Between processes, this
+        holds only as far as the cache's add() is atomic: it is with memcached
+        or Redis, but not with the file-based cache, under which processes
+        that miss at once may each compute the value. Nothing is cached when
+        compute returns None.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    with local_lock(key):
+        value = cache.get(key)
+        if value is not None:
+            return value
+        lock_key = "{}.lock".format(key)
+        locked = cache.add(lock_key, True, settings.API_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            deadline = time.monotonic() + settings.API_CACHE_LOCK_TIMEOUT
+            while cache.get(lock_key) and time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+            value = cache.get(key)
+            if value is not None:
+                return value
+        try:
+            value = compute()
+            if value is not None:
+                cache.set(key, value)
+            return value
+        finally:
+            if locked:
+                cache.delete(lock_key)
+
+
+class BuildCachingMixin(object):
+    """
+        Tags GET responses with the published data build, which only changes
+        when the pipeline runs, so that browsers and CDNs can reuse them and
+        conditional requests are answered with a 304 before any query is
+        made. Responses themselves are cached server-side until the next
+        build. Requests with a session (i.e. logged in users, who may be shown
+        editing forms) go through uncached.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        build = get_build()
+        if not build or request.method not in ("GET", "HEAD") or settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return super().dispatch(request, *args, **kwargs)
+
+        etag = get_etag(build, request)
+        if "HTTP_IF_NONE_MATCH" in request.META:
+            not_modified = any(match in ("*", etag) for match in parse_etags(request.META["HTTP_IF_NONE_MATCH"]))
+        else:
+            not_modified = (parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", "")) or 0) >= build["published"]
+        if not_modified:
+            response = HttpResponseNotModified()
+        elif request.method == "GET":
+            response = self.get_cached_response(build, request, *args, **kwargs)
+        else:
+            response = super().dispatch(request, *args, **kwargs)
+        if response.status_code not in (200, 304):
+            return response
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(build["published"])
+        response["Cache-Control"] = "public, max-age={}".format(settings.BUILD_CACHE_MAX_AGE)
+        patch_vary_headers(response, ("Accept", "Cookie"))  # Requests with a session go uncached
+        return response
+
+    def get_cached_response(self, build, request, *args, **kwargs):
+        dispatch = super().dispatch
+        uncached = []
+
+        def render():
+            response = dispatch(request, *args, **kwargs)
+            uncached.append(response)
+            if response.status_code != 200 or response.streaming:
+                return None
+            response.render()
+            return {
+                "content": response.content,
+                # e.g. DRF's Allow, so that a hit answers as the miss did
+                "headers": [(header, value) for header, value in response.items() if not wsgiref.util.is_hop_by_hop(header)],
+            }
+
+        cached = single_flight(caches[settings.API_CACHE], get_cache_key(build, request), render)
+        if uncached:
+            return uncached[0]
+        response = HttpResponse(cached["content"])
+        for header, value in cached["headers"]:
+            response[header] = value
+        return response
@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.db.models import fields
+from django.utils.text import slugify
+from django_extensions.db.fields.json import JSONField as JSONModelField
+from federal_common import sources
+from federal_common.exports import iterate_chunks
+from federal_common.sources import EN, FR
+from operator import itemgetter
+import json
+import os
+import pyarrow
+import pyarrow.parquet
+
+
+CHUNK_SIZE = 50000
+
+# The names the notebooks have always shown for each, where several sources name an entity
+NAME_SOURCES = {
+    "parliaments.Parliamentarian": sources.NAME_LOP_PARLIAMENT,
+    "parliaments.Party": sources.NAME_LOP_RIDING_HISTORY,
+    "parliaments.Province": sources.NAME_LOP_PROVINCE,
+    "parliaments.Riding": sources.NAME_LOP_RIDING_HISTORY,
+}
+
+
+def get_path(table_name):
+    return os.path.join(settings.COLUMNAR_EXPORT_ROOT, "{}.parquet".format(table_name))
+
+
+def get_table_name(model):
+    return slugify(model._meta.verbose_name_plural)
+
+
+def get_name(names, lang, preferred):
+    if preferred and preferred[lang] in names[lang]:
+        return names[lang][preferred[lang]]
+    for source in sorted(names[lang]):
+        return names[lang][source]
+    return None
+
+
+class Column(object):
+    """
+        How one model field is flattened into one (or, for names, two) columns.
+        Foreign keys and choices repeat a handful of values across millions of
+        rows, which the Parquet writer dictionary-encodes within each column
+        chunk by itself (pyarrow 0.8 has no dictionary types to write).
+    """
+
+    def __init__(self, field):
+        self.field = field
+        if isinstance(field, JSONModelField) and field.name == "names":
+            preferred = NAME_SOURCES.get(field.model._meta.label)
+            self.names = ["name_en", "name_fr"]
+            self.types = [pyarrow.string()] * 2
+            self.convert = lambda value: (get_name(value, EN, preferred), get_name(value, FR, preferred))
+            return
+
+        self.names = [field.attname]
+        self.convert = None
+        if field.is_relation:
+            self.types = [Column(field.target_field).types[0]]
+        elif field.choices:
+            self.types = [pyarrow.string()]
+            self.convert = lambda value, choices=dict(field.flatchoices): None if value is None else str(choices.get(value, value))
+        elif isinstance(field, JSONModelField):
+            self.types = [pyarrow.string()]
+            self.convert = lambda value: json.dumps(value, ensure_ascii=False)
+        elif isinstance(field, fields.BooleanField):
+            self.types = [pyarrow.bool_()]
+        elif isinstance(field, (fields.SmallIntegerField, fields.PositiveSmallIntegerField)):
+            self.types = [pyarrow.int16()]
+        elif isinstance(field, (fields.IntegerField, fields.AutoField)):
+            self.types = [pyarrow.int64()]
+        elif isinstance(field, fields.FloatField):
+            self.types = [pyarrow.float64()]
+        elif isinstance(field, fields.DecimalField):
+            self.types = [pyarrow.decimal128(field.max_digits, field.decimal_places)]
+        elif isinstance(field, fields.DateTimeField):
+            self.types = [pyarrow.timestamp("us", tz="UTC")]
+        elif isinstance(field, fields.DateField):
+            self.types = [pyarrow.date32()]
+        else:
+            self.types = [pyarrow.string()]
+            self.convert = lambda value: None if value is None else str(value)  # e.g. files
+
+    def get_fields(self):
+        return [pyarrow.field(name, column_type) for name, column_type in zip(self.names, self.types)]
+
+    def get_arrays(self, values):
+        if self.convert:
+            values = [self.convert(value) for value in values]
+        if len(self.names) > 1:
+            columns = [[value[index] for value in values] for index in range(len(self.names))]
+        else:
+            columns = [values]
+        return [pyarrow.array(column, type=column_type) for column, column_type in zip(columns, self.types)]
+
+
+def export_model(model, chunk_size=CHUNK_SIZE):
+    """
+        Writes every row of a model to a Parquet file in COLUMNAR_EXPORT_ROOT,
+        a chunk at a time, with one column per field and names flattened to
+        their English and French forms. The file is written aside and moved
+        into place, so that it's never served half written.
+    """
+    columns = [Column(field) for field in model._meta.concrete_fields]
+    names = [name for column in columns for name in column.names]
+    schema = pyarrow.schema([arrow_field for column in columns for arrow_field in column.get_fields()])
+    path = get_path(get_table_name(model))
+    os.makedirs(settings.COLUMNAR_EXPORT_ROOT, exist_ok=True)
+
+    rows = 0
+    writer = pyarrow.parquet.ParquetWriter("{}.tmp".format(path), schema, use_dictionary=True)
+    try:
+        for chunk in iterate_chunks(
+            model.objects.values_list(*[column.field.attname for column in columns]),
+            chunk_size=chunk_size,
+            get_pk=itemgetter([column.field.primary_key for column in columns].index(True)),
+        ):
+            writer.write_table(pyarrow.Table.from_arrays([
+                array
+                for index, column in enumerate(columns)
+                for array in column.get_arrays([row[index] for row in chunk])
+            ], names))
+            rows += len(chunk)
+    finally:
+        writer.close()
+    os.replace("{}.tmp".format(path), path)
+    return rows
@@ -0,0 +1,52 @@
+from operator import attrgetter
+from rest_framework.utils.encoders import JSONEncoder
+import csv
+import json
+
+
+CHUNK_SIZE = 1000
+
+
+def iterate_chunks(queryset, chunk_size=CHUNK_SIZE, get_pk=attrgetter("pk")):
+    """
+        Yields every row of a queryset in primary key order, a chunk at a time,
+        each chunk seeking past the last primary key of the one before. Memory
+        stays constant however large the table, which iterator() alone doesn't
+        ensure as MySQLdb buffers whole result sets client-side.
+    """
+    pk_name = queryset.model._meta.pk.name
+    queryset = queryset.order_by(pk_name)
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield chunk
+        if len(chunk) < chunk_size:
+            break
+        chunk = list(queryset.filter(**{"{}__gt".format(pk_name): get_pk(chunk[-1])})[:chunk_size])
+
+
+def stream_ndjson(queryset, get_serializer):
+    for chunk in iterate_chunks(queryset):
+        for row in get_serializer(chunk, many=True).data:
+            yield "{}\n".format(json.dumps(row, cls=JSONEncoder, ensure_ascii=False))
+
+
+class Echo(object):
+    # A file-like object for csv.writer that hands each formatted row back rather than storing it
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, get_serializer):
+    writer = csv.writer(Echo())
+    yield writer.writerow(get_serializer().fields.keys())
+    for chunk in iterate_chunks(queryset):
+        for row in get_serializer(chunk, many=True).data:
+            yield writer.writerow(get_csv_value(value) for value in row.values())
+
+
+def get_csv_value(value):
+    if value is None:
+        return ""
+    elif isinstance(value, (dict, list)):
+        return json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+    return value
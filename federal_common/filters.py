@@ -0,0 +1,180 @@
+from contextlib import contextmanager
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.db import OperationalError, connections, router
+from django.utils.text import slugify
+from django_extensions.db.fields.json import JSONField as JSONModelField
+from federal_common.caching import get_build
+from federal_common.models import NamesMixin, NameIndex
+from rest_framework import filters
+from rest_framework.exceptions import APIException
+import time
+
+
+# Lookups no index can serve, whatever the column
+SCAN_LOOKUPS = set(["contains", "icontains", "regex", "iregex", "endswith", "iendswith"])
+# Lookups that narrow an indexed column to the rows matching it
+SEEK_LOOKUPS = set(["exact", "in"])
+# Actions that read every row their filters leave, rather than a page of them
+WHOLE_SET_ACTIONS = {
+    "aggregate": "aggregate",
+    "export_ndjson": "export.ndjson",
+    "export_csv": "export.csv",
+}
+# Seconds row estimates are kept for when no build is published to rebuild them
+ROW_ESTIMATE_TTL = 5 * 60
+STATEMENT_TIMEOUT_VARIABLES = {
+    "mysql": "max_execution_time",
+    "postgresql": "statement_timeout",
+}
+row_estimates = {}
+
+
+class QueryTooExpensive(APIException):
+    status_code = 400
+    default_detail = "This query would scan too much of its table, narrow it with an indexed filter (e.g. an exact match or a nested route)."
+
+
+def is_indexed(field):
+    return field.primary_key or field.unique or field.db_index or field.is_relation
+
+
+def get_row_estimate(model):
+    # Rebuilt with each published build, which is when tables change size
+    build = get_build()
+    signature = build["version"] if build else int(time.time() // ROW_ESTIMATE_TTL)
+    if row_estimates.get(model, (None, ))[0] != signature:
+        connection = connections[router.db_for_read(model)]
+        if connection.vendor == "mysql":
+            # InnoDB counts by walking an index, its statistics are near enough
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            estimate = (row[0] or 0) if row else 0
+        else:
+            estimate = model.objects.count()
+        row_estimates[model] = (signature, estimate)
+    return row_estimates[model][1]
+
+
+def get_scans(view, query_params, url_kwargs, action):
+    """
+        The parts of a request that would have the database read every row of
+        a view's table: lookups no index can serve, text searches the
+        NameIndex can't, orderings by unindexed columns and actions reading
+        everything left unfiltered. None of them count once a unique column
+        (or the primary key of a detail route) narrows the query to a row or
+        so.
+    """
+    if any(key == "pk" for key in url_kwargs) or action == "batch":
+        return []
+
+    model = view.queryset.model
+    scans = []
+    narrowed = any(key.endswith("_pk") for key in url_kwargs)  # The parent of a nested route, through its foreign key
+    for name, filter_field in view.filter_class.base_filters.items():
+        if not query_params.get(name):
+            continue  # Empty values aren't filtered on
+        field = model._meta.get_field(filter_field.name)
+        if filter_field.lookup_expr in SEEK_LOOKUPS and (field.primary_key or field.unique):
+            return []
+        if filter_field.lookup_expr in SCAN_LOOKUPS or isinstance(field, JSONModelField) or not is_indexed(field):
+            scans.append(name)
+        elif filter_field.lookup_expr in SEEK_LOOKUPS:
+            narrowed = True
+    if query_params.get(filters.SearchFilter.search_param) and not (issubclass(model, NamesMixin) and model.name_indexed):
+        scans.append(filters.SearchFilter.search_param)
+    for term in query_params.get(filters.OrderingFilter.ordering_param, "").split(","):
+        try:
+            field = model._meta.get_field(term.strip().lstrip("-"))
+        except FieldDoesNotExist:
+            continue  # Ignored by OrderingFilter
+        if not is_indexed(field):
+            scans.append("{}={}".format(filters.OrderingFilter.ordering_param, term.strip()))
+    if action in WHOLE_SET_ACTIONS and not narrowed:
+        scans.append(WHOLE_SET_ACTIONS[action])
+    return scans
+
+
+class QueryCostFilter(filters.BaseFilterBackend):
+    """
+        Refuses queries that would scan a table larger than
+        QUERY_SCAN_MAX_ROWS, before any of them is made. Scans of smaller
+        tables, or of larger ones narrowed by a unique filter, go through
+        (under a statement timeout, see StatementTimeoutMixin).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        scans = get_scans(view, request.query_params, view.kwargs, view.action)
+        if scans and get_row_estimate(queryset.model) > settings.QUERY_SCAN_MAX_ROWS:
+            raise QueryTooExpensive("{} would scan every {} row, narrow it with an exact match on its slug or another unique column.".format(
+                ", ".join(scans),
+                queryset.model._meta.verbose_name,
+            ))
+        return queryset
+
+
+class NameSearchFilter(filters.SearchFilter):
+    """
+        Searches models whose names are indexed through the NameIndex,
+        matching the start of any of their names (either way round for "Last,
+        First" ones) or slugs, rather than scanning every one of their JSON
+        names. Other models are searched as by SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not (issubclass(queryset.model, NamesMixin) and queryset.model.name_indexed):
+            return super().filter_queryset(request, queryset, view)
+        content_type = ContentType.objects.get_for_model(queryset.model)
+        for term in self.get_search_terms(request):
+            normalized = slugify(term)
+            if normalized:
+                # Only a prefix can be read from the index, a word within a name can't
+                queryset = queryset.filter(pk__in=NameIndex.objects.filter(
+                    content_type=content_type,
+                    normalized__startswith=normalized,
+                ).values("object_slug"))
+        return queryset
+
+
+@contextmanager
+def statement_timeout(connection, milliseconds):
+    variable = STATEMENT_TIMEOUT_VARIABLES.get(connection.vendor)
+    if variable is None:
+        yield  # e.g. SQLite, which has no such setting
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SET SESSION {} = {:d}".format(variable, milliseconds))
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SET SESSION {} = DEFAULT".format(variable))
+
+
+class StatementTimeoutMixin(object):
+    """
+        Reads that scan their table are cut short after
+        QUERY_STATEMENT_TIMEOUT milliseconds, so that no one request can tie
+        up the database. Streamed exports are read after the response is
+        returned and so aren't covered.
+    """
+    statement_timed = False
+
+    def dispatch(self, request, *args, **kwargs):
+        # self.action is only set further into dispatch
+        action = self.action_map.get(request.method.lower())
+        if request.method != "GET" or not get_scans(self, request.GET, kwargs, action):
+            return super().dispatch(request, *args, **kwargs)
+        self.statement_timed = True
+        with statement_timeout(connections[router.db_for_read(self.queryset.model)], settings.QUERY_STATEMENT_TIMEOUT):
+            return super().dispatch(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        if self.statement_timed and isinstance(exc, OperationalError):
+            exc = QueryTooExpensive()
+        return super().handle_exception(exc)
@@ -1,10 +1,22 @@
+from collections import OrderedDict
+from django.conf import settings
 from django.conf.urls import url, include
-from django.db.models import fields
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Count, Sum, fields
 from django.db.models.base import ModelBase
+from django.http import StreamingHttpResponse
 from django.utils.text import slugify
 from django_extensions.db.fields.json import JSONField as JSONModelField
+from federal_common.caching import BuildCachingMixin
+from federal_common.exports import stream_csv, stream_ndjson
+from federal_common.filters import NameSearchFilter, QueryCostFilter, StatementTimeoutMixin, is_indexed
+from federal_common.pagination import KeysetPagination, get_keyset_ordering, is_keyset_orderable
 from rest_framework import filters
 from rest_framework import serializers, viewsets
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.decorators import list_route
+from rest_framework.exceptions import ParseError
 from rest_framework.fields import JSONField as JSONSerializerField
 from rest_framework_nested import routers as nested_routers
 import django_filters
@@ -12,6 +24,7 @@ import re
 
 
 COMPARISONS = set(["exact", "gt", "gte", "lt", "lte"])
+AGGREGATE_DEPTH = 2
 REL_MATCH = re.compile(r"[_-]rel[_-]\+")
 
 
@@ -29,6 +42,8 @@ def prep(*args):
 
 def get_field_lookups(field):
     lookups = set(["exact"])
+    if field.primary_key or field.unique:
+        lookups.add("in")
     if isinstance(field, (fields.CharField, JSONModelField)):
         lookups.update(set([
             "contains", "icontains",
@@ -53,17 +68,101 @@ def get_field_lookups(field):
     return lookups
 
 
+def get_requested_fields(query_params, name, choices):
+    # A comma-separated subset of the given choices, or None where the parameter isn't given
+    if name not in query_params:
+        return None
+    requested = [field_name for field_name in query_params[name].split(",") if field_name]
+    unknown = [field_name for field_name in requested if field_name not in choices]
+    if unknown:
+        raise ParseError("Unknown {}: {} (must be among {})".format(name, ", ".join(unknown), ", ".join(choices)))
+    return requested
+
+
+def get_batch_pks(request, pk_field):
+    # Either a JSON list in the body of a POST or a comma-separated ?pk= (which, unlike a POST, can be cached)
+    if request.method == "POST":
+        values = request.data
+        if not isinstance(values, list):
+            raise ParseError("Expected a list of primary keys")
+    else:
+        values = [value for value in request.query_params.get("pk", "").split(",") if value]
+    if len(values) > settings.BATCH_LOOKUP_MAX:
+        raise ParseError("At most {} objects can be fetched at once".format(settings.BATCH_LOOKUP_MAX))
+    try:
+        return list(OrderedDict.fromkeys(pk_field.to_python(value) for value in values))
+    except (TypeError, ValidationError):
+        raise ParseError("Unrecognized primary keys")
+
+
+def get_group_by_paths(model, depth=AGGREGATE_DEPTH, prefix=""):
+    # Every column aggregates can be grouped by, following forward relations up to the given depth
+    paths = []
+    for field in model._meta.concrete_fields:
+        if isinstance(field, (JSONModelField, fields.TextField, fields.files.FileField)) or (prefix and field.primary_key):
+            continue  # A related primary key is the foreign key already grouped by
+        paths.append(prefix + field.name)
+        if field.is_relation and depth > 1:
+            paths.extend(get_group_by_paths(field.related_model, depth - 1, "{}{}__".format(prefix, field.name)))
+    return paths
+
+
+def get_path_field(model, path):
+    field_names = path.split("__")
+    for field_name in field_names[:-1]:
+        model = model._meta.get_field(field_name).related_model
+    return model._meta.get_field(field_names[-1])
+
+
+def get_summable_fields(model):
+    return [
+        field.name
+        for field in model._meta.concrete_fields
+        if isinstance(field, (fields.IntegerField, fields.DecimalField, fields.FloatField)) and not (field.primary_key or field.is_relation or field.choices)
+    ]
+
+
+def plan_queryset(queryset, serializer_fields, required=()):
+    """
+        Loads only the columns the serializer renders (and any required
+        otherwise, e.g. by the paginator), joining in the forward relations it
+        renders beyond their primary key (a hyperlink only needs the foreign
+        key column, so those aren't joined).
+    """
+    opts = queryset.model._meta
+    only = set([opts.pk.name]) | set(required)
+    select_related = set()
+    for serializer_field in serializer_fields.values():
+        try:
+            # Choices are rendered by a method field, which reads its model field from the whole instance
+            field = opts.get_field(serializer_field.field_name if serializer_field.source == "*" else serializer_field.source)
+        except FieldDoesNotExist:
+            continue  # e.g. the url
+        if not field.concrete or field.many_to_many:
+            continue  # Reverse and many-to-many relations are rendered as links to nested routes
+        only.add(field.name)
+        if field.is_relation and not (
+            isinstance(serializer_field, serializers.RelatedField) and serializer_field.use_pk_only_optimization()
+        ):
+            select_related.add(field.name)
+    queryset = queryset.only(*only)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    return queryset
+
+
 def generate_urls(*model_sets):
     router = nested_routers.DefaultRouter()
     nested_router_instances = []
     model_viewsets = {}
+    model_serializers = {}
 
     for models in model_sets:
         for model_name in dir(models):
             model_class = getattr(models, model_name)
             if isinstance(model_class, ModelBase) and "Mixin" not in model_name:
                 class Serializer(serializers.HyperlinkedModelSerializer):
-                    def __init__(self, *args, **kwargs):
+                    def __init__(self, *args, nested=False, **kwargs):
                         super().__init__(*args, **kwargs)
                         for field in self.Meta.model._meta.local_fields:
                             if isinstance(field, JSONModelField):
@@ -81,6 +180,26 @@ def generate_urls(*model_sets):
                                     "lookup_url_kwarg": field.remote_field.name.replace("_rel_+", "") + "_pk",  # TODO: This feels hacky. What's the proper approach?
                                 }
                                 self.fields[field.name] = serializers.HyperlinkedIdentityField(**field_kwargs)
+                        request = self.context.get("request")
+                        if request is not None and not nested:
+                            self.select_fields(request.query_params)
+
+                    def select_fields(self, query_params):
+                        # ?fields= prunes what's rendered (and so what's loaded), ?expand= inlines forward relations
+                        requested = get_requested_fields(query_params, "fields", list(self.fields))
+                        if requested is not None:
+                            for field_name in list(self.fields):
+                                if field_name not in requested:
+                                    del self.fields[field_name]
+                        expandable = [
+                            field.name
+                            for field in self.Meta.model._meta.local_fields
+                            if field.is_relation and field.related_model in model_serializers
+                        ]
+                        for field_name in get_requested_fields(query_params, "expand", expandable) or []:
+                            if field_name in self.fields:
+                                related_model = self.Meta.model._meta.get_field(field_name).related_model
+                                self.fields[field_name] = model_serializers[related_model](context=self.context, nested=True, read_only=True)
 
                     class Meta:
                         model = model_class
@@ -99,11 +218,14 @@ def generate_urls(*model_sets):
                         }
 
                 # ViewSets define the view behavior.
-                class ViewSet(viewsets.ModelViewSet):
+                class ViewSet(BuildCachingMixin, StatementTimeoutMixin, viewsets.ModelViewSet):
                     queryset = model_class.objects.all()
                     serializer_class = Serializer
-                    filter_backends = (filters.SearchFilter, filters.DjangoFilterBackend)
+                    filter_backends = (QueryCostFilter, NameSearchFilter, filters.DjangoFilterBackend, filters.OrderingFilter)
                     filter_class = Filter
+                    if model_class._meta.label in settings.KEYSET_PAGINATED_MODELS:
+                        pagination_class = KeysetPagination
+                        ordering = get_keyset_ordering(model_class)
 
                     def __init__(self, *args, **kwargs):
                         super().__init__(*args, **kwargs)
@@ -112,6 +234,24 @@ def generate_urls(*model_sets):
                             for field in self.queryset.model._meta.local_fields
                             if isinstance(field, fields.CharField)
                         ]
+                        # Sorting on anything else would sort the whole table, or page by a cursor that isn't unique
+                        is_orderable = is_keyset_orderable if self.pagination_class is KeysetPagination else is_indexed
+                        self.ordering_fields = [
+                            field.name
+                            for field in self.queryset.model._meta.local_fields
+                            if is_orderable(field)
+                        ]
+
+                    def get_queryset(self):
+                        queryset = super().get_queryset()
+                        required = []
+                        if self.pagination_class is KeysetPagination:
+                            # The cursor is read from the ordering fields of the last row of a page
+                            required = [
+                                field_name.lstrip("-")
+                                for field_name in filters.OrderingFilter().get_ordering(self.request, queryset, self)
+                            ]
+                        return plan_queryset(queryset, self.get_serializer().fields, required)
 
                     def filter_queryset(self, *args, **kwargs):
                         queryset = super().filter_queryset(*args, **kwargs)
@@ -121,6 +261,72 @@ def generate_urls(*model_sets):
                         })
                         return queryset
 
+                    @list_route(url_path=r"export\.ndjson", url_name="export-ndjson")  # The router adds a trailing slash, as to every route
+                    def export_ndjson(self, request, *args, **kwargs):
+                        return self.export(stream_ndjson, "application/x-ndjson", "ndjson")
+
+                    @list_route(url_path=r"export\.csv", url_name="export-csv")
+                    def export_csv(self, request, *args, **kwargs):
+                        return self.export(stream_csv, "text/csv; charset=utf-8", "csv")
+
+                    @list_route(methods=["get", "post"], permission_classes=(AllowAny, ))  # A POST here only reads
+                    def batch(self, request, *args, **kwargs):
+                        pks = get_batch_pks(request, self.queryset.model._meta.pk)
+                        objs = self.filter_queryset(self.get_queryset()).order_by().in_bulk(pks)
+                        return Response({
+                            "results": self.get_serializer([objs[pk] for pk in pks if pk in objs], many=True).data,
+                            "missing": [pk for pk in pks if pk not in objs],
+                        })
+
+                    @list_route()
+                    def aggregate(self, request, *args, **kwargs):
+                        model = self.queryset.model
+                        group_by = get_requested_fields(request.query_params, "group_by", get_group_by_paths(model)) or []
+                        sums = get_requested_fields(request.query_params, "sum", get_summable_fields(model)) or []
+                        totals = ["count"] if "count" in request.query_params or not sums else []
+                        totals += [field_name for field_name in sums if field_name not in totals]
+                        if set(group_by) & set(totals):
+                            raise ParseError("Can't both group by and total {}".format(", ".join(set(group_by) & set(totals))))
+
+                        # Annotations can't share their names with model fields, hence the prefix
+                        annotations = {
+                            "total_{}".format(total): Count("pk") if total == "count" else Sum(total)
+                            for total in totals
+                        }
+                        queryset = self.filter_queryset(self.queryset.all())
+                        if not group_by:
+                            rows = [queryset.aggregate(**annotations)]
+                        else:
+                            # Reordering by the groups alone keeps any ?ordering= out of the GROUP BY
+                            rows = list(queryset.values(*group_by).annotate(**annotations).order_by(*group_by)[:settings.AGGREGATE_MAX_GROUPS + 1])
+                            if len(rows) > settings.AGGREGATE_MAX_GROUPS:
+                                raise ParseError("More than {} groups, filter further or group by less".format(settings.AGGREGATE_MAX_GROUPS))
+                        choices = {
+                            field_name: dict(get_path_field(model, field_name).flatchoices)
+                            for field_name in group_by
+                        }
+                        return Response([
+                            dict(
+                                # Choices are shown as they are by the serializer
+                                {field_name: choices[field_name].get(row[field_name], row[field_name]) for field_name in group_by},
+                                **{total: row["total_{}".format(total)] for total in totals}
+                            )
+                            for row in rows
+                        ])
+
+                    def export(self, stream, content_type, extension):
+                        # The whole filtered list in one response, streamed rather than paginated
+                        response = StreamingHttpResponse(
+                            stream(self.filter_queryset(self.get_queryset()), self.get_serializer),
+                            content_type=content_type,
+                        )
+                        response["Content-Disposition"] = 'attachment; filename="{}.{}"'.format(
+                            slugify(self.queryset.model._meta.verbose_name_plural),
+                            extension,
+                        )
+                        return response
+
+                model_serializers[model_class] = Serializer
                 model_viewsets[model_name] = ViewSet
                 router.register(str(slugify(model_class._meta.verbose_name_plural)), ViewSet)
 
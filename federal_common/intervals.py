@@ -0,0 +1,78 @@
+from bisect import bisect_right
+
+
+class DateIntervalIndex(object):
+    """
+        Resolves a date to the object whose [start, end] range contains it.
+
+        Ranges are expected not to overlap (e.g. sessions), and a missing end
+        is treated as ongoing. Lookups are a bisection over the sorted starts.
+    """
+
+    def __init__(self, objs, start_attr="date_start", end_attr="date_end"):
+        self.intervals = sorted(
+            ((getattr(obj, start_attr), getattr(obj, end_attr), obj) for obj in objs),
+            key=lambda interval: interval[0],
+        )
+        self.starts = [start for start, end, obj in self.intervals]
+
+    def __getitem__(self, day):
+        index = bisect_right(self.starts, day) - 1
+        if index < 0:
+            raise KeyError(day)
+        start, end, obj = self.intervals[index]
+        if end is not None and end < day:
+            raise KeyError(day)
+        return obj
+
+    def get(self, day, default=None):
+        try:
+            return self[day]
+        except KeyError:
+            return default
+
+
+class IntervalTree(object):
+    """
+        Finds every (start, end, value) interval overlapping a given window.
+
+        Intervals are kept sorted by start and treated as an implicit balanced
+        tree (each slice's middle is its root), with the latest end of every
+        subtree recorded so that non-overlapping branches are skipped. Queries
+        run in O(log n + k) for k matches, which come back ordered by start.
+    """
+
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals, key=lambda interval: interval[0])
+        self.max_ends = [None] * len(self.intervals)
+        self.build(0, len(self.intervals))
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def build(self, low, high):
+        if low >= high:
+            return None
+        middle = (low + high) // 2
+        self.max_ends[middle] = max(filter(lambda end: end is not None, (
+            self.intervals[middle][1],
+            self.build(low, middle),
+            self.build(middle + 1, high),
+        )))
+        return self.max_ends[middle]
+
+    def overlapping(self, start, end=None):
+        matches = []
+        self.search(0, len(self.intervals), start, start if end is None else end, matches)
+        return matches
+
+    def search(self, low, high, start, end, matches):
+        if low >= high or self.max_ends[(low + high) // 2] < start:
+            return
+        middle = (low + high) // 2
+        self.search(low, middle, start, end, matches)
+        interval_start, interval_end, value = self.intervals[middle]
+        if interval_start <= end:
+            if interval_end >= start:
+                matches.append(value)
+            self.search(middle + 1, high, start, end, matches)
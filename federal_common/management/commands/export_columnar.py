@@ -0,0 +1,36 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from federal_common.columnar import export_model, get_table_name
+from tqdm import tqdm
+import logging
+
+
+logger = logging.getLogger(__name__)
+APPS = ("parliaments", "elections", "proceedings")
+
+
+class Command(BaseCommand):
+    help = "Writes each table to a Parquet file for analytics clients, e.g. pandas.read_parquet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("tables", nargs="*", help="Table names as in their export URLs, e.g. election-candidates (all of them by default)")
+
+    def handle(self, *args, **options):
+        if options["verbosity"] > 1:
+            logger.setLevel(logging.DEBUG)
+
+        models = {
+            get_table_name(model): model
+            for app_label in APPS
+            for model in apps.get_app_config(app_label).get_models()
+        }
+        unknown = set(options["tables"]) - set(models)
+        if unknown:
+            raise CommandError("Unknown tables: {}".format(", ".join(sorted(unknown))))
+
+        for table_name in tqdm(
+            options["tables"] or sorted(models),
+            desc="Export Columnar",
+            unit="table",
+        ):
+            logger.debug("Exported {} rows of {}".format(export_model(models[table_name]), table_name))
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+import json
+import os
+
+
+class Command(BaseCommand):
+    help = "Stamps a new data build once the pipeline (or a load of its dump) has finished, so that cached API responses are refreshed"
+
+    def handle(self, *args, **options):
+        published = timezone.now()
+        build = {
+            "version": published.strftime("%Y%m%d%H%M%S%f"),
+            "published": int(published.timestamp()),
+        }
+
+        # Written aside and moved into place, so that a request never reads half a file
+        path = "{}.tmp".format(settings.BUILD_VERSION_PATH)
+        with open(path, "w") as f:
+            json.dump(build, f)
+        os.replace(path, settings.BUILD_VERSION_PATH)
+        caches[settings.API_CACHE].clear()  # Already unreachable under the new version, this just reclaims the space
+        self.stdout.write("Published build {}".format(build["version"]))
@@ -0,0 +1,30 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from federal_common.models import NamesMixin, NameIndex
+from tqdm import tqdm
+import logging
+
+
+logger = logging.getLogger(__name__)
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the name index from scratch, e.g. after names were written with QuerySet.update() or raw SQL"
+
+    def handle(self, *args, **options):
+        if options["verbosity"] > 1:
+            logger.setLevel(logging.DEBUG)
+
+        NameIndex.objects.all().delete()  # Including the names of any model no longer indexed
+        for model in apps.get_models():
+            if not (issubclass(model, NamesMixin) and model.name_indexed):
+                continue
+            objs = list(model.objects.all())
+            for offset in tqdm(
+                range(0, len(objs), BATCH_SIZE),
+                desc="Rebuild Name Index ({})".format(model._meta.verbose_name),
+                unit="batch",
+            ):
+                NameIndex.update_index(model, objs[offset:offset + BATCH_SIZE])
+            logger.debug("Indexed {} {}".format(len(objs), model._meta.verbose_name_plural))
@@ -1,4 +1,8 @@
-from django.db import models
+from collections import defaultdict
+from copy import deepcopy
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.utils.text import slugify
 from django_extensions.db.fields import json
 from federal_common.sources import EN, FR
 
@@ -11,7 +15,8 @@ class LinksMixin(models.Model):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.links = self.links or {EN: {}, FR: {}}
+        if "links" in self.__dict__:  # i.e. not deferred
+            self.links = self.links or {EN: {}, FR: {}}
 
 
 class SlugMixin(models.Model):
@@ -26,10 +31,109 @@ class SlugMixin(models.Model):
 
 class NamesMixin(models.Model):
     names = json.JSONField()
+    name_indexed = False  # Whether commands resolve the model by name, and so keep its names in the NameIndex
 
     class Meta:
         abstract = True
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.names = self.names or {EN: {}, FR: {}}
+        if "names" in self.__dict__:  # i.e. not deferred
+            self.names = self.names or {EN: {}, FR: {}}
+        self.indexed_names = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super().from_db(db, field_names, values)
+        if "names" in obj.__dict__:
+            obj.indexed_names = deepcopy(obj.names)
+        return obj
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if self.name_indexed and self.names_changed() and (update_fields is None or "names" in update_fields):
+            NameIndex.update_index(type(self), [self])
+
+    def names_changed(self):
+        return self.indexed_names != self.names
+
+
+class NameIndex(models.Model):
+    """
+        Every name an entity is known by, kept current as entities are saved,
+        so that commands can resolve names with one indexed query instead of
+        loading and walking every instance of a model.
+
+        `name` is the exact form as scraped (or derived from it, e.g.
+        "Elizabeth May" from "May, Elizabeth"), and `normalized` its slugified
+        form for accent- and case-insensitive lookups.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name="+")
+    object_slug = models.SlugField(max_length=200, db_index=True)
+    name = models.CharField(max_length=250)
+    normalized = models.CharField(max_length=250)
+    lang = models.CharField(max_length=2, blank=True)
+    source = models.CharField(max_length=100)
+
+    class Meta:
+        index_together = [
+            ("content_type", "name"),
+            ("content_type", "normalized"),
+        ]
+
+    def __str__(self):
+        return "{} ({})".format(self.name, self.object_slug)
+
+    @classmethod
+    def get_entries(cls, obj):
+        entries = {(obj.slug, "", "slug")}
+        if getattr(obj, "lop_item_code", None):
+            entries.add((obj.lop_item_code, "", "lop_item_code"))
+        for lang in (EN, FR):
+            for source, name in obj.names[lang].items():
+                entries.add((name, lang, source))
+                if name.count(", ") == 1:
+                    renamed = " ".join(reversed(name.split(", ")))
+                    entries.add((renamed, lang, source))
+                    entries.add((slugify(renamed), lang, source))
+        for name, lang, source in entries:
+            if name and len(name) <= cls._meta.get_field("name").max_length:
+                yield name, lang, source
+
+    @classmethod
+    def update_index(cls, model, objs):
+        objs = [obj for obj in objs if obj.pk]
+        if not objs:
+            return
+        content_type = ContentType.objects.get_for_model(model)
+
+        # Instances that weren't read from the database (e.g. rebuilt by a
+        # command before an upsert) can't tell whether their names changed,
+        # so what's already indexed is compared with what would be.
+        entries = {obj.pk: set(cls.get_entries(obj)) for obj in objs}
+        indexed = defaultdict(set)
+        for object_slug, name, lang, source in cls.objects.filter(
+            content_type=content_type,
+            object_slug__in=list(entries),
+        ).values_list("object_slug", "name", "lang", "source").iterator():
+            indexed[object_slug].add((name, lang, source))
+        changed = [object_slug for object_slug in entries if entries[object_slug] != indexed[object_slug]]
+
+        if changed:
+            with transaction.atomic(savepoint=False):
+                cls.objects.filter(content_type=content_type, object_slug__in=changed).delete()
+                cls.objects.bulk_create([
+                    cls(
+                        content_type=content_type,
+                        object_slug=object_slug,
+                        name=name,
+                        normalized=slugify(name)[:250],
+                        lang=lang,
+                        source=source,
+                    )
+                    for object_slug in changed
+                    for name, lang, source in entries[object_slug]
+                ], batch_size=500)
+        for obj in objs:
+            obj.indexed_names = deepcopy(obj.names)
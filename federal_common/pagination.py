@@ -0,0 +1,32 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+        Pages by the position of the last row seen rather than by offset, so
+        that a page deep into a large table costs the same as the first, and
+        without counting the table on every request.
+
+        Rows are listed by primary key, as the position is read from a single
+        column which must be unique for pages to neither skip nor repeat rows.
+    """
+    page_size_query_param = "limit"
+    max_page_size = 1000
+
+    def get_page_size(self, request):
+        # As with limit/offset, ?limit= sets the page size (CursorPagination doesn't read it until DRF 3.7)
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+
+def get_keyset_ordering(model):
+    # DRF 3.6 only positions the cursor on the first field, so no tie-breaker after it would be used
+    return (model._meta.pk.name, )
+
+
+def is_keyset_orderable(field):
+    # A cursor can't be positioned on a NULL, nor on a relation (which orders by the related model)
+    return field.primary_key or (field.unique and not field.null and not field.is_relation)
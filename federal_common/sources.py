@@ -37,7 +37,7 @@ NAME_TWITTER = {EN: "Twitter", FR: "Twitter"}
 NAME_WIKI = {EN: "Wikipedia", FR: "Wikipédia"}
 
 LANG_CANADIANA_CONTENT = {EN: "eng", FR: "fra"}
-LANG_CANADIANA_UI = LANG_LEGISINFO_XML = LANG_WIKI = LANG_PARLVU = {EN: "en", FR: "fr"}
+LANG_CANADIANA_UI = LANG_LEGISINFO_XML = LANG_WIKI = LANG_PARLVU = LANG_HOC_UI = {EN: "en", FR: "fr"}
 LANG_LOP = LANG_LEGISINFO_UI = LANG_HOC_HANSARD_XML = {EN: "E", FR: "F"}
 LANG_EC = {EN: "e", FR: "f"}
 
@@ -0,0 +1,636 @@
+from datetime import date
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils.http import http_date
+from federal_common.bulk import Batcher, upsert
+from federal_common.caching import get_build, local_locks, single_flight
+from federal_common.columnar import export_model, get_path
+from federal_common.exports import iterate_chunks
+from federal_common.filters import NameSearchFilter, QueryTooExpensive, get_row_estimate, row_estimates, statement_timeout
+from federal_common.intervals import DateIntervalIndex, IntervalTree
+from federal_common.models import NameIndex
+from federal_common.sources import EN, FR
+from federal_common.utils import NameResolver, get_cached_dict, get_cached_obj
+from io import StringIO
+from parliaments.models import Parliament, Party, Session
+from proceedings.models import Bill
+from unittest.mock import MagicMock, call, patch
+from urllib.parse import urlparse
+import csv
+import json
+import os
+import pyarrow.parquet
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+
+def get_party(slug, name, color="red"):
+    return Party(slug=slug, color=color, names={EN: {"test": name}, FR: {}})
+
+
+def get_indexed_names(model):
+    return set(NameIndex.objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+    ).values_list("object_slug", "name"))
+
+
+class UpsertTestCase(TestCase):
+
+    def test_inserts(self):
+        upsert(Party, [get_party("liberal", "Liberal"), get_party("green", "Green")])
+        self.assertEqual(dict(Party.objects.values_list("slug", "color")), {"liberal": "red", "green": "red"})
+
+    def test_updates_only_update_fields(self):
+        upsert(Party, [get_party("liberal", "Liberal")])
+        upsert(Party, [get_party("liberal", "Liberal Party", color="blue")], update_fields=("color", ))
+        party = Party.objects.get(slug="liberal")
+        self.assertEqual(party.color, "blue")
+        self.assertEqual(party.names[EN], {"test": "Liberal"})
+
+    def test_leaves_existing_rows_without_update_fields(self):
+        upsert(Party, [get_party("liberal", "Liberal")])
+        upsert(Party, [get_party("liberal", "Liberal", color="blue"), get_party("green", "Green")], update_fields=())  # i.e. DO NOTHING
+        self.assertEqual(dict(Party.objects.values_list("slug", "color")), {"liberal": "red", "green": "red"})
+
+    def test_last_duplicate_wins(self):
+        upsert(Party, [get_party("liberal", "Liberal"), get_party("liberal", "Liberal", color="blue")])
+        self.assertEqual(Party.objects.get(slug="liberal").color, "blue")
+
+    def test_reindexes_names(self):
+        upsert(Party, [get_party("liberal", "Liberal")])
+        self.assertEqual(get_indexed_names(Party), {("liberal", "liberal"), ("liberal", "Liberal")})
+        upsert(Party, [get_party("liberal", "Liberal Party")], update_fields=("names", ))
+        self.assertEqual(get_indexed_names(Party), {("liberal", "liberal"), ("liberal", "Liberal Party")})
+        upsert(Party, [get_party("liberal", "Grit")], update_fields=("color", ))  # Names aren't written, so aren't reindexed
+        self.assertEqual(get_indexed_names(Party), {("liberal", "liberal"), ("liberal", "Liberal Party")})
+
+
+class BatcherTestCase(TestCase):
+
+    def test_keeps_update_fields_apart(self):
+        upsert(Party, [get_party("liberal", "Liberal"), get_party("green", "Green")])
+        batcher = Batcher()
+        batcher.add(get_party("liberal", "Liberal", color="blue"), update_fields=("color", ))
+        batcher.add(get_party("green", "Green Party", color="blue"), update_fields=("names", ))
+        batcher.flush()
+        self.assertEqual(dict(Party.objects.values_list("slug", "color")), {"liberal": "blue", "green": "red"})
+        self.assertEqual(Party.objects.get(slug="green").names[EN], {"test": "Green Party"})
+
+    def test_flushes_at_batch_size(self):
+        batcher = Batcher(batch_size=2)
+        batcher.add(get_party("liberal", "Liberal"))
+        self.assertFalse(Party.objects.exists())
+        batcher.add(get_party("green", "Green"))
+        self.assertEqual(Party.objects.count(), 2)
+        self.assertEqual(batcher.count, 0)
+
+
+class NameIndexTestCase(TestCase):
+
+    def setUp(self):
+        ContentType.objects.get_for_model(Party)  # Cached from then on
+
+    def test_indexes_names_on_save(self):
+        get_party("ndp", "Lewis, David").save()
+        self.assertEqual(get_indexed_names(Party), {("ndp", "ndp"), ("ndp", "Lewis, David"), ("ndp", "David Lewis"), ("ndp", "david-lewis")})
+        self.assertEqual(set(NameIndex.objects.filter(name="Lewis, David").values_list("normalized", "lang", "source")), {("lewis-david", EN, "test")})
+
+    def test_skips_unchanged_names(self):
+        upsert(Party, [get_party("liberal", "Liberal")])
+        party = get_party("liberal", "Liberal")  # Not read from the database, so it can't tell its names are unchanged
+        self.assertTrue(party.names_changed())
+        with self.assertNumQueries(1):
+            NameIndex.update_index(Party, [party])
+        self.assertFalse(party.names_changed())
+
+    def test_rewrites_only_changed_names(self):
+        upsert(Party, [get_party("liberal", "Liberal"), get_party("green", "Green")])
+        green_ids = set(NameIndex.objects.filter(object_slug="green").values_list("id", flat=True))
+        NameIndex.update_index(Party, [get_party("liberal", "Grit"), get_party("green", "Green")])
+        self.assertEqual(get_indexed_names(Party), {("liberal", "liberal"), ("liberal", "Grit"), ("green", "green"), ("green", "Green")})
+        self.assertEqual(set(NameIndex.objects.filter(object_slug="green").values_list("id", flat=True)), green_ids)
+
+    def test_skips_models_not_resolved_by_name(self):
+        session = Session.objects.create(
+            slug="42-1",
+            parliament=Parliament.objects.create(number=42),
+            number=1,
+            date_start=date(2015, 12, 3),
+            sittings_house=0,
+            sittings_senate=0,
+        )
+        Bill.objects.create(slug="42-1-c-1", session=session, names={EN: {"test": "C-1"}, FR: {}})
+        upsert(Bill, [Bill(slug="42-1-c-2", session=session, names={EN: {"test": "C-2"}, FR: {}})])
+        self.assertFalse(NameIndex.objects.exists())
+        self.assertNotIsInstance(get_cached_dict(Bill.objects.all()), NameResolver)
+        self.assertEqual(get_cached_obj(get_cached_dict(Bill.objects.all()), "C-2").slug, "42-1-c-2")
+
+
+class NameResolverTestCase(TestCase):
+
+    def setUp(self):
+        upsert(Party, [get_party("liberal", "Liberal"), get_party("lib-prog", "Liberal"), get_party("ndp", "Lewis, David")])
+
+    def test_resolves_names_and_slugs(self):
+        cached = get_cached_dict(Party.objects.all())
+        self.assertIsInstance(cached, NameResolver)
+        self.assertEqual(get_cached_obj(cached, "ndp").slug, "ndp")
+        self.assertEqual(get_cached_obj(cached, "David Lewis").slug, "ndp")
+        self.assertEqual(set(party.slug for party in cached["Liberal"]), {"liberal", "lib-prog"})
+        self.assertEqual(cached["Conservative"], set())
+        with self.assertRaises(AssertionError):
+            get_cached_obj(cached, "Liberal")
+
+    def test_fetches_each_object_once(self):
+        with self.assertNumQueries(2):  # The content type is cached by now, leaving the index...
+            cached = get_cached_dict(Party.objects.all())
+            cached["Lewis, David"]  # ...and the objects behind the first name looked up
+        with self.assertNumQueries(0):
+            self.assertIs(get_cached_obj(cached, "David Lewis"), get_cached_obj(cached, "ndp"))
+
+    def test_only_resolves_objects_in_its_queryset(self):
+        cached = get_cached_dict(Party.objects.exclude(slug="lib-prog"))
+        self.assertEqual(get_cached_obj(cached, "Liberal").slug, "liberal")
+
+
+class DateIntervalIndexTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.sessions = [
+            Session(slug="41-1", date_start=date(2011, 6, 2), date_end=date(2013, 9, 13)),
+            Session(slug="41-2", date_start=date(2013, 10, 16), date_end=date(2015, 8, 2)),
+            Session(slug="42-1", date_start=date(2015, 12, 3), date_end=None),
+        ]
+        self.index = DateIntervalIndex(reversed(self.sessions))
+
+    def test_finds_the_interval_containing_a_day(self):
+        self.assertEqual(self.index[date(2011, 6, 2)].slug, "41-1")
+        self.assertEqual(self.index[date(2013, 9, 13)].slug, "41-1")
+        self.assertEqual(self.index[date(2014, 1, 1)].slug, "41-2")
+
+    def test_misses_days_outside_any_interval(self):
+        with self.assertRaises(KeyError):
+            self.index[date(2011, 6, 1)]  # Before the first start
+        self.assertIsNone(self.index.get(date(2013, 9, 14)))  # After a closed end
+        self.assertIsNone(self.index.get(date(2015, 8, 3)))
+
+    def test_treats_missing_ends_as_ongoing(self):
+        self.assertEqual(self.index[date(2015, 12, 3)].slug, "42-1")
+        self.assertEqual(self.index.get(date(2030, 1, 1)).slug, "42-1")
+
+
+class IntervalTreeTestCase(SimpleTestCase):
+
+    def setUp(self):
+        generator = random.Random(42)
+        self.intervals = []
+        for value in range(200):
+            start = generator.randrange(1000)
+            self.intervals.append((start, start + generator.choice((0, 1, 5, 50, 500)), value))
+        self.tree = IntervalTree(self.intervals)
+
+    def brute_force(self, start, end):
+        return [value for interval_start, interval_end, value in sorted(self.intervals, key=lambda interval: interval[0]) if interval_start <= end and interval_end >= start]
+
+    def test_finds_intervals_at_a_point(self):
+        for point in range(-10, 1600, 7):
+            self.assertEqual(self.tree.overlapping(point), self.brute_force(point, point))
+
+    def test_finds_intervals_overlapping_a_window(self):
+        for start in range(-10, 1600, 37):
+            for length in (0, 3, 100):
+                self.assertEqual(self.tree.overlapping(start, start + length), self.brute_force(start, start + length))
+
+    def test_includes_touching_endpoints(self):
+        tree = IntervalTree([(0, 10, "a"), (10, 20, "b"), (21, 30, "c")])
+        self.assertEqual(tree.overlapping(10), ["a", "b"])
+        self.assertEqual(tree.overlapping(20, 21), ["b", "c"])
+        self.assertEqual(tree.overlapping(31), [])
+
+    def test_finds_nested_intervals(self):
+        tree = IntervalTree([(0, 100, "outer"), (10, 20, "inner"), (12, 14, "innermost"), (50, 60, "sibling")])
+        self.assertEqual(tree.overlapping(13), ["outer", "inner", "innermost"])
+        self.assertEqual(tree.overlapping(30, 40), ["outer"])
+        self.assertEqual(tree.overlapping(15, 55), ["outer", "inner", "sibling"])
+
+
+class BuildCachingTestCase(TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings = override_settings(
+            BUILD_VERSION_PATH=os.path.join(root, ".build_version"),
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}, "api": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        upsert(Party, [get_party("liberal", "Liberal")])
+
+    def publish(self):
+        call_command("publish_build", stdout=StringIO())
+        return dict(get_build())
+
+    def get(self, **headers):
+        return self.client.get("/parties/", {"format": "json"}, **headers)
+
+    def test_untagged_until_a_build_is_published(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+    def test_tags_responses_with_the_build(self):
+        build = self.publish()
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["ETag"])
+        self.assertEqual(response["Last-Modified"], http_date(build["published"]))
+        self.assertIn("Accept", response["Vary"])
+
+    def test_answers_conditional_requests_without_querying(self):
+        build = self.publish()
+        etag = self.get()["ETag"]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=http_date(build["published"])).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_serves_cached_responses_until_the_next_build(self):
+        self.publish()
+        content = self.get().content
+        upsert(Party, [get_party("green", "Green")])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().content, content)
+        self.publish()
+        self.assertIn(b"green", self.get().content)
+
+    def test_serves_cached_responses_with_the_same_headers(self):
+        self.publish()
+        miss = self.get()
+        with self.assertNumQueries(0):
+            hit = self.get()
+        self.assertIn("Allow", miss)
+        self.assertEqual(sorted(hit.items()), sorted(miss.items()))
+
+    def test_new_builds_invalidate_tags(self):
+        self.publish()
+        etag = self.get()["ETag"]
+        self.publish()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class SingleFlightTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = LocMemCache("single-flight", {})
+        self.addCleanup(self.cache.clear)
+
+    def test_computes_concurrent_misses_once(self):
+        computed = []
+        results = []
+
+        def compute():
+            computed.append(True)
+            time.sleep(0.1)  # Long enough for every thread to miss
+            return "value"
+
+        threads = [threading.Thread(target=lambda: results.append(single_flight(self.cache, "key", compute))) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(computed), 1)
+        self.assertEqual(results, ["value"] * 4)
+        self.assertEqual(local_locks, {})
+
+    def test_misses_for_other_keys_dont_wait(self):
+        computing = threading.Event()
+        release = threading.Event()
+
+        def compute_slowly():
+            computing.set()
+            release.wait(5)
+            return "slow"
+
+        thread = threading.Thread(target=single_flight, args=(self.cache, "slow", compute_slowly))
+        thread.start()
+        computing.wait(5)
+        self.assertEqual(single_flight(self.cache, "fast", lambda: "fast"), "fast")
+        self.assertFalse(release.is_set())
+        release.set()
+        thread.join()
+        self.assertEqual(self.cache.get("slow"), "slow")
+
+    def test_caches_nothing_for_none(self):
+        self.assertIsNone(single_flight(self.cache, "key", lambda: None))
+        self.assertEqual(single_flight(self.cache, "key", lambda: "value"), "value")
+
+
+class ExportTestCase(TestCase):
+
+    def setUp(self):
+        upsert(Party, [get_party(slug, slug.title()) for slug in ("green", "liberal", "ndp", "bloc", "reform")])
+
+    def get_content(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_iterates_chunks_past_the_last_primary_key(self):
+        with self.assertNumQueries(3):
+            chunks = [[party.slug for party in chunk] for chunk in iterate_chunks(Party.objects.all(), chunk_size=2)]
+        self.assertEqual(chunks, [["bloc", "green"], ["liberal", "ndp"], ["reform"]])
+        with self.assertNumQueries(3):  # A full last chunk takes one more query to find there's nothing after it
+            chunks = list(iterate_chunks(Party.objects.exclude(slug="reform"), chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2])
+
+    def test_streams_ndjson(self):
+        response = self.client.get("/parties/export.ndjson/", {"slug__in": "ndp,green"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="parties.ndjson"')
+        rows = [json.loads(line) for line in self.get_content(response).splitlines()]
+        self.assertEqual([row["slug"] for row in rows], ["green", "ndp"])
+        self.assertEqual(rows[0]["names"], {EN: {"test": "Green"}, FR: {}})
+        self.assertEqual(rows[0]["url"], "http://testserver/parties/green/")
+
+    def test_streams_csv(self):
+        rows = list(csv.reader(self.get_content(self.client.get("/parties/export.csv/")).splitlines()))
+        self.assertEqual(rows[0][:3], ["url", "links", "slug"])
+        self.assertEqual([row[2] for row in rows[1:]], ["bloc", "green", "liberal", "ndp", "reform"])
+        self.assertEqual(json.loads(rows[1][rows[0].index("names")]), {EN: {"test": "Bloc"}, FR: {}})
+
+    def test_matches_the_extension_literally(self):
+        self.assertEqual(self.client.get("/parties/export-ndjson/").status_code, 404)
+
+
+class ColumnarExportTestCase(TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings = override_settings(COLUMNAR_EXPORT_ROOT=root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def read(self, table_name):
+        return pyarrow.parquet.read_table(get_path(table_name)).to_pydict()
+
+    def test_round_trips_names_and_plain_columns(self):
+        upsert(Party, [get_party("liberal", "Liberal"), get_party("green", "Green", color="green"), get_party("ndp", "NDP")])
+        self.assertEqual(export_model(Party, chunk_size=2), 3)
+        table = self.read("parties")
+        self.assertEqual(table["slug"], ["green", "liberal", "ndp"])
+        self.assertEqual(table["name_en"], ["Green", "Liberal", "NDP"])
+        self.assertEqual(table["name_fr"], [None, None, None])
+        self.assertEqual(table["color"], ["green", "red", "red"])
+        self.assertEqual(json.loads(table["links"][0]), {EN: {}, FR: {}})
+
+    def test_round_trips_relations_and_dates(self):
+        parliament = Parliament.objects.create(number=42)
+        Session.objects.create(slug="42-1", parliament=parliament, number=1, date_start=date(2015, 12, 3), sittings_house=0, sittings_senate=0)
+        Session.objects.create(slug="42-2", parliament=parliament, number=2, date_start=date(2019, 1, 1), date_end=date(2019, 9, 11), sittings_house=0, sittings_senate=0)
+        export_model(Session)
+        table = self.read("sessions")
+        self.assertEqual(table["parliament_id"], [42, 42])
+        self.assertEqual(table["date_start"], [date(2015, 12, 3), date(2019, 1, 1)])
+        self.assertEqual(table["date_end"], [None, date(2019, 9, 11)])
+        self.assertEqual(list(table)[:3], ["links", "slug", "parliament_id"])
+
+
+@override_settings(QUERY_SCAN_MAX_ROWS=2)
+class QueryCostTestCase(TestCase):
+
+    def setUp(self):
+        row_estimates.clear()
+        self.addCleanup(row_estimates.clear)
+        upsert(Party, [get_party("liberal", "Liberal"), get_party("green", "Green", color="green"), get_party("reform", "Reform Party")])
+        Party.objects.filter(slug="liberal").update(lop_item_code="lib")
+
+    def get(self, path, **query_params):
+        return self.client.get(path, dict(query_params, format="json"))
+
+    def get_slugs(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [row["slug"] for row in response.data["results"]]
+
+    def test_refuses_scans_of_large_tables(self):
+        response = self.get("/parties/", color__icontains="re")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("color__icontains", response.data["detail"])
+        self.assertEqual(self.get("/parties/", color="red").status_code, 400)  # Not indexed, whatever the lookup
+        self.assertEqual(self.get("/parties/", lop_item_code="lib", color="red").status_code, 400)  # Indexed, but not unique
+        self.assertEqual(self.get("/parties/export.csv/").status_code, 400)
+
+    def test_refuses_ordering_by_unindexed_columns(self):
+        response = self.get("/parties/", ordering="slug,-color")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ordering=-color", response.data["detail"])
+        self.assertEqual(self.get_slugs(self.get("/parties/", ordering="-slug")), ["reform", "liberal", "green"])
+
+    def test_passes_narrowed_queries(self):
+        self.assertEqual(self.get_slugs(self.get("/parties/")), ["green", "liberal", "reform"])
+        self.assertEqual(self.get_slugs(self.get("/parties/", slug__in="liberal,green", color="red")), ["liberal"])
+        self.assertEqual(self.get_slugs(self.get("/parties/", lop_item_code="lib")), ["liberal"])
+        self.assertEqual(self.get("/parties/export.csv/", lop_item_code="lib").status_code, 200)
+
+    @override_settings(QUERY_SCAN_MAX_ROWS=100)
+    def test_passes_scans_of_small_tables(self):
+        self.assertEqual(self.get_slugs(self.get("/parties/", color__icontains="re")), ["green", "liberal", "reform"])
+        self.assertEqual(self.get_slugs(self.get("/parties/", ordering="-color")), ["green", "liberal", "reform"])  # Not sorted, but not refused
+
+    def test_estimates_rows_once(self):
+        self.assertEqual(get_row_estimate(Party), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_row_estimate(Party), 3)
+
+    def test_searches_name_prefixes_through_the_index(self):
+        self.assertEqual(self.get_slugs(self.get("/parties/", search="Lib")), ["liberal"])
+        self.assertEqual(self.get_slugs(self.get("/parties/", search="Party")), [])  # Words within a name would take a scan
+        self.assertEqual(self.get("/sessions/", search="42").status_code, 200)  # Not indexed by name, but small
+
+    @override_settings(QUERY_SCAN_MAX_ROWS=100)
+    def test_times_out_scans(self):
+        with patch.object(NameSearchFilter, "filter_queryset", side_effect=OperationalError("Query execution was interrupted")):
+            response = self.get("/parties/", color__icontains="re")
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data["detail"], QueryTooExpensive.default_detail)
+            with self.assertRaises(OperationalError):  # Anything else isn't timed, so isn't a timeout
+                self.get("/parties/", slug="liberal")
+
+    def test_sets_and_resets_the_timeout(self):
+        connection = MagicMock(vendor="mysql")
+        execute = connection.cursor.return_value.__enter__.return_value.execute
+        with statement_timeout(connection, 5000):
+            self.assertEqual(execute.call_args_list, [call("SET SESSION max_execution_time = 5000")])
+        self.assertEqual(execute.call_args_list[-1], call("SET SESSION max_execution_time = DEFAULT"))
+
+
+class AggregateTestCase(TestCase):
+
+    def setUp(self):
+        row_estimates.clear()
+        self.addCleanup(row_estimates.clear)
+        for number, sittings in ((41, (10, 20)), (42, (30, ))):
+            parliament = Parliament.objects.create(number=number)
+            for session_number, sittings_house in enumerate(sittings, 1):
+                Session.objects.create(
+                    slug="{}-{}".format(number, session_number),
+                    parliament=parliament,
+                    number=session_number,
+                    date_start=date(1970 + number, session_number, 1),
+                    sittings_house=sittings_house,
+                    sittings_senate=0,
+                )
+
+    def get(self, path="/sessions/aggregate/", **query_params):
+        return self.client.get(path, dict(query_params, format="json"))
+
+    def get_rows(self, path="/sessions/aggregate/", **query_params):
+        response = self.get(path, **query_params)
+        self.assertEqual(response.status_code, 200)
+        return [dict(row) for row in response.data]
+
+    def test_counts(self):
+        self.assertEqual(self.get_rows(), [{"count": 3}])
+        self.assertEqual(self.get_rows(group_by="parliament"), [{"parliament": 41, "count": 2}, {"parliament": 42, "count": 1}])
+
+    def test_sums(self):
+        self.assertEqual(self.get_rows(group_by="parliament", sum="sittings_house"), [
+            {"parliament": 41, "sittings_house": 30},
+            {"parliament": 42, "sittings_house": 30},
+        ])
+        self.assertEqual(self.get_rows(group_by="number", sum="sittings_house", count=""), [
+            {"number": 1, "count": 2, "sittings_house": 40},
+            {"number": 2, "count": 1, "sittings_house": 20},
+        ])
+
+    def test_names_totals_after_the_fields_they_sum(self):
+        # Summed under another name, as an annotation can't share one with a field
+        self.assertEqual(self.get_rows(sum="number,sittings_house"), [{"number": 4, "sittings_house": 60}])
+
+    def test_refuses_grouping_by_and_totalling_a_field(self):
+        response = self.get(group_by="number", sum="number")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["detail"], "Can't both group by and total number")
+
+    @override_settings(AGGREGATE_MAX_GROUPS=1)
+    def test_refuses_too_many_groups(self):
+        self.assertEqual(self.get(group_by="parliament").status_code, 400)
+        self.assertEqual(self.get_rows("/parliaments/42/sessions/aggregate/", group_by="parliament"), [{"parliament": 42, "count": 1}])
+
+    @override_settings(QUERY_SCAN_MAX_ROWS=2)
+    def test_refuses_unfiltered_aggregates_of_large_tables(self):
+        response = self.get(group_by="parliament")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("aggregate", response.data["detail"])
+        self.assertEqual(self.get_rows("/parliaments/41/sessions/aggregate/", group_by="number"), [{"number": 1, "count": 1}, {"number": 2, "count": 1}])
+
+
+class BatchTestCase(TestCase):
+
+    def setUp(self):
+        upsert(Party, [get_party(slug, slug.title(), color="green" if slug == "green" else "red") for slug in ("green", "liberal", "ndp")])
+        for number in (41, 42):
+            Parliament.objects.create(number=number)
+
+    def get(self, path="/parties/batch/", **query_params):
+        return self.client.get(path, dict(query_params, format="json"))
+
+    def post(self, pks, path="/parties/batch/?format=json"):
+        return self.client.post(path, json.dumps(pks), content_type="application/json")
+
+    def get_body(self, response):
+        self.assertEqual(response.status_code, 200)
+        return {
+            "results": [urlparse(row["url"]).path for row in response.data["results"]],
+            "missing": response.data["missing"],
+        }
+
+    def test_returns_objects_in_the_order_requested(self):
+        self.assertEqual(self.get_body(self.get(pk="ndp,green,liberal")), {
+            "results": ["/parties/ndp/", "/parties/green/", "/parties/liberal/"],
+            "missing": [],
+        })
+
+    def test_reports_missing_objects(self):
+        self.assertEqual(self.get_body(self.get(pk="ndp,reform")), {"results": ["/parties/ndp/"], "missing": ["reform"]})
+
+    def test_collapses_duplicates(self):
+        self.assertEqual(self.get_body(self.get(pk="ndp,green,ndp")), {"results": ["/parties/ndp/", "/parties/green/"], "missing": []})
+
+    def test_reads_the_same_list_from_a_post(self):
+        self.assertEqual(self.post(["ndp", "reform", "green"]).data, self.get(pk="ndp,reform,green").data)
+        self.assertEqual(self.get_body(self.post([42, "41"], "/parliaments/batch/?format=json")), {
+            "results": ["/parliaments/42/", "/parliaments/41/"],
+            "missing": [],
+        })
+
+    @override_settings(BATCH_LOOKUP_MAX=2)
+    def test_refuses_too_many_objects(self):
+        self.assertEqual(self.get(pk="ndp,green,liberal").status_code, 400)
+        self.assertEqual(self.post(["ndp", "green", "liberal"]).status_code, 400)
+
+    def test_refuses_unrecognized_primary_keys(self):
+        self.assertEqual(self.get("/parliaments/batch/", pk="42,abc").status_code, 400)
+        self.assertEqual(self.post({"pk": "ndp"}).status_code, 400)
+
+    def test_applies_filters(self):
+        self.assertEqual(self.get_body(self.get(pk="ndp,green,liberal", slug__in="green,liberal", color="red")), {
+            "results": ["/parties/liberal/"],
+            "missing": ["ndp", "green"],
+        })
+
+
+class FieldSelectionTestCase(TestCase):
+
+    def setUp(self):
+        self.add_sessions(2)
+
+    def add_sessions(self, count):
+        for number in range(Parliament.objects.count() + 1, count + 1):
+            Session.objects.create(
+                slug="{}-1".format(number),
+                parliament=Parliament.objects.create(number=number),
+                number=1,
+                date_start=date(1867 + number, 1, 1),
+                sittings_house=0,
+                sittings_senate=0,
+            )
+
+    def get(self, **query_params):
+        return self.client.get("/sessions/", dict(query_params, format="json"))
+
+    def test_prunes_fields_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(fields="url,number")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([set(row) for row in response.data["results"]], [{"url", "number"}] * 2)
+        self.assertIn("number", queries[-1]["sql"])
+        self.assertNotIn("date_start", queries[-1]["sql"])
+
+    def test_expands_relations_in_the_same_query(self):
+        response = self.get(expand="parliament")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["parliament"]["number"], 1)
+        self.assertIn("url", response.data["results"][0]["parliament"])
+
+        with CaptureQueriesContext(connection) as few:
+            self.get(expand="parliament")
+        self.assertIn("JOIN", few[-1]["sql"])
+        self.add_sessions(20)
+        with self.assertNumQueries(len(few)):
+            self.assertEqual(len(self.get(expand="parliament").data["results"]), 20)
+
+    def test_refuses_unknown_fields(self):
+        self.assertEqual(self.get(fields="number,nope").status_code, 400)
+        self.assertEqual(self.get(expand="nope").status_code, 400)
+        self.assertEqual(self.get(expand="number").status_code, 400)  # Not a relation
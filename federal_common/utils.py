@@ -2,8 +2,10 @@ from collections import defaultdict
 from datetime import timedelta
 from dateutil.parser import parse as dateutil_parse
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.utils.text import slugify
 from django.utils.timezone import make_aware
+from federal_common.models import NamesMixin, NameIndex
 from federal_common.sources import EN, FR
 from time import sleep
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse, urljoin, ParseResult
@@ -123,7 +125,36 @@ def dateparse(s):
     return dateutil_parse(s).date()
 
 
+class NameResolver(dict):
+    """
+        Maps every name (and slug) of a queryset's objects to the set of them
+        it refers to, reading the whole name index in one query and fetching
+        the objects behind a name only once it's first looked up.
+    """
+
+    def __init__(self, qs):
+        super().__init__()
+        self.qs = qs
+        self.slugs = defaultdict(set)
+        for name, slug in NameIndex.objects.filter(
+            content_type=ContentType.objects.get_for_model(qs.model),
+            object_slug__in=qs.values("pk"),
+        ).values_list("name", "object_slug").iterator():
+            self.slugs[name].add(slug)
+        self.objs = {}
+
+    def __missing__(self, name):
+        slugs = self.slugs.get(name, ())
+        missing = [slug for slug in slugs if slug not in self.objs]
+        if missing:
+            self.objs.update(self.qs.in_bulk(missing))
+        objset = self[name] = set(self.objs[slug] for slug in slugs if slug in self.objs)
+        return objset
+
+
 def get_cached_dict(qs):
+    if issubclass(qs.model, NamesMixin) and qs.model.name_indexed:
+        return NameResolver(qs)
     cached = defaultdict(set)
     for obj in qs:
         for lang in (EN, FR):
@@ -139,6 +170,29 @@ def get_cached_dict(qs):
     return cached
 
 
+class LazyCachedDict(object):
+    """
+        A cached dict (see get_cached_dict) that's only built once first used,
+        so that one defined at import (e.g. as a command's class attribute)
+        doesn't query the database on every manage.py invocation.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.cached = None
+
+    def resolve(self):
+        if self.cached is None:
+            self.cached = self.build()
+        return self.cached
+
+    def __getitem__(self, name):
+        return self.resolve()[name]
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+
 def get_cached_obj(cached_dict, name):
     objset = cached_dict[name]
     assert len(objset) == 1, "Expected one entry named {}, got {}".format(name, objset)
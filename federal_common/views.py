@@ -0,0 +1,21 @@
+from django.http import FileResponse, Http404
+from federal_common.caching import BuildCachingMixin
+from federal_common.columnar import get_path
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+
+
+class ColumnarExportView(BuildCachingMixin, APIView):
+    permission_classes = (AllowAny, )
+    view_name = "Columnar Export"
+    view_description = """
+A whole table as a Parquet file, one column per field with English and French names flattened into `name_en` and `name_fr`, as written by `export_columnar` with each data build. For example, `pandas.read_parquet("https://api.iscanadafair.ca/exports/election-candidates.parquet")`.
+"""
+
+    def get(self, request, table):
+        try:
+            response = FileResponse(open(get_path(table), "rb"), content_type="application/octet-stream")
+        except FileNotFoundError:
+            raise Http404("No columnar export of {}".format(table))
+        response["Content-Disposition"] = 'attachment; filename="{}.parquet"'.format(table)
+        return response
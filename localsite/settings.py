@@ -112,6 +112,30 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 STATIC_ROOT = os.path.join(BASE_DIR, ".collected_static")
 MEDIA_ROOT = os.path.join(BASE_DIR, ".uploaded_media")
+VOTE_MATRIX_ROOT = os.path.join(BASE_DIR, ".vote_matrices")
+COLUMNAR_EXPORT_ROOT = os.path.join(BASE_DIR, ".columnar_exports")
+BUILD_VERSION_PATH = os.path.join(BASE_DIR, ".build_version")
+BUILD_CACHE_MAX_AGE = 60 * 60
+
+
+# API responses are cached until the next published build, whose version is part of every key.
+# Concurrent misses for a response are computed once per process (the file-based cache can't
+# lock between processes, see single_flight).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, ".api_cache"),
+        'TIMEOUT': 7 * 24 * 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+}
+API_CACHE = 'api'
+API_CACHE_LOCK_TIMEOUT = 30
 
 
 LOGGING = {
@@ -144,3 +168,25 @@ REST_FRAMEWORK = {
     'VIEW_NAME_FUNCTION': 'localsite.urls.get_view_name',
     'VIEW_DESCRIPTION_FUNCTION': 'localsite.urls.get_view_description',
 }
+
+# Generated endpoints too large for limit/offset, which are paginated by cursor
+# instead, and so listed (and only orderable) by primary key or unique column
+KEYSET_PAGINATED_MODELS = (
+    "elections.ElectionCandidate",
+    "proceedings.HouseVote",
+    "proceedings.HouseVoteParticipant",
+    "proceedings.PublicationBlock",
+    "proceedings.RecordingAlignment",
+    "proceedings.SpeakingStatistic",
+)
+
+# Objects fetched at most by one request to a generated endpoint's batch/
+BATCH_LOOKUP_MAX = 1000
+
+# Groups returned at most by one request to a generated endpoint's aggregate/
+AGGREGATE_MAX_GROUPS = 10000
+
+# Generated endpoints refuse lookups no index can serve on tables larger than this, unless narrowed by an indexed one
+QUERY_SCAN_MAX_ROWS = 100000
+# Milliseconds the reads of those they do serve may take (on MySQL and PostgreSQL)
+QUERY_STATEMENT_TIMEOUT = 5000
@@ -5,9 +5,11 @@ from django.contrib import admin
 from federal_common.generate_urls import generate_urls
 from rest_framework import routers
 import debug_toolbar
+import federal_common.views
 import elections
 import parliaments
 import proceedings
+import proceedings.views
 import re
 
 
@@ -41,6 +43,18 @@ urlpatterns = generate_urls(
     elections.models,
     proceedings.models,
 )
+urlpatterns[0:0] = [  # Ahead of the generated detail routes
+    url(r"^recordings/overlapping/$", proceedings.views.OverlappingRecordingsView.as_view(), name="recordings-overlapping"),
+    url(r"^speaking-statistics/totals/$", proceedings.views.SpeakingTotalsView.as_view(), name="speakingstatistics-totals"),
+]
+urlpatterns.extend([
+    url(r"^exports/(?P<table>[a-z0-9-]+)\.parquet$", federal_common.views.ColumnarExportView.as_view(), name="columnar-export"),
+    url(r"^house-votes/(?P<house_vote>[^/.]+)/debate/$", proceedings.views.HouseVoteDebateView.as_view(), name="housevote-debate"),
+    url(r"^recordings/(?P<recording>[^/.]+)/transcript/$", proceedings.views.RecordingTranscriptView.as_view(), name="recording-transcript"),
+    url(r"^sessions/(?P<session>[^/.]+)/vote-matrix/party-cohesion/$", proceedings.views.PartyCohesionView.as_view(), name="session-party-cohesion"),
+    url(r"^sessions/(?P<session>[^/.]+)/vote-matrix/party-agreement/$", proceedings.views.PartyAgreementView.as_view(), name="session-party-agreement"),
+    url(r"^sessions/(?P<session>[^/.]+)/vote-matrix/parliamentarian-similarity/$", proceedings.views.ParliamentarianSimilarityView.as_view(), name="session-parliamentarian-similarity"),
+])
 
 
 if settings.DEBUG:
@@ -1,12 +1,12 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.db.models import Q
 from django.utils.text import slugify
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
-from federal_common.utils import fetch_url, url_tweak, get_cached_dict, get_cached_obj, get_french_parl_url
+from federal_common.utils import fetch_url, url_tweak, get_cached_dict, get_cached_obj, get_french_parl_url, LazyCachedDict
 from parliaments import models
+from parliaments.matching import ParliamentarianMatcher
 from tqdm import tqdm
 from unidecode import unidecode
 from urllib.parse import parse_qs, urlparse
@@ -16,43 +16,34 @@ import re
 
 
 logger = logging.getLogger(__name__)
+# Names ParliamentarianMatcher can't resolve: a married name, a nickname or
+# a contraction of the given name, or a middle name the Library of
+# Parliament lists and the House doesn't, which leaves too little in common.
 MAPPED_PARLIAMENTARIANS = {
-    ("Alexander Nuttall", "ontario-barrie-springwater-oro-medonte"): "nuttall-alex",
-    ("Candice Hoeppner", "manitoba-portage-lisgar"): "bergen-candice",
-    ("David Anderson", "british-columbia-victoria"): "anderson-david-1",
-    ("David Anderson", "saskatchewan-cypress-hills-grasslands"): "anderson-david-2",
-    ("David Chatters", "alberta-westlock-st-paul"): "chatters-david-cameron",
-    ("David de Burgh Graham", "quebec-laurentides-labelle"): "graham-david",
-    ("Dianne L. Watts", "british-columbia-south-surrey-white-rock"): "watts-dianne",
-    ("Gilles Bernier", "new-brunswick-tobique-mactaquac"): "bernier-gilles-2",
-    ("Jean-Guy Carignan", "quebec-quebec-est"): "carignan-jean-guy",
-    ("John Cummins", "british-columbia-delta-richmond-east"): "cummins-john-martin",
-    ("Joseph Volpe", "ontario-eglinton-lawrence"): "volpe-giuseppe-joseph",
-    ("Judy A. Sgro", "ontario-humber-river-black-creek"): "sgro-judy",
-    ("Michael Savage", "nova-scotia-dartmouth-cole-harbour"): "savage-michael-john",
-    ("Rey Pagtakhan", "manitoba-winnipeg-north-st-paul"): "pagtakhan-rey-d",
-    ("Richard Harris", "british-columbia-cariboo-prince-george"): "harris-richard-m",
-    ("Robert Kitchen", "saskatchewan-souris-moose-mountain"): "kitchen-robert-gordon",
-    ("Robert Nault", "ontario-kenora"): "nault-robert-daniel",
-    ("Ronald Duhamel", "manitoba-saint-boniface"): "duhamel-ron-j",
-    ("Roy Bailey", "saskatchewan-souris-moose-mountain"): "bailey-roy-h",
-    ("Ruben Efford", "newfoundland-and-labrador-avalon"): "efford-ruben-john",
-    ("T.J. Harvey", "new-brunswick-tobique-mactaquac"): "harvey-thomas-j",
+    ("Candice Hoeppner", "manitoba-portage-lisgar"): "bergen-candice",  # Married name
+    ("David Chatters", "alberta-westlock-st-paul"): "chatters-david-cameron",  # Middle name
+    ("John Cummins", "british-columbia-delta-richmond-east"): "cummins-john-martin",  # Middle name
+    ("Joseph Volpe", "ontario-eglinton-lawrence"): "volpe-giuseppe-joseph",  # Anglicized given name
+    ("Robert Kitchen", "saskatchewan-souris-moose-mountain"): "kitchen-robert-gordon",  # Middle name
+    ("Robert Nault", "ontario-kenora"): "nault-robert-daniel",  # Middle name
+    ("Ronald Duhamel", "manitoba-saint-boniface"): "duhamel-ron-j",  # Contraction
+    ("T.J. Harvey", "new-brunswick-tobique-mactaquac"): "harvey-thomas-j",  # Initials
 }
 PHONE = re.compile(r"^Telephone: (.*)$")
 FAX = re.compile(r"^Fax: (.*)$")
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
-    cached_ridings = get_cached_dict(models.Riding.objects.filter(
+    cached_ridings = LazyCachedDict(lambda: get_cached_dict(models.Riding.objects.filter(
         Q(election_ridings__general_election__parliament__number__gte=35) |
         Q(election_ridings__by_election__parliament__number__gte=35)
-    ))
-    cached_parliamentarians = get_cached_dict(models.Parliamentarian.objects.filter(
+    )))
+    cached_parliamentarians = LazyCachedDict(lambda: get_cached_dict(models.Parliamentarian.objects.filter(
         Q(election_candidates__election_riding__general_election__parliament__number__gte=35) |
         Q(election_candidates__election_riding__by_election__parliament__number__gte=35)
-    ))
+    )))
+    matcher = ParliamentarianMatcher()
     fetched = set()
     list_url = {
         EN: "http://www.ourcommons.ca/Parliamentarians/en/members",
@@ -74,8 +65,8 @@ class Command(BaseCommand):
             self.fetch_parliament(models.Parliament.objects.get(
                 number=parse_qs(urlparse(parl_link.attrs["href"]).query)["parliament"][0]
             ))
+        self.batcher.flush()
 
-    @transaction.atomic
     def fetch_parliament(self, parliament):
         for lang in (EN, FR):
             parliament.links[lang][sources.NAME_HOC_MEMBERS[lang]] = url_tweak(self.list_url[lang], update={
@@ -109,10 +100,17 @@ class Command(BaseCommand):
                     mp_link.select(".first-name")[0].text,
                     mp_link.select(".last-name")[0].text,
                 ))
-                parliamentarian = get_cached_obj(
-                    self.cached_parliamentarians,
-                    MAPPED_PARLIAMENTARIANS.get((joined_name, riding_slug), joined_name)
-                )
+                try:
+                    parliamentarian = get_cached_obj(
+                        self.cached_parliamentarians,
+                        MAPPED_PARLIAMENTARIANS.get((joined_name, riding_slug), joined_name)
+                    )
+                except AssertionError:
+                    slug = self.matcher.match(joined_name, riding_slug, parliament.pk)
+                    if slug is None:
+                        logger.error("ERR PARLIAMENTARIAN {}".format((joined_name, riding_slug)))
+                        continue
+                    parliamentarian = get_cached_obj(self.cached_parliamentarians, slug)
 
                 try:
                     riding = get_cached_obj(self.cached_ridings, riding_slug)
@@ -125,7 +123,7 @@ class Command(BaseCommand):
                             riding_url[FR] = get_french_parl_url(riding_url[EN], riding_soup)
                     if mp_soup[EN].select(".hilloffice"):
                         riding.current_parliamentarian = parliamentarian
-                    riding.save()
+                    self.batcher.add(riding)
                 except IndexError as e:
                     pass
 
@@ -153,4 +151,4 @@ class Command(BaseCommand):
                 parliamentarian.links[EN].pop("MP profile", None)
                 parliamentarian.links[FR].pop("Profil de la députée", None)
 
-                parliamentarian.save()
+                self.batcher.add(parliamentarian)
@@ -1,9 +1,8 @@
 from bs4 import BeautifulSoup
 from django.db.models import Q
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils.text import slugify
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, get_cached_dict, get_cached_obj
 from parliaments import models
@@ -35,7 +34,7 @@ PARLIAMENTARIAN_MAPPING = {
 }
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     cached_ridings = {}
 
@@ -44,7 +43,6 @@ class Command(BaseCommand):
             logger.setLevel(logging.DEBUG)
         self.augment_parliamentarians_open_parliament()
 
-    @transaction.atomic
     def augment_parliamentarians_open_parliament(self):
         cached_provinces = get_cached_dict(models.Province.objects.all())
         cached_parliamentarians = get_cached_dict(models.Parliamentarian.objects.filter(
@@ -67,13 +65,14 @@ class Command(BaseCommand):
                     province = get_cached_obj(cached_provinces, PROVINCE_MAPPING.get(province_name, province_name))
                     if sources.NAME_OP[EN] not in province.names[EN]:
                         province.names[EN][sources.NAME_OP[EN]] = province_name
-                        province.save()
+                        self.batcher.add(province)
                     for link in columns[1].select("a[href^=/politicians/]"):
                         if link.attrs["href"] not in ("/politicians/", "/politicians/former/"):
                             self.augment_parliamentarian_open_parliament(get_cached_obj(cached_parliamentarians, PARLIAMENTARIAN_MAPPING.get(
                                 (link.text, province.slug),
                                 slugify(link.text),
                             )), urljoin(url, link.attrs["href"]))
+        self.batcher.flush()
 
     def augment_parliamentarian_open_parliament(self, parliamentarian, url):
         soup = BeautifulSoup(fetch_url(url), "html.parser")
@@ -91,4 +90,4 @@ class Command(BaseCommand):
             elif link.text == "Twitter":
                 for lang in (EN, FR):
                     parliamentarian.links[lang][sources.NAME_TWITTER[lang]] = link.attrs["href"]
-        parliamentarian.save()
+        self.batcher.add(parliamentarian)
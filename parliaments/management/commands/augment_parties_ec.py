@@ -1,7 +1,6 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak, get_cached_dict, get_cached_obj
 from parliaments import models
@@ -15,9 +14,8 @@ EC_MAPPING = {
 }
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
-    @transaction.atomic
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
@@ -37,6 +35,7 @@ class Command(BaseCommand):
                 party.names[lang][sources.NAME_EC[lang]] = name
                 party.names[lang][sources.NAME_EC_SHORT[lang]] = name_short
                 party.links[lang][sources.NAME_EC[lang]] = "{}#{}".format(url_lang, name_short)
-                party.save()
+                self.batcher.add(party)
                 cached_parties[name].add(party)
                 cached_parties[name_short].add(party)
+        self.batcher.flush()
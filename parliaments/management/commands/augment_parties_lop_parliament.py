@@ -1,8 +1,7 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from elections.models import ElectionCandidate
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak
 from parliaments import models
@@ -46,12 +45,13 @@ BYPASSED = set([
 ])
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
 
+        self.parties = models.Party.objects.in_bulk()
         cached_parties = {}
         for parliament in tqdm(
             models.Parliament.objects.all(),
@@ -59,8 +59,8 @@ class Command(BaseCommand):
             unit="parliament",
         ):
             self.augment_parties_by_parliament_file(parliament, cached_parties)
+        self.batcher.flush()
 
-    @transaction.atomic
     def augment_parties_by_parliament_file(self, parliament, cached_parties):
         for lang in (EN, FR):
             url = parliament.links[lang][sources.NAME_LOP_PARLIAMENT[lang]]
@@ -90,7 +90,7 @@ class Command(BaseCommand):
                         election_riding__general_election=parliament.general_election,
                         parliamentarian__lop_item_code=lop_item_code,
                     )
-                    party = election_candidates.first().party
+                    party = self.parties.get(election_candidates.first().party_id)  # As edited by earlier rows, which may not be written yet
 
                     # https://lop.parl.ca/About/Parliament/FederalRidingsHistory/hfer.asp?Language=E&Search=C says
                     # "Some discrepancies in data may appear. Data appearing in the Federal Member Profile (biography)
@@ -119,7 +119,7 @@ class Command(BaseCommand):
                                 urljoin(url, cells[2].a.attrs["href"]),
                                 update={"Section": "All"},
                             )
-                        party.save()
+                        self.batcher.add(party, update_fields=("names", "links"))
                         logger.debug("{}, mapping {} to {} via {}".format(parliament, party.slug, party_name, parliamentarian_name))
                         cached_parties[party_name] = party
 
@@ -139,4 +139,4 @@ class Command(BaseCommand):
 
         government_party_name = sources.WHITESPACE.sub(" ", soup.select("#ctl00_cphContent_GoverningPartyData")[0].text.strip())
         parliament.government_party = cached_parties[government_party_name]
-        parliament.save()
+        self.batcher.add(parliament, update_fields=("government_party", ))
@@ -1,7 +1,6 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak, get_cached_dict, get_cached_obj
 from parliaments import models
@@ -23,9 +22,8 @@ LOP_LIST_MAPPING = {
 }
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
-    @transaction.atomic
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
@@ -49,7 +47,7 @@ class Command(BaseCommand):
                     remove=("MenuID", "MenuQuery"),
                 )
                 lop_item_code = sources.LOP_CODE.search(url).group().lower()
-                party = models.Party.objects.filter(lop_item_code=lop_item_code).first()
+                party = next(iter(cached_parties[lop_item_code]), None)
                 if not party:
                     name = sources.WHITESPACE.sub(" ", a.text.strip())
                     name = LOP_LIST_MAPPING.get(name, name)
@@ -62,4 +60,6 @@ class Command(BaseCommand):
                 soup = BeautifulSoup(fetch_url(url), "html.parser")
                 for link in soup.select("#ctl00_cphContent_dataLinks a"):
                     party.links[lang][sources.AVAILABILITY_WARNINGS.sub("", link.text.strip())] = link.attrs["href"]
-                party.save()
+                self.batcher.add(party)
+                cached_parties[party.lop_item_code].add(party)
+        self.batcher.flush()
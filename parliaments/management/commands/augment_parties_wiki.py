@@ -1,7 +1,6 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, get_cached_dict, get_cached_obj
 from parliaments import models
@@ -45,9 +44,8 @@ WIKI_MAPPING = {
 }
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
-    @transaction.atomic
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
@@ -78,6 +76,7 @@ class Command(BaseCommand):
                         urljoin(list_url, link.attrs["href"]),
                         tr.find_all("td", recursive=False)[0].attrs["style"],
                     )
+        self.batcher.flush()
         models.Party.objects.filter(color="").update(color="#666666")
 
     def augment_party_by_wikipedia(self, party, link_en, style):
@@ -95,4 +94,4 @@ class Command(BaseCommand):
             party.names[FR][sources.NAME_WIKI[FR]] = soup_fr.select("#firstHeading")[0].text.strip()
         except IndexError:
             logger.debug("{} doesn't have a French-language equivalent in Wikipedia at the moment".format(party))
-        party.save()
+        self.batcher.add(party)
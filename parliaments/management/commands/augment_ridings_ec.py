@@ -1,8 +1,7 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils.text import slugify
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak
 from parliaments import models
@@ -17,30 +16,31 @@ CITIES = re.compile(r"^(Major census subdivisions|Principales subdivisions de re
 AREA = re.compile(r"^(Area|Superficie)$")
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     cached_ridings = {}
 
-    @transaction.atomic
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
         self.augment_ridings_ec()
 
     def augment_ridings_ec(self):
+        ridings = models.Riding.objects.in_bulk()
         for row in tqdm(BeautifulSoup(fetch_url(url_tweak(
             "http://www.elections.ca/Scripts/vis/SearchProvinces?PROV=CA&PROVID=99999&QID=-1&PAGEID=20",
             update={"L": sources.LANG_EC[EN]}
         )), "html.parser").select("table tr")):
             cells = row.find_all("td", recursive=False)
             if cells:
-                riding = models.Riding.objects.get(slug=slugify("{} {}".format(
+                riding = ridings[slugify("{} {}".format(
                     cells[1].text,
                     cells[0].text,
-                )))
+                ))]
                 riding.electoral_district_number = parse_qs(urlparse(cells[0].a.attrs["href"]).query)["ED"][0]
                 self.cached_ridings[riding.electoral_district_number] = riding
-                riding.save()
+                self.batcher.add(riding, update_fields=("electoral_district_number", ))
+        self.batcher.flush()
 
         for riding in tqdm(
             models.Riding.objects.filter(electoral_district_number__isnull=False),
@@ -48,6 +48,7 @@ class Command(BaseCommand):
             unit="riding",
         ):
             self.augment_riding_ec(riding)
+        self.batcher.flush()
 
     def augment_riding_ec(self, riding):
         for lang in (EN, FR):
@@ -64,7 +65,7 @@ class Command(BaseCommand):
                 soup.find("h2", text=CITIES).find_next_sibling("p").text.splitlines(),
             ))))
             riding.area_km2 = int(sources.WHITESPACE.sub("", soup.find("h2", text=AREA).find_next_sibling("p").text.strip()).replace("km2", "").replace(",", ""))
-        riding.save()
+        self.batcher.add(riding)
 
         for link in soup.select("ul.toc a"):
             riding.related_geographically.add(self.cached_ridings[
@@ -1,6 +1,5 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from federal_common.bulk import BatchedCommand
 from federal_common.utils import fetch_url, get_cached_dict, get_cached_obj
 from parliaments import models
 from tqdm import tqdm
@@ -16,9 +15,8 @@ XNX = re.compile(r"^[A-Z][0-9][A-Z]$")
 URL = re.compile(r"^http://www.ourcommons.ca/Parliamentarians/en/members/.*\(([0-9]+)\)$")
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
-    @transaction.atomic
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
@@ -40,7 +38,7 @@ class Command(BaseCommand):
         ).select(".FloorPlanSeat .Person"):
             riding = get_cached_obj(cached_ridings, person.attrs["constituencyname"])
             person_id_to_riding[int(person.attrs["personid"])] = riding
-            riding.post_code_fsas = set()
+            riding.postal_code_fsas = set()
 
         for fsa in tqdm(fsas):
             result = fetch_url("http://www.ourcommons.ca/Parliamentarians/en/FloorPlan/FindMPs?textCriteria={}".format(fsa))
@@ -50,10 +48,11 @@ class Command(BaseCommand):
                 pass
             for person_id in filter(None, result.split(",")):
                 try:
-                    person_id_to_riding[int(person_id)].post_code_fsas.add(fsa)
+                    person_id_to_riding[int(person_id)].postal_code_fsas.add(fsa)
                 except:
                     logger.warning(f"Person ID {person_id} expected for FSA {fsa}, but that wasn't found in the floorplan")
 
         for riding in person_id_to_riding.values():
-            riding.post_code_fsas = sorted(riding.post_code_fsas)
-            riding.save()
+            riding.postal_code_fsas = sorted(riding.postal_code_fsas)
+            self.batcher.add(riding, update_fields=("postal_code_fsas", ))
+        self.batcher.flush()
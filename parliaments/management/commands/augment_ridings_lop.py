@@ -1,8 +1,7 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils.text import slugify
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, get_cached_dict, get_cached_obj, url_tweak, FetchSuppressed, FetchFailure
 from parliaments import models
@@ -15,7 +14,7 @@ import re
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
@@ -23,16 +22,26 @@ class Command(BaseCommand):
         self.augment_ridings_lop()
 
     def augment_ridings_lop(self):
-        self.cached_ridings = get_cached_dict(models.Riding.objects.all())
+        # Related ridings are edited on the same instances as they're iterated over, so no write is lost
+        self.ridings = models.Riding.objects.in_bulk()
         self.cached_provinces = get_cached_dict(models.Province.objects.all())
+        self.related_historically = set()
         for riding in tqdm(
-            models.Riding.objects.all(),
+            list(self.ridings.values()),
             desc="Augment Ridings, LoP",
             unit="riding",
         ):
             self.augment_riding(riding)
+        self.batcher.flush()
+
+        # Relations can only be written once both their ridings are
+        RelatedHistorically = models.Riding.related_historically.through
+        self.related_historically -= set(RelatedHistorically.objects.values_list("from_riding_id", "to_riding_id"))
+        RelatedHistorically.objects.bulk_create(
+            RelatedHistorically(from_riding_id=from_slug, to_riding_id=to_slug)
+            for from_slug, to_slug in self.related_historically
+        )
 
-    @transaction.atomic
     def augment_riding(self, riding):
         try:
             for lang in (FR, EN):
@@ -43,18 +52,18 @@ class Command(BaseCommand):
             logger.exception(e)
             return
 
-        riding.save()
+        self.batcher.add(riding)
         for tag_id in ("#previous", "#became"):
             related_ridings = soup.select(tag_id)
             if related_ridings:
                 for link in related_ridings[0].parent.select("a"):
                     match = re.search(r"^(?P<name>.*) \((?P<province>.*)\)\((?P<daterange>.*)\)", link.text).groupdict()
                     riding_slug = slugify("{province}-{name}".format(**match))
-                    try:
-                        related_riding = get_cached_obj(self.cached_ridings, riding_slug)
-                    except AssertionError:
+                    related_riding = self.ridings.get(riding_slug)
+                    if related_riding is None:
                         province = get_cached_obj(self.cached_provinces, match["province"])
-                        related_riding, created = models.Riding.objects.get_or_create(slug=riding_slug, province=province)
+                        related_riding = self.ridings[riding_slug] = models.Riding(slug=riding_slug, province=province)
+                        self.batcher.add(related_riding)
                         logger.debug("Auxilliary riding detected: {}".format(riding_slug))
                     for lang in (EN, FR):
                         if sources.NAME_LOP_RIDING_HISTORY[lang] not in related_riding.links[lang]:
@@ -66,5 +75,7 @@ class Command(BaseCommand):
                                 fetch_url(related_riding.links[lang][sources.NAME_LOP_RIDING_HISTORY[lang]]),
                                 "html.parser",
                             ).select("h4")[0].text.split(", ")[0]
-                            related_riding.save()
-                    riding.related_historically.add(related_riding)
+                            self.batcher.add(related_riding)
+                    # Symmetrical, as add() would have written it
+                    self.related_historically.add((riding.slug, related_riding.slug))
+                    self.related_historically.add((related_riding.slug, riding.slug))
@@ -2,10 +2,9 @@ from bs4 import BeautifulSoup
 from collections import defaultdict
 from django.conf import settings
 from django.core.files.base import ContentFile
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils.text import slugify
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak
 from parliaments import models
@@ -19,7 +18,7 @@ import requests
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     cache_provinces = {}
     cache_parliamentarians = defaultdict(dict)
@@ -28,6 +27,7 @@ class Command(BaseCommand):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
 
+        self.known_slugs = set(models.Parliamentarian.objects.values_list("slug", flat=True))
         for parliament in tqdm(
             models.Parliament.objects.all(),
             desc="Fetch Parliamentarians, LoP (lists)",
@@ -41,6 +41,7 @@ class Command(BaseCommand):
         ):
             for index, (url, name) in enumerate(urls.items()):
                 self.fetch_parliamentarian(slug if len(urls) == 1 else "{}-{}".format(slug, index + 1), name, url)
+        self.batcher.flush()
 
     def fetch_parliamentarians(self, parliament):
         logger.debug("Fetch parliamentarians, {}".format(parliament))
@@ -60,11 +61,10 @@ class Command(BaseCommand):
                 },
             )] = link.text
 
-    @transaction.atomic
     def fetch_parliamentarian(self, slug, name, lang_naive_url):
-        parliamentarian, created = models.Parliamentarian.objects.get_or_create(slug=slug)
-        if not created:
+        if slug in self.known_slugs:
             return
+        parliamentarian = models.Parliamentarian(slug=slug)
 
         for lang in (EN, FR):
             parliamentarian.names[lang][sources.NAME_LOP_PARLIAMENT[lang]] = name
@@ -89,6 +89,6 @@ class Command(BaseCommand):
             if os.path.exists(os.path.join(settings.MEDIA_ROOT, filepath)):
                 parliamentarian.photo = filepath
             else:
-                parliamentarian.photo.save(filename, ContentFile(requests.get(photo_url).content))
+                parliamentarian.photo.save(filename, ContentFile(requests.get(photo_url).content), save=False)
 
-        parliamentarian.save()
+        self.batcher.add(parliamentarian)
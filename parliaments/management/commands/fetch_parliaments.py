@@ -1,7 +1,6 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak, REVERSE_ORDINAL
 from parliaments import models
@@ -15,15 +14,16 @@ logger = logging.getLogger(__name__)
 inflector = inflect.engine()
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
-    @transaction.atomic
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
         self.fetch_parliaments()
+        self.batcher.flush()
 
     def fetch_parliaments(self):
+        parliaments = models.Parliament.objects.in_bulk()
         url = "https://lop.parl.ca/parlinfo/Lists/Parliament.aspx"
         for link in tqdm(
             BeautifulSoup(
@@ -33,10 +33,9 @@ class Command(BaseCommand):
             desc="Fetch Parliaments, LoP",
             unit="parliament",
         ):
-            parliament, created = models.Parliament.objects.get_or_create(
-                number=int(REVERSE_ORDINAL.sub(r"\1", link.text)),
-            )
-            if created or parliament.number >= 42:
+            number = int(REVERSE_ORDINAL.sub(r"\1", link.text))
+            if number not in parliaments or number >= 42:
+                parliament = parliaments.get(number) or models.Parliament(number=number)
                 url = url_tweak(
                     urljoin(url, link.attrs["href"]),
                     remove=("MenuID", "MenuQuery"),
@@ -58,4 +57,4 @@ class Command(BaseCommand):
                     fetch_url(parliament.links[EN][sources.NAME_LOP_PARLIAMENT[EN]]),
                     "html.parser",
                 ).select("#ctl00_cphContent_ctl06_pnlSectionPartyStandingsContent .GridRows")[0].contents[-1].text)
-                parliament.save()
+                self.batcher.add(parliament)
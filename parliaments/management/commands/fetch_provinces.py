@@ -1,8 +1,7 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils.text import slugify
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak
 from parliaments import models
@@ -14,17 +13,18 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     ROOT_URL = "https://lop.parl.ca/ParlInfo/Compilations/ProvinceTerritory.aspx"
 
-    @transaction.atomic
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
         self.fetch_provinces()
+        self.batcher.flush()
 
     def fetch_provinces(self):
+        provinces = models.Province.objects.in_bulk()
         url = url_tweak(self.ROOT_URL, update={"Language": sources.LANG_LOP[EN]})
         for link in tqdm(
             BeautifulSoup(
@@ -35,7 +35,8 @@ class Command(BaseCommand):
             unit="province",
         ):
             if link.attrs.get("id", "").startswith("ctl00_cphContent_repProvinces_"):
-                province, created = models.Province.objects.get_or_create(slug=slugify(link.text.strip()))
+                slug = slugify(link.text.strip())
+                province = provinces.setdefault(slug, models.Province(slug=slug))
                 url_en = url_tweak(
                     urljoin(url, link.attrs["href"]),
                     remove=("MenuID", "MenuQuery"),
@@ -58,10 +59,8 @@ class Command(BaseCommand):
                     remove=("MenuID", "MenuQuery"),
                     update={"Section": "All"},
                 )
-                province = models.Province.objects.get(links__contains=url_tweak(
-                    url_fr,
-                    update={"Language": sources.LANG_LOP[EN]},
-                ))
+                url_en = url_tweak(url_fr, update={"Language": sources.LANG_LOP[EN]})
+                province = next(province for province in provinces.values() if url_en in province.links[EN].values())
                 self.augment_province(province, FR, url_fr)
 
     def augment_province(self, province, lang, url):
@@ -79,4 +78,4 @@ class Command(BaseCommand):
             (sources.AVAILABILITY_WARNINGS.sub("", link.text.strip()), link.attrs["href"])
             for link in soup.select("#ctl00_cphContent_dataLinks a")
         ))
-        province.save()
+        self.batcher.add(province)
@@ -1,8 +1,7 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils.text import slugify
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url
 from parliaments import models
@@ -13,10 +12,11 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     known_ridings = set()
     cache_provinces = {}
+    cache_ridings = {}
 
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
@@ -24,14 +24,16 @@ class Command(BaseCommand):
 
         pending_parliaments = models.Parliament.objects.filter(general_election__election_ridings__isnull=True)
         if pending_parliaments.exists():
+            self.cache_provinces = models.Province.objects.in_bulk()
+            self.cache_ridings = models.Riding.objects.in_bulk()
             for parliament in tqdm(
                 pending_parliaments,
                 desc="Fetch Ridings, LoP",
                 unit="parliament",
             ):
                 self.fetch_ridings(parliament)
+            self.batcher.flush()
 
-    @transaction.atomic
     def fetch_ridings(self, parliament):
         logger.debug("Fetch ridings, {}".format(parliament))
         skipped_codes = set()
@@ -52,18 +54,12 @@ class Command(BaseCommand):
                     riding_slug = slugify(" ".join((province_slug, riding_name)))
                     code = sources.LOP_CODE.search(cells[0].a.attrs["href"]).group().lower()
                     if riding_slug not in self.known_ridings:
-                        try:
-                            province = self.cache_provinces[province_slug]
-                        except KeyError:
-                            province = models.Province.objects.get(slug=province_slug)
-                            self.cache_provinces[province_slug] = province
-                        riding, created = models.Riding.objects.get_or_create(
-                            slug=riding_slug,
-                            province=province,
-                        )
-                        if created:
+                        riding = self.cache_ridings.get(riding_slug)
+                        if riding is None:
+                            riding = models.Riding(slug=riding_slug, province=self.cache_provinces[province_slug])
                             riding.names[EN][sources.NAME_LOP_PARLIAMENT[EN]] = riding_name
-                            riding.save()
+                            self.cache_ridings[riding_slug] = riding
+                            self.batcher.add(riding)
                         self.known_ridings.add(riding_slug)
                         codes_to_ridings[code] = riding
                     else:
@@ -85,4 +81,4 @@ class Command(BaseCommand):
                         riding_name, province_name = sources.LOP_RIDING_AND_PROVINCE.search(cells[1].text.strip()).groups()
                         riding = codes_to_ridings[code]
                         riding.names[FR][sources.NAME_LOP_PARLIAMENT[FR]] = riding_name
-                        riding.save()
+                        self.batcher.add(riding)
@@ -1,8 +1,7 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.db.models import Q
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN
 from federal_common.utils import fetch_url, dateparse, REVERSE_ORDINAL
 from parliaments import models
@@ -13,9 +12,8 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
-    @transaction.atomic
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
@@ -29,6 +27,7 @@ class Command(BaseCommand):
                 unit="parliament",
             ):
                 self.fetch_sessions(parliament)
+            self.batcher.flush()
 
     def fetch_sessions(self, parliament):
         logger.debug("Fetch sessions: {}".format(parliament))
@@ -42,7 +41,7 @@ class Command(BaseCommand):
                 date_start = cells[1].text.split(" - ")[0].strip()
                 date_end = cells[1].text.split(" - ")[1].strip()
                 session_number = int(REVERSE_ORDINAL.sub(r"\1", cells[0].text.strip()))
-                models.Session.objects.get_or_create(
+                self.batcher.add(models.Session(
                     slug="{}-{}".format(parliament.number, session_number),
                     parliament=parliament,
                     number=session_number,
@@ -50,4 +49,4 @@ class Command(BaseCommand):
                     date_end=dateparse(date_end) if date_end else None,
                     sittings_senate=int(cells[3].text),
                     sittings_house=int(cells[4].text),
-                )
+                ), update_fields=("date_end", "sittings_senate", "sittings_house"))  # Links are added by fetch_house_votes
@@ -0,0 +1,94 @@
+from collections import defaultdict
+from django.contrib.contenttypes.models import ContentType
+from elections.models import ElectionCandidate
+from federal_common.models import NameIndex
+from parliaments.models import Parliamentarian
+from unidecode import unidecode
+import jellyfish
+import re
+
+
+TOKEN = re.compile(r"[a-z]+")
+
+
+def get_tokens(name):
+    if name.count(", ") == 1:
+        name = " ".join(reversed(name.split(", ")))
+    return [token for token in TOKEN.findall(unidecode(name).lower()) if len(token) > 1]  # Initials are too ambiguous to go on
+
+
+def get_keys(tokens):
+    return {jellyfish.metaphone(token) for token in tokens}
+
+
+class ParliamentarianMatcher(object):
+    """
+        Finds the parliamentarian a name most likely refers to when it isn't
+        spelt the way we've seen it before (e.g. with or without middle names,
+        honorifics or accents).
+
+        Known names are blocked by the riding they were elected in and by the
+        phonetic key of each of their words, so a lookup only scores the
+        handful of names sharing a riding and a key with the one sought, with
+        Jaro-Winkler. The index is built on first use.
+    """
+    THRESHOLD = 0.9
+
+    def __init__(self):
+        self.blocks = None
+
+    def build(self):
+        names = defaultdict(set)
+        for slug, name in NameIndex.objects.filter(
+            content_type=ContentType.objects.get_for_model(Parliamentarian),
+        ).exclude(source__in=("slug", "lop_item_code")).values_list("object_slug", "name").iterator():
+            names[slug].add(name)
+
+        self.blocks = defaultdict(lambda: defaultdict(set))
+        self.parliaments = defaultdict(set)
+        for slug, name, riding, general_election_parliament, by_election_parliament in ElectionCandidate.objects.filter(
+            parliamentarian__isnull=False,
+        ).values_list(
+            "parliamentarian_id",
+            "name",
+            "election_riding__riding_id",
+            "election_riding__general_election__parliament_id",
+            "election_riding__by_election__parliament_id",
+        ).iterator():
+            self.parliaments[riding, slug].add(general_election_parliament or by_election_parliament)
+            for known_name in names[slug] | {name}:
+                tokens = get_tokens(known_name)
+                for key in get_keys(tokens):
+                    self.blocks[riding, key][slug].add(" ".join(tokens))
+
+    def match(self, name, riding, parliament=None):
+        if self.blocks is None:
+            self.build()
+        tokens = get_tokens(name)
+        candidates = defaultdict(set)
+        for key in get_keys(tokens):
+            for slug, known_names in self.blocks.get((riding, key), {}).items():
+                candidates[slug] |= known_names
+        if parliament is not None and any(parliament in self.parliaments[riding, slug] for slug in candidates):
+            candidates = {
+                slug: known_names
+                for slug, known_names in candidates.items()
+                if parliament in self.parliaments[riding, slug]
+            }
+
+        scores = sorted((
+            (max(score(tokens, known_name) for known_name in known_names), slug)
+            for slug, known_names in candidates.items()
+        ), reverse=True)
+        if not scores or scores[0][0] < self.THRESHOLD or (len(scores) > 1 and scores[1][0] == scores[0][0]):
+            return None
+        return scores[0][1]
+
+
+def score(tokens, known_name):
+    # Where every word of the known name is there, extra ones (middle names, titles) are ignored
+    scores = [jellyfish.jaro_winkler(" ".join(tokens), known_name)]
+    known_keys = get_keys(known_name.split())
+    if known_keys <= get_keys(tokens):
+        scores.append(jellyfish.jaro_winkler(" ".join(token for token in tokens if jellyfish.metaphone(token) in known_keys), known_name))
+    return max(scores)
@@ -16,6 +16,7 @@ class Party(SlugMixin, NamesMixin, LinksMixin, models.Model):
     color = models.CharField(max_length=20)
     related = models.ManyToManyField("self", blank=True)
     lop_item_code = models.SlugField(db_index=True, null=True)
+    name_indexed = True
 
     class Meta:
         ordering = ("slug", )
@@ -68,6 +69,7 @@ class Province(SlugMixin, NamesMixin, LinksMixin, models.Model):
 
         * [Library of Parliament's Provinces and Territories](https://lop.parl.ca/parlinfo/compilations/ProvinceTerritory.aspx?Menu=ProvinceTerritory)
     """
+    name_indexed = True
 
     class Meta:
         ordering = ("slug", )
@@ -88,6 +90,11 @@ class Parliamentarian(SlugMixin, NamesMixin, LinksMixin, models.Model):
         * [OpenParliament.ca (1994 onwards)](https://openparliament.ca/politicians/)
         * [House of Commons' Members of Parliament](http://www.parl.gc.ca/Parliamentarians/en/members)
         * [Library of Parliament's History of Federal Ridings](https://lop.parl.ca/About/Parliament/FederalRidingsHistory/hfer.asp?Language=E&Search=C)
+
+        ## Filtering examples
+
+        * [Several parliamentarians by slug](?slug__in=may-elizabeth,trudeau-justin)
+        * [The same, in the order given and noting any missing](batch/?pk=may-elizabeth,trudeau-justin)
     """
     photo = models.ImageField(upload_to=get_photo_path)
     birthdate = models.CharField(max_length=10, db_index=True, help_text="Exact birth dates for parliamentarians in the 1800s sometimes omitted day or month")
@@ -104,6 +111,7 @@ class Parliamentarian(SlugMixin, NamesMixin, LinksMixin, models.Model):
         (LANG_FR, "Français"),
         (LANG_BOTH, "English / Français"),
     ), null=True, db_index=True)
+    name_indexed = True
 
     class Meta:
         ordering = ("slug", )
@@ -125,6 +133,7 @@ class Riding(SlugMixin, NamesMixin, LinksMixin, models.Model):
 
         * [Ridings in British Columbia](?slug__startswith=british-columbia-)
         * [Ridings named like Vancouver](?names__icontains=vancouver)
+        * [Just the names of ridings and their provinces](?fields=url,names,province&expand=province)
     """
     province = models.ForeignKey(Province, related_name="ridings")
     related_historically = models.ManyToManyField("self", blank=True)
@@ -134,6 +143,7 @@ class Riding(SlugMixin, NamesMixin, LinksMixin, models.Model):
     area_km2 = models.PositiveIntegerField(null=True, db_index=True)
     postal_code_fsas = json.JSONField()
     current_parliamentarian = models.OneToOneField(Parliamentarian, null=True, related_name="riding", db_index=True)
+    name_indexed = True
 
     class Meta:
         ordering = ("slug", )
@@ -0,0 +1,100 @@
+from datetime import date
+from django.test import TestCase
+from elections.models import ElectionCandidate, ElectionRiding, GeneralElection
+from federal_common.sources import EN, FR
+from parliaments.matching import ParliamentarianMatcher, get_keys, get_tokens, score
+from parliaments.models import Parliament, Parliamentarian, Province, Riding
+
+
+class MatchingTestCase(TestCase):
+
+    def test_tokens_skip_initials_and_accents(self):
+        self.assertEqual(get_tokens("Nault, Robert D."), ["robert", "nault"])
+        self.assertEqual(get_tokens("André Bachand"), ["andre", "bachand"])
+
+    def test_keys_are_phonetic(self):
+        self.assertEqual(get_keys(["smith"]), get_keys(["smyth"]))
+        self.assertEqual(get_keys(["anderson"]), get_keys(["andersen"]))
+        self.assertNotEqual(get_keys(["smith"]), get_keys(["nault"]))
+
+    def test_score_ignores_extra_words(self):
+        self.assertEqual(score(get_tokens("Robert Daniel Nault"), "robert nault"), 1.0)
+        self.assertLess(score(get_tokens("Robert Smith"), "robert nault"), ParliamentarianMatcher.THRESHOLD)
+        self.assertGreater(score(get_tokens("Robert Naul"), "robert nault"), ParliamentarianMatcher.THRESHOLD)
+
+
+class ParliamentarianMatcherTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(slug="ontario")
+        cls.kenora = Riding.objects.create(slug="ontario-kenora", province=province)
+        cls.ottawa = Riding.objects.create(slug="ontario-ottawa-centre", province=province)
+        for number in (41, 42):
+            election = GeneralElection.objects.create(
+                number=number,
+                parliament=Parliament.objects.create(number=number),
+                date_fuzz=date(1970 + number, 1, 1),
+                date=date(1970 + number, 1, 1),
+                population=0,
+                registered=0,
+                ballots_total=0,
+                turnout=0,
+            )
+            for riding in (cls.kenora, cls.ottawa):
+                ElectionRiding.objects.create(slug="{}-{}".format(number, riding.slug), general_election=election, date=election.date, riding=riding)
+
+        cls.add_candidate("nault-robert-daniel", "Nault, Robert", 41, cls.kenora, names={EN: {"test": "Bob Nault"}, FR: {}})
+        cls.add_candidate("dewar-paul-1", "Dewar, Paul", 41, cls.ottawa)
+        cls.add_candidate("dewar-paul-2", "Dewar, Paul", 42, cls.ottawa)
+
+    @classmethod
+    def add_candidate(cls, slug, name, parliament, riding, names=None):
+        parliamentarian = Parliamentarian.objects.create(
+            slug=slug,
+            names=names,
+            birthdate="1960",
+            lop_item_code=slug,
+            constituency_offices={},
+            hill_phone="",
+            hill_fax="",
+        )
+        ElectionCandidate.objects.create(
+            slug="{}-{}".format(parliament, slug),
+            election_riding=ElectionRiding.objects.get(general_election=parliament, riding=riding),
+            name=name,
+            parliamentarian=parliamentarian,
+            elected=True,
+            acclaimed=False,
+        )
+
+    def test_matches_variants_of_a_name(self):
+        matcher = ParliamentarianMatcher()
+        self.assertEqual(matcher.match("Robert Daniel Nault", self.kenora.slug), "nault-robert-daniel")
+        self.assertEqual(matcher.match("Robert Naul", self.kenora.slug), "nault-robert-daniel")
+        self.assertEqual(matcher.match("Hon. Bob Nault", self.kenora.slug), "nault-robert-daniel")  # As indexed, not as on the ballot
+
+    def test_ignores_initials(self):
+        matcher = ParliamentarianMatcher()
+        self.assertEqual(matcher.match("Robert D. Nault", self.kenora.slug), "nault-robert-daniel")
+        self.assertEqual(matcher.match("Paul W. Dewar", self.ottawa.slug, 42), "dewar-paul-2")
+
+    def test_rejects_names_below_the_threshold(self):
+        matcher = ParliamentarianMatcher()
+        self.assertIsNone(matcher.match("Robert Smith", self.kenora.slug))
+        self.assertIsNone(matcher.match("Rob Nault", self.kenora.slug))
+
+    def test_blocks_by_riding(self):
+        self.assertIsNone(ParliamentarianMatcher().match("Robert Nault", self.ottawa.slug))
+
+    def test_ties_are_broken_by_parliament_only(self):
+        matcher = ParliamentarianMatcher()
+        self.assertIsNone(matcher.match("Paul Dewar", self.ottawa.slug))
+        self.assertEqual(matcher.match("Paul Dewar", self.ottawa.slug, 41), "dewar-paul-1")
+        self.assertEqual(matcher.match("Paul Dewar", self.ottawa.slug, 42), "dewar-paul-2")
+
+    def test_builds_once(self):
+        matcher = ParliamentarianMatcher()
+        matcher.match("Robert Nault", self.kenora.slug)
+        with self.assertNumQueries(0):
+            matcher.match("Paul Dewar", self.ottawa.slug, 42)
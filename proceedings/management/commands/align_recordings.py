@@ -0,0 +1,79 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from itertools import groupby
+from proceedings import models
+from tqdm import tqdm
+import logging
+
+
+logger = logging.getLogger(__name__)
+SLACK = timedelta(minutes=1)  # Hansard timestamps are truncated to the minute
+
+
+class Command(BaseCommand):
+
+    def handle(self, *args, **options):
+        if options["verbosity"] > 1:
+            logger.setLevel(logging.DEBUG)
+
+        # Recordings that actually took place, grouped by what they're a recording of
+        self.recordings = defaultdict(list)
+        for slug, sitting_id, committee_id, actual_start, actual_end, scheduled_end in models.Recording.objects.filter(
+            actual_start__isnull=False,
+        ).order_by("actual_start").values_list(
+            "slug",
+            "sitting_id",
+            "committee_id",
+            "actual_start",
+            "actual_end",
+            "scheduled_end",
+        ):
+            if sitting_id:
+                self.recordings[sitting_id, None].append((actual_start, actual_end or scheduled_end, slug))
+            elif committee_id:
+                self.recordings[None, committee_id].append((actual_start, actual_end or scheduled_end, slug))
+
+        blocks = models.PublicationBlock.objects.order_by(
+            "sitting",
+            "committee",
+            "date_start",
+        ).values_list(
+            "slug",
+            "sitting_id",
+            "committee_id",
+            "date_start",
+        ).iterator()
+        for key, group in tqdm(
+            groupby(blocks, key=lambda block: (block[1], block[2])),
+            desc="Align Recordings",
+            unit="sitting",
+        ):
+            self.align(key, list(group))
+
+    @transaction.atomic
+    def align(self, key, blocks):
+        sitting_id, committee_id = key
+        models.RecordingAlignment.objects.filter(
+            publication_block__sitting_id=sitting_id,
+            publication_block__committee_id=committee_id,
+        ).delete()
+
+        # Where recordings overlap (e.g. question period within a sitting), the earliest starting one wins
+        alignments = []
+        for slug, sitting_id, committee_id, date_start in blocks:
+            for start, end, recording_slug in self.recordings[key]:
+                if start - SLACK <= date_start <= end:
+                    alignments.append(models.RecordingAlignment(
+                        slug=slug,
+                        publication_block_id=slug,
+                        recording_id=recording_slug,
+                        offset=max(0, int((date_start - start).total_seconds())),
+                    ))
+                    break
+                elif start - SLACK > date_start:
+                    break
+        if blocks and not alignments:
+            logger.debug("No recording covers {}".format(blocks[0][0]))
+        models.RecordingAlignment.objects.bulk_create(alignments)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from parliaments.models import Session
+from proceedings.vote_matrix import VoteMatrix
+from tqdm import tqdm
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    def handle(self, *args, **options):
+        if options["verbosity"] > 1:
+            logger.setLevel(logging.DEBUG)
+
+        for session in tqdm(
+            Session.objects.filter(sittings__house_votes__isnull=False).distinct(),
+            desc="Build Vote Matrices",
+            unit="session",
+        ):
+            VoteMatrix.build(session).save()
@@ -1,8 +1,7 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils.text import slugify
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak, get_cached_dict, get_cached_obj
 from parliaments.models import Session
@@ -14,7 +13,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
@@ -33,12 +32,12 @@ class Command(BaseCommand):
                 parliament_number, session_number = link.text.split()[0].split("-")
                 self.fetch_bills_session(Session.objects.get(parliament__number=parliament_number, number=session_number))
 
-    @transaction.atomic
     def fetch_bills_session(self, session):
         cached_committees = get_cached_dict(models.Committee.objects.filter(session=session))
 
         url = "http://www.parl.ca/LegisInfo/Home.aspx?download=xml&ParliamentSession={}-{}".format(session.parliament.number, session.number)
         soup = BeautifulSoup(fetch_url(url, use_cache=session.parliament.number < 42), "lxml")
+        bill_committees = set()
         for bill_soup in tqdm(
             soup.find_all("bill"),
             desc=str(session),
@@ -70,13 +69,21 @@ class Command(BaseCommand):
                 title_short = bill_soup.select("shorttitle > title[language={}]".format(sources.LANG_LEGISINFO_XML[lang]))[0].text
                 if title_short:
                     bill.names[lang][sources.NAME_LEGISINFO_TITLE_SHORT[lang]] = title_short
-            bill.save()
+            self.batcher.add(bill)
 
             for event_soup in bill_soup.select("event"):
                 try:
                     committee_soup = bill_soup.select("committee[accronym]")[0]  # They misspelled "acronym" in their XML
                     code = committee_soup.attrs["accronym"]
                     if code != "WHOL":
-                        bill.committees.add(get_cached_obj(cached_committees, code))
+                        bill_committees.add((bill.slug, get_cached_obj(cached_committees, code).slug))
                 except IndexError:
                     pass
+
+        self.batcher.flush()
+        BillCommittee = models.Bill.committees.through
+        bill_committees -= set(BillCommittee.objects.filter(bill__session=session).values_list("bill_id", "committee_id"))
+        BillCommittee.objects.bulk_create(
+            BillCommittee(bill_id=bill_slug, committee_id=committee_slug)
+            for bill_slug, committee_slug in bill_committees
+        )
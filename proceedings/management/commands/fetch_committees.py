@@ -1,8 +1,7 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils.text import slugify
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak, get_french_parl_url
 from parliaments.models import Session
@@ -16,15 +15,15 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
         self.fetch_hoc_committees()
         self.fetch_senate_committees()
+        self.batcher.flush()
 
-    @transaction.atomic
     def fetch_hoc_committees(self):
         list_url = "http://www.ourcommons.ca/Committees/en/List"
         for link in tqdm(
@@ -41,7 +40,6 @@ class Command(BaseCommand):
                 url_tweak(urljoin(list_url, link.attrs["href"])),
             )
 
-    @transaction.atomic
     def fetch_senate_committees(self):
         list_url = "https://sencanada.ca/en/committees/"
         for link in tqdm(
@@ -82,7 +80,7 @@ class Command(BaseCommand):
                         committee.chamber = models.Committee.CHAMBER_JOINT
                     committee.slug = self.get_slug(committee)
                     committee_url[FR] = get_french_parl_url(committee_url[lang], soup)
-            committee.save()
+            self.batcher.add(committee)
 
     def fetch_senate_committees_session(self, session, session_url):
         for link in tqdm(
@@ -107,7 +105,7 @@ class Command(BaseCommand):
                 if not committee.slug:
                     committee.slug = self.get_slug(committee)
                     committee_url[FR] = get_french_parl_url(committee_url[lang], soup)
-            committee.save()
+            self.batcher.add(committee)
 
     def get_slug(self, committee):
         return slugify("-".join(map(lambda x: str(x), (
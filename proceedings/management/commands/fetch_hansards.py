@@ -1,12 +1,11 @@
 from collections import namedtuple, defaultdict
 from datetime import datetime, timedelta
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.db.models import Q
 from django.utils.timezone import make_aware
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR, WHITESPACE
-from federal_common.utils import fetch_url, one_or_none, get_cached_dict, get_cached_obj, datetimeparse
+from federal_common.utils import fetch_url, one_or_none, get_cached_dict, get_cached_obj, datetimeparse, LazyCachedDict
 from lxml import etree
 from lxml.etree import _ProcessingInstruction, _ElementUnicodeResult
 from parliaments.models import Parliamentarian
@@ -50,22 +49,22 @@ CONTENT_MAY_DIFFER = (
 # Tags that automatically save and clear the hansard block cache upon entering and exiting during a depth-first-search
 BoundaryCategories = namedtuple("BoundaryCategories", ("open_outer", "open_inner", "close_inner", "close_outer"))
 BOUNDARY_CATEGORIES = {
-    "Appendix": BoundaryCategories(None, models.HansardBlock.CATEGORY_ASIDES, models.HansardBlock.CATEGORY_ASIDES, None),
-    "AppendixContent": BoundaryCategories(None, models.HansardBlock.CATEGORY_ASIDES, models.HansardBlock.CATEGORY_ASIDES, None),
-    "Division": BoundaryCategories(None, models.HansardBlock.CATEGORY_DIVISION, models.HansardBlock.CATEGORY_DIVISION, None),
-    "Hansard": BoundaryCategories(None, models.HansardBlock.CATEGORY_UNEXPECTED, models.HansardBlock.CATEGORY_UNEXPECTED, None),
-    "HansardBody": BoundaryCategories(None, models.HansardBlock.CATEGORY_UNEXPECTED, models.HansardBlock.CATEGORY_UNEXPECTED, None),
-    "Intervention": BoundaryCategories(models.HansardBlock.CATEGORY_ASIDES, models.HansardBlock.CATEGORY_INTERVENTION, models.HansardBlock.CATEGORY_INTERVENTION, models.HansardBlock.CATEGORY_ASIDES),
-    "Intro": BoundaryCategories(None, models.HansardBlock.CATEGORY_ASIDES, models.HansardBlock.CATEGORY_ASIDES, None),
-    "MemberList": BoundaryCategories(None, models.HansardBlock.CATEGORY_MEMBERLIST, models.HansardBlock.CATEGORY_MEMBERLIST, None),
-    "MemberLists": BoundaryCategories(None, models.HansardBlock.CATEGORY_UNEXPECTED, models.HansardBlock.CATEGORY_UNEXPECTED, None),
-    "OrderOfBusiness": BoundaryCategories(None, models.HansardBlock.CATEGORY_UNEXPECTED, models.HansardBlock.CATEGORY_UNEXPECTED, None),
-    "QuestionContent": BoundaryCategories(None, None, models.HansardBlock.CATEGORY_WRITTEN_QUESTION, None),
-    "Responder": BoundaryCategories(None, models.HansardBlock.CATEGORY_WRITTEN_RESPONSE, None, None),
-    "ResponseContent": BoundaryCategories(None, None, models.HansardBlock.CATEGORY_WRITTEN_RESPONSE, None),
-    "SubjectOfBusiness": BoundaryCategories(None, models.HansardBlock.CATEGORY_ASIDES, models.HansardBlock.CATEGORY_ASIDES, None),
-    "SubjectOfBusinessContent": BoundaryCategories(None, None, models.HansardBlock.CATEGORY_ASIDES, None),
-    "WrittenQuestionResponse": BoundaryCategories(models.HansardBlock.CATEGORY_ASIDES, models.HansardBlock.CATEGORY_WRITTEN_QUESTION, models.HansardBlock.CATEGORY_UNEXPECTED, None),
+    "Appendix": BoundaryCategories(None, models.PublicationBlock.CATEGORY_ASIDES, models.PublicationBlock.CATEGORY_ASIDES, None),
+    "AppendixContent": BoundaryCategories(None, models.PublicationBlock.CATEGORY_ASIDES, models.PublicationBlock.CATEGORY_ASIDES, None),
+    "Division": BoundaryCategories(None, models.PublicationBlock.CATEGORY_DIVISION, models.PublicationBlock.CATEGORY_DIVISION, None),
+    "Hansard": BoundaryCategories(None, models.PublicationBlock.CATEGORY_UNEXPECTED, models.PublicationBlock.CATEGORY_UNEXPECTED, None),
+    "HansardBody": BoundaryCategories(None, models.PublicationBlock.CATEGORY_UNEXPECTED, models.PublicationBlock.CATEGORY_UNEXPECTED, None),
+    "Intervention": BoundaryCategories(models.PublicationBlock.CATEGORY_ASIDES, models.PublicationBlock.CATEGORY_INTERVENTION, models.PublicationBlock.CATEGORY_INTERVENTION, models.PublicationBlock.CATEGORY_ASIDES),
+    "Intro": BoundaryCategories(None, models.PublicationBlock.CATEGORY_ASIDES, models.PublicationBlock.CATEGORY_ASIDES, None),
+    "MemberList": BoundaryCategories(None, models.PublicationBlock.CATEGORY_MEMBERLIST, models.PublicationBlock.CATEGORY_MEMBERLIST, None),
+    "MemberLists": BoundaryCategories(None, models.PublicationBlock.CATEGORY_UNEXPECTED, models.PublicationBlock.CATEGORY_UNEXPECTED, None),
+    "OrderOfBusiness": BoundaryCategories(None, models.PublicationBlock.CATEGORY_UNEXPECTED, models.PublicationBlock.CATEGORY_UNEXPECTED, None),
+    "QuestionContent": BoundaryCategories(None, None, models.PublicationBlock.CATEGORY_WRITTEN_QUESTION, None),
+    "Responder": BoundaryCategories(None, models.PublicationBlock.CATEGORY_WRITTEN_RESPONSE, None, None),
+    "ResponseContent": BoundaryCategories(None, None, models.PublicationBlock.CATEGORY_WRITTEN_RESPONSE, None),
+    "SubjectOfBusiness": BoundaryCategories(None, models.PublicationBlock.CATEGORY_ASIDES, models.PublicationBlock.CATEGORY_ASIDES, None),
+    "SubjectOfBusinessContent": BoundaryCategories(None, None, models.PublicationBlock.CATEGORY_ASIDES, None),
+    "WrittenQuestionResponse": BoundaryCategories(models.PublicationBlock.CATEGORY_ASIDES, models.PublicationBlock.CATEGORY_WRITTEN_QUESTION, models.PublicationBlock.CATEGORY_UNEXPECTED, None),
 }
 NotBoundary = BoundaryCategories(None, None, None, None)
 METADATA_TAGS = {
@@ -177,13 +176,12 @@ assert not METADATA_TAGS & set(BOUNDARY_CATEGORIES), METADATA_TAGS & set(BOUNDAR
 
 
 # Mapping person speaking names to parliamentarians
-CACHED_PARLIAMENTARIANS = get_cached_dict(Parliamentarian.objects.filter(Q(birthdate__gte="1900") | Q(birthdate="")))
 HONORIFICS = r"(?P<honorific>Mr|M|Ms|Mrs|Miss|Hon|Right Hon|L'hon)\.?"
 SPEAKER_FORMATS = [
     re.compile(r"^{} (?P<name>[^()]*)(?P<suffix> .*)?$".format(HONORIFICS)),
     re.compile(r"^(The Acting Speaker|The Presiding Officer|The Assistant Deputy Speaker) \({} (?P<name>[^()]*)\)$".format(HONORIFICS)),
 ]
-for alias, slug in {
+PARLIAMENTARIAN_ALIASES = {
     "113993": "anderson-david-2",
     "2070": "blaikie-william-alexander-bill",
     "Candice Hoeppner": "bergen-candice",
@@ -230,8 +228,18 @@ for alias, slug in {
     "The Acting Speaker (Mr. Proulx)": "proulx-marcel",
     "The Acting Speaker (Ms. Bakopanos)": "bakopanos-eleni",
     "The Assistant Deputy Chair (Mr. Anthony Rota)": "rota-anthony",
-}.items():
-    CACHED_PARLIAMENTARIANS[alias].add(Parliamentarian.objects.get(slug=slug))
+}
+
+
+def get_cached_parliamentarians():
+    cached = get_cached_dict(Parliamentarian.objects.filter(Q(birthdate__gte="1900") | Q(birthdate="")))
+    parliamentarians = Parliamentarian.objects.in_bulk(set(PARLIAMENTARIAN_ALIASES.values()))
+    for alias, slug in PARLIAMENTARIAN_ALIASES.items():
+        cached[alias].add(parliamentarians[slug])
+    return cached
+
+
+CACHED_PARLIAMENTARIANS = LazyCachedDict(get_cached_parliamentarians)
 UNMAPPED_NAMES = {
     "Chief Phil Fontaine (National Chief of the Assembly of First Nations)",
     "H. E. Vicente Fox Quesada (President of the United Mexican States)",
@@ -278,9 +286,10 @@ UNMAPPED_NAMES = {
 
 # Other constants
 PARSED = "element-already-parsed"
+MARKUP = re.compile(r"<[^>]+>")
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     hansard_block = None
     previous_hansard_block = None
@@ -300,7 +309,6 @@ class Command(BaseCommand):
                 logger.exception(sitting, sitting.links[EN][sources.NAME_HOC_HANSARD_XML[EN]])
                 raise
 
-    @transaction.atomic
     def fetch_hansard(self, sitting):
 
         # Fetch and parse the hansard XML
@@ -327,9 +335,13 @@ class Command(BaseCommand):
         self.person_speaking = None
         self.previous_hansard_block = None
         self.sitting = sitting
+        self.speaking = None
+        self.speaking_statistics = {}
         self.timestamp = datetimeparse(self.tree[EN].find("//ExtractedItem[@Name='MetaCreationTime']").text)
         self.new_hansard_block()
         self.parse_element(self.tree[EN].getroot())
+        self.save_speaking_statistics()
+        self.batcher.flush()
 
     def parse_element(self, element, lang=None, force_unwrapped=False):
 
@@ -448,11 +460,11 @@ class Command(BaseCommand):
         if self.hansard_block is not None:
             self.save_hansard_block()
         self.hansard_block_number += 1
-        self.hansard_block = models.HansardBlock(
+        self.hansard_block = models.PublicationBlock(
             sitting=self.sitting,
             number=self.hansard_block_number,
             slug="{}-{}".format(self.sitting.slug, self.hansard_block_number),
-            start_approx=self.timestamp,
+            date_start=self.timestamp,
             previous=self.previous_hansard_block,
             category=None,
             content={EN: [], FR: []},
@@ -478,9 +490,10 @@ class Command(BaseCommand):
             unexpected_metadata = set(self.hansard_block.metadata.keys()) - EXPECTED_METADATA.get(reason, set())
             assert not unexpected_metadata, f"{reason}, {unexpected_metadata}, {self.hansard_block.content[EN]}"
             self.hansard_block.metadata["Intervention-PersonSpeaking"] = self.person_speaking
-            if self.hansard_block.category == models.HansardBlock.CATEGORY_UNEXPECTED:
+            if self.hansard_block.category == models.PublicationBlock.CATEGORY_UNEXPECTED:
                 logger.warning("UNEXPECTED", reason, self.hansard_block.content)
-            self.hansard_block.save()
+            self.batcher.add(self.hansard_block)
+            self.update_speaking_statistics()
             self.previous_hansard_block = self.hansard_block
             self.hansard_block = None
 
@@ -490,6 +503,42 @@ class Command(BaseCommand):
         self.person_speaking = None
         self.parliamentarian = None
 
+    def update_speaking_statistics(self):
+        # An intervention is assumed to last until the next block begins
+        self.end_speaking(self.hansard_block.date_start)
+        if self.hansard_block.category == models.PublicationBlock.CATEGORY_INTERVENTION and self.hansard_block.parliamentarian:
+            parliamentarian = self.hansard_block.parliamentarian
+            if parliamentarian.slug not in self.speaking_statistics:
+                self.speaking_statistics[parliamentarian.slug] = models.SpeakingStatistic(
+                    slug="-".join((self.sitting.slug, parliamentarian.slug)),
+                    parliamentarian=parliamentarian,
+                    sitting=self.sitting,
+                    session_id=self.sitting.session_id,
+                )
+            statistic = self.speaking_statistics[parliamentarian.slug]
+            statistic.interventions += 1
+            statistic.words_en += count_words(self.hansard_block.content.get(EN, ""))
+            statistic.words_fr += count_words(self.hansard_block.content.get(FR, ""))
+            self.speaking = (statistic, self.hansard_block.date_start)
+
+    def end_speaking(self, date_end):
+        if self.speaking is not None:
+            statistic, date_start = self.speaking
+            statistic.duration += max(0, int((date_end - date_start).total_seconds()))
+            self.speaking = None
+
+    def save_speaking_statistics(self):
+        # With no block after it, the last intervention lasts until the sitting's recording ends, where we know of one
+        if self.speaking is not None:
+            date_end = max((
+                actual_end or scheduled_end
+                for actual_end, scheduled_end in models.Recording.objects.filter(sitting=self.sitting).values_list("actual_end", "scheduled_end")
+            ), default=None)
+            if date_end is not None:
+                self.end_speaking(date_end)
+        models.SpeakingStatistic.objects.filter(sitting=self.sitting).exclude(parliamentarian__in=self.speaking_statistics.keys()).delete()
+        self.batcher.extend(self.speaking_statistics.values())
+
     def assert_no_stray_content(self):
         for lang, content in self.hansard_block.content.items():
             assert not content, "Stray content? {}".format(content)
@@ -661,6 +710,10 @@ def normalize_whitespace(content, strip):
         }
 
 
+def count_words(content):
+    return len(MARKUP.sub(" ", content).split())
+
+
 def merge_adjacent_quotes(element):
     if isinstance(element, _ElementUnicodeResult):
         return
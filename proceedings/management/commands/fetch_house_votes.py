@@ -1,11 +1,13 @@
 from bs4 import BeautifulSoup
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from collections import Counter, defaultdict
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
-from federal_common.utils import fetch_url, url_tweak, get_french_parl_url, dateparse, one_or_none, soup_to_text, get_cached_obj, get_cached_dict
+from federal_common.utils import fetch_url, url_tweak, get_french_parl_url, dateparse, one_or_none, soup_to_text, get_cached_obj, get_cached_dict, FetchFailure, FetchSuppressed
+from parliaments.matching import ParliamentarianMatcher
 from parliaments.models import Session, Parliamentarian, Party, Riding
 from proceedings import models
+from proceedings.vote_matrix import VoteMatrix
 from tqdm import tqdm
 from urllib.parse import parse_qs, urlparse
 from urllib.parse import urljoin
@@ -30,6 +32,7 @@ PARTY_MAPPING = {
     "Conservative": "c",
 }
 WIDGET_ID = re.compile(r"/ParlDataWidgets/en/affiliation/([0-9]+)")
+VOTE_PARTICIPANTS_XML = "http://www.ourcommons.ca/Parliamentarians/en/HouseVotes/ExportDetailsVotes?output=XML"
 RECORDED_VOTE_MAPPING = {
     (False, False, True): models.HouseVoteParticipant.VOTE_PAIRED,
     (False, True, False): models.HouseVoteParticipant.VOTE_NAY,
@@ -38,32 +41,33 @@ RECORDED_VOTE_MAPPING = {
     (True, False, True): models.HouseVoteParticipant.VOTE_YEA,  # Strange. See http://www.ourcommons.ca/Parliamentarians/en/votes/40/3/160/, Paule Brunelle for an example
     (True, True, False): models.HouseVoteParticipant.VOTE_ABSTAINED,
 }
+# Names ParliamentarianMatcher can't resolve: a married name, a nickname or
+# a contraction of the given name, or a middle name the Library of
+# Parliament lists and the vote doesn't, which leaves too little in common.
 PARLIAMENTARIAN_MAPPING = {
-    ("Candice Hoeppner", "manitoba-portage-lisgar"): "bergen-candice",
-    ("David A. Anderson", "british-columbia-victoria"): "anderson-david-1",
-    ("David Anderson", "british-columbia-victoria"): "anderson-david-1",
-    ("David Anderson", "saskatchewan-cypress-hills-grasslands"): "anderson-david-2",
-    ("David Chatters", "alberta-westlock-st-paul"): "chatters-david-cameron",
-    ("Don H. Bell", "british-columbia-north-vancouver"): "bell-don",
-    ("Gary Ralph Schellenberger", "ontario-perth-wellington"): "schellenberger-gary",
-    ("Glen Douglas Pearson", "ontario-london-north-centre"): "pearson-glen",
-    ("Greg Francis Thompson", "new-brunswick-new-brunswick-southwest"): "thompson-gregory-francis",
-    ("Gurbax S. Malhi", "ontario-bramalea-gore-malton"): "malhi-gurbax-singh",
-    ("Jean C. Lapierre", "quebec-outremont"): "lapierre-jean-c",
-    ("John Cummins", "british-columbia-delta-richmond-east"): "cummins-john-martin",
-    ("Joseph Volpe", "ontario-eglinton-lawrence"): "volpe-giuseppe-joseph",
-    ("Judy A. Sgro", "ontario-humber-river-black-creek"): "sgro-judy",
-    ("Judy A. Sgro", "ontario-york-west"): "sgro-judy",
-    ("Khristinn Kellie Leitch", "ontario-simcoe-grey"): "leitch-k-kellie",
-    ("Megan Anissa Leslie", "nova-scotia-halifax"): "leslie-megan",
-    ("Robert D. Nault", "ontario-kenora"): "nault-robert-daniel",
-    ("Ruben John Efford", "newfoundland-and-labrador-avalon"): "efford-ruben-john",
-    ("Senator Josée Verner", "quebec-louis-saint-laurent"): "verner-josee",
-    ("Senator Norman E. Doyle", "newfoundland-and-labrador-st-johns-east"): "doyle-norman-e",
+    ("Candice Hoeppner", "manitoba-portage-lisgar"): "bergen-candice",  # Married name
+    ("David Chatters", "alberta-westlock-st-paul"): "chatters-david-cameron",  # Middle name
+    ("Greg Francis Thompson", "new-brunswick-new-brunswick-southwest"): "thompson-gregory-francis",  # Contraction
+    ("Gurbax S. Malhi", "ontario-bramalea-gore-malton"): "malhi-gurbax-singh",  # Middle name as an initial
+    ("John Cummins", "british-columbia-delta-richmond-east"): "cummins-john-martin",  # Middle name
+    ("Joseph Volpe", "ontario-eglinton-lawrence"): "volpe-giuseppe-joseph",  # Anglicized given name
+    ("Robert D. Nault", "ontario-kenora"): "nault-robert-daniel",  # Middle name as an initial
 }
+BALLOTS = (models.HouseVoteParticipant.VOTE_YEA, models.HouseVoteParticipant.VOTE_NAY)
 
 
-class Command(BaseCommand):
+def flag_dissent(participants):
+    tallies = defaultdict(Counter)
+    for hvp in participants:
+        if hvp.party_id and hvp.recorded_vote in BALLOTS:
+            tallies[hvp.party_id][hvp.recorded_vote] += 1
+    for hvp in participants:
+        if hvp.party_id and hvp.recorded_vote in BALLOTS:
+            tally = tallies[hvp.party_id]
+            hvp.dissent = tally[hvp.recorded_vote] < max(tally[ballot] for ballot in BALLOTS)
+
+
+class Command(BatchedCommand):
 
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
@@ -72,6 +76,7 @@ class Command(BaseCommand):
         self.cached_parliamentarians = get_cached_dict(Parliamentarian.objects.filter(election_candidates__election_riding__date__year__gte=2000))
         self.cached_ridings = get_cached_dict(Riding.objects.filter(election_ridings__date__year__gte=2000))
         self.cached_parties = get_cached_dict(Party.objects.all())
+        self.matcher = ParliamentarianMatcher()
         self.cached_parties.update({
             "Independent": [None],
             "Conservative Independent": [None],
@@ -107,85 +112,183 @@ class Command(BaseCommand):
         )
         session.save()
 
-        parl_soup = BeautifulSoup(fetch_url(url_tweak(
-            "http://www.ourcommons.ca/Parliamentarians/en/HouseVotes/ExportVotes?output=XML",
-            update={"sessionId": remote_session_id},
-        ), use_cache=session.parliament.number < 42), "lxml")
+        # Everything the votes will need to look up is loaded once per session
+        self.sittings = {
+            sitting.date: sitting
+            for sitting in models.Sitting.objects.filter(session=session)
+        }
+        self.bills = models.Bill.objects.filter(session=session).in_bulk()
+        self.resolved_participants = {}
+        self.updated_parliamentarians = {}
+        self.votes = []
+        self.participants = []
 
-        for overview in tqdm(
-            parl_soup.find_all("voteparticipant"),  # Oddly named considering the previous format we found this in
+        # The session-wide export lists every vote, and its French counterpart gives us the French subjects
+        overviews = {}
+        for lang in (EN, FR):
+            overviews[lang] = {
+                overview.decisiondivisionnumber.text: overview
+                for overview in BeautifulSoup(fetch_url(url_tweak(
+                    urljoin(session.links[lang][sources.NAME_HOC_VOTES[lang]], "ExportVotes"),
+                    update={"output": "XML", "sessionId": remote_session_id},
+                ), use_cache=session.parliament.number < 42), "lxml").find_all("voteparticipant")  # Oddly named considering the previous format we found this in
+            }
+
+        for number, overview in tqdm(
+            overviews[EN].items(),
             desc=str(session),
             unit="vote",
         ):
-            self.fetch_vote(overview, session)
+            self.fetch_vote({EN: overview, FR: overviews[FR].get(number, None)}, session)
+
+        self.save_votes(session)
+        VoteMatrix.update(session).save()
+
+    def save_votes(self, session):
+        self.batcher.extend(self.updated_parliamentarians.values(), update_fields=("names", "links"))
+        self.batcher.extend(self.votes, update_fields=("sitting", "number", "bill", "context", "result", "links"))  # The debate is linked later by link_house_votes
+        self.batcher.extend(self.participants)
+        self.batcher.flush()
+        stale = set(models.HouseVoteParticipant.objects.filter(
+            house_vote__sitting__session=session,
+        ).values_list("slug", flat=True)) - set(hvp.slug for hvp in self.participants)
+        models.HouseVoteParticipant.objects.filter(slug__in=stale).delete()
 
-    @transaction.atomic
     def fetch_vote(self, overview, session):
-        number = overview.decisiondivisionnumber.text
+        number = overview[EN].decisiondivisionnumber.text
         vote = models.HouseVote(
             slug="-".join((session.slug, number)),
             number=number,
-            result=RESULT_MAPPING[overview.decisionresultname.text],
-        )
-        vote.links[EN][sources.NAME_HOC_VOTE_DETAILS[EN]] = "http://www.ourcommons.ca/Parliamentarians/en/votes/{}/{}/{}/".format(
-            session.parliament.number,
-            session.number,
-            number,
+            result=RESULT_MAPPING[overview[EN].decisionresultname.text],
         )
-        soup = {}
         for lang in (EN, FR):
-            soup[lang] = BeautifulSoup(
-                fetch_url(vote.links[lang][sources.NAME_HOC_VOTE_DETAILS[lang]], sometimes_refetch=False),
-                "html.parser",
+            vote.links[lang][sources.NAME_HOC_VOTE_DETAILS[lang]] = urljoin(
+                session.links[lang][sources.NAME_HOC_VOTES[lang]],
+                "/Parliamentarians/{}/votes/{}/{}/{}/".format(
+                    sources.LANG_HOC_UI[lang],
+                    session.parliament.number,
+                    session.number,
+                    number,
+                ),
             )
-            details = one_or_none(soup[lang].select(".voteDetailsText"))
-            if details:
-                vote.context[lang] = soup_to_text(details)
-            if lang == EN:
-                vote.links[FR][sources.NAME_HOC_VOTE_DETAILS[FR]] = get_french_parl_url(
-                    vote.links[lang][sources.NAME_HOC_VOTE_DETAILS[lang]],
-                    soup[lang],
-                )
+            subject = overview[lang].decisiondivisionsubject if overview[lang] is not None else None
+            if subject is not None and subject.text.strip():
+                vote.context[lang] = subject.text.strip()
+        self.vote_soup = {}
+
         try:
-            vote.sitting = models.Sitting.objects.get(
-                session=session,
-                date=dateparse(overview.decisioneventdatetime.text),
-            )
-        except Exception as e:
+            vote.sitting = self.sittings[dateparse(overview[EN].decisioneventdatetime.text)]
+        except KeyError:
             # Sometimes the XML listings show the wrong dates.
             # I've contacted infonet@parl.gc.ca about this.
-            element = BeautifulSoup(
-                fetch_url(vote.links[EN][sources.NAME_HOC_VOTE_DETAILS[EN]]),
+            element = self.get_vote_soup(vote, EN).select("#VoteDetailsHeader .voteDetailsTopHeaderContent")[1]
+            vote.sitting = self.sittings[dateparse(element.text.split(" - ")[1])]
+
+        if overview[EN].billnumbercode.text:
+            vote.bill = self.bills["-".join((session.slug, *overview[EN].billnumbercode.text.split("-")))]
+
+        # Fetch the parliamentarian votes, one XML export per vote. We only
+        # fall back on scraping the vote's HTML pages when the export is
+        # unavailable or omits party affiliations (as it did for a while).
+        # Every row of the export is parsed before any of them is resolved,
+        # so that one we fall back from updates no parliamentarian.
+        try:
+            rows = self.parse_vote_participants_xml(vote, session)
+        except (FetchFailure, FetchSuppressed, AttributeError) as e:
+            logger.debug("Falling back to HTML for {}: {}".format(vote, e))
+            rows = None
+        if rows:
+            participants = [
+                self.make_vote_participant(vote, mp_name, lambda mp_link=mp_link: mp_link, riding_name, party_name, recorded_votes)
+                for mp_name, mp_link, riding_name, party_name, recorded_votes in rows
+            ]
+        else:
+            participants = self.fetch_vote_participants_html(vote)
+
+        # The HTML pages are only fetched for fields that the XML lacks
+        for lang in (EN, FR):
+            if lang not in vote.context:
+                details = one_or_none(self.get_vote_soup(vote, lang).select(".voteDetailsText"))
+                if details:
+                    vote.context[lang] = soup_to_text(details)
+
+        participants = list(filter(None, participants))
+        flag_dissent(participants)
+        self.votes.append(vote)
+        self.participants.extend(participants)
+
+    def get_vote_soup(self, vote, lang):
+        if lang not in self.vote_soup:
+            self.vote_soup[lang] = BeautifulSoup(
+                fetch_url(vote.links[lang][sources.NAME_HOC_VOTE_DETAILS[lang]], sometimes_refetch=False),
                 "html.parser",
-            ).select("#VoteDetailsHeader .voteDetailsTopHeaderContent")[1]
-            vote.sitting = models.Sitting.objects.get(
-                session=session,
-                date=dateparse(element.text.split(" - ")[1]),
             )
+        return self.vote_soup[lang]
 
-        if overview.billnumbercode.text:
-            vote.bill = models.Bill.objects.get(slug="-".join((session.slug, *overview.billnumbercode.text.split("-"))))
-
-        vote.save()
+    def parse_vote_participants_xml(self, vote, session):
+        rows = []
+        for row in BeautifulSoup(fetch_url(url_tweak(
+            VOTE_PARTICIPANTS_XML,
+            update={"parliament": session.parliament.number, "session": session.number, "vote": vote.number},
+        ), sometimes_refetch=False), "lxml").find_all("voteparticipant"):
+            if not row.caucusshortname.text.strip():
+                return None  # Incomplete export, so we'll need the HTML instead
+            mp_name = {
+                lang: " ".join((row.personofficialfirstname.text.strip(), row.personofficiallastname.text.strip()))
+                for lang in (EN, FR)
+            }
+            mp_link = {
+                lang: urljoin(
+                    vote.links[lang][sources.NAME_HOC_VOTE_DETAILS[lang]],
+                    "/Parliamentarians/{}/members/{}({})".format(
+                        sources.LANG_HOC_UI[lang],
+                        "-".join((row.personofficialfirstname.text.strip(), row.personofficiallastname.text.strip())).replace(" ", "-"),
+                        row.personid.text.strip(),
+                    ),
+                )
+                for lang in (EN, FR)
+            }
+            rows.append((
+                mp_name,
+                mp_link,
+                row.constituencyname.text.strip(),
+                row.caucusshortname.text.strip(),
+                tuple(row.find(tag).text.strip().lower() == "true" for tag in ("isvoteyea", "isvotenay", "isvotepaired")),
+            ))
+        return rows
 
-        # Fetch the parliamentarian votes
-        # TODO: This has been temporarily written to scrape off of HTML
-        #       as the new XML format omits party affiliation.
+    def fetch_vote_participants_html(self, vote):
+        participants = []
+        soup = {lang: self.get_vote_soup(vote, lang) for lang in (EN, FR)}
         for row in soup[EN].select("#parlimant > tbody > tr"):  # Note the source code misspells "parliament"
-            self.fetch_vote_participant(row, vote, soup)
+            cells = row.find_all("td", recursive=False)
+            mp_link = {EN: cells[0].a}
+            mp_name = {EN: mp_link[EN].text.strip()}
 
-    def fetch_vote_participant(self, row, vote, soup):
-        hvp = models.HouseVoteParticipant(house_vote=vote)
-        cells = row.find_all("td", recursive=False)
-        mp_link = {EN: cells[0].a}
-        mp_name = {EN: mp_link[EN].text.strip()}
-        riding_name = cells[0].find_all("span", recursive=False)[1].text.strip()[1:-1]
-        party_name = cells[1].text.strip()
-        recorded_votes = (bool(cells[2].img), bool(cells[3].img), bool(cells[4].img))
+            def get_mp_links():
+                mp_link[FR] = soup[FR].find("a", href=re.compile(r"/ParlDataWidgets/fr/affiliation/{}".format(
+                    WIDGET_ID.search(cells[0].a.attrs["href"]).groups()[0]
+                )))
+                mp_name[FR] = mp_link[FR].text.strip()
+                return {
+                    lang: urljoin(vote.links[lang][sources.NAME_HOC_VOTE_DETAILS[lang]], mp_link[lang].attrs["href"])
+                    for lang in (EN, FR)
+                }
 
+            participants.append(self.make_vote_participant(
+                vote,
+                mp_name,
+                get_mp_links,
+                cells[0].find_all("span", recursive=False)[1].text.strip()[1:-1],
+                cells[1].text.strip(),
+                (bool(cells[2].img), bool(cells[3].img), bool(cells[4].img)),
+            ))
+        return participants
+
+    def resolve_participant(self, vote, mp_name, riding_name):
+        without_honorific = HONORIFIC.sub("", mp_name)
         try:
-            without_honorific = HONORIFIC.sub("", mp_name[EN])
-            parliamentarian = get_cached_obj(
+            return get_cached_obj(
                 self.cached_parliamentarians,
                 without_honorific,
             )
@@ -196,22 +299,32 @@ class Command(BaseCommand):
                 logger.warning("ERR RIDING {}: {}".format(vote, riding_name))
                 return
             try:
-                parliamentarian = get_cached_obj(
+                return get_cached_obj(
                     self.cached_parliamentarians,
-                    PARLIAMENTARIAN_MAPPING.get((without_honorific, riding.slug)),
+                    PARLIAMENTARIAN_MAPPING.get((without_honorific, riding.slug)) or self.matcher.match(
+                        without_honorific,
+                        riding.slug,
+                        vote.sitting.session.parliament_id,
+                    ),
                 )
             except AssertionError:
                 logger.warning("ERR PARLIMENTARIAN {}: {}".format(vote, (without_honorific, riding.slug)))
                 return
+
+    def make_vote_participant(self, vote, mp_name, get_mp_links, riding_name, party_name, recorded_votes):
+        hvp = models.HouseVoteParticipant(house_vote=vote)
+        try:
+            parliamentarian = self.resolved_participants[(mp_name[EN], riding_name)]
+        except KeyError:
+            parliamentarian = self.resolved_participants[(mp_name[EN], riding_name)] = self.resolve_participant(vote, mp_name[EN], riding_name)
+        if parliamentarian is None:
+            return
         if sources.NAME_HOC_VOTES[EN] not in parliamentarian.names[EN]:
-            mp_link[FR] = soup[FR].find("a", href=re.compile(r"/ParlDataWidgets/fr/affiliation/{}".format(
-                WIDGET_ID.search(cells[0].a.attrs["href"]).groups()[0]
-            )))
-            mp_name[FR] = mp_link[FR].text.strip()
+            mp_links = get_mp_links()
             for lang in (EN, FR):
                 parliamentarian.names[lang][sources.NAME_HOC_VOTES[lang]] = mp_name[lang]
-                parliamentarian.links[lang][sources.NAME_HOC_VOTES[lang]] = urljoin(vote.links[lang][sources.NAME_HOC_VOTE_DETAILS[lang]], mp_link[lang].attrs["href"])
-            parliamentarian.save()
+                parliamentarian.links[lang][sources.NAME_HOC_VOTES[lang]] = mp_links[lang]
+            self.updated_parliamentarians[parliamentarian.slug] = parliamentarian
         hvp.parliamentarian = parliamentarian
         hvp.slug = f"{vote.slug}-{parliamentarian.slug}"
 
@@ -227,4 +340,4 @@ class Command(BaseCommand):
         except KeyError:
             logger.warning("ERR VOTE {} {}: {}".format(vote, mp_name, recorded_votes))
             return
-        hvp.save()
+        return hvp
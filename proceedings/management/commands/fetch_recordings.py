@@ -1,10 +1,11 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from django.db.models import Q
 from django.utils.text import slugify
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
+from federal_common.intervals import DateIntervalIndex
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, dateparse, datetimeparse
 from parliaments.models import Session
@@ -74,34 +75,62 @@ def standardize_location(location, lang):
     return response
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--workers", type=int, default=4, help="Number of concurrent ParlVU fetches")
 
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
             logger.setLevel(logging.DEBUG)
 
-        year = date.today().year
-        for year in tqdm(
-            range(date.today().year, date.today().year - 15, -1),
-            desc="Fetch Recordings, ParlVu",
-            unit="year",
-        ):
-            self.fetch_year(year)
+        # Everything the recordings get matched against is loaded once up front
+        self.sessions = DateIntervalIndex(Session.objects.all())
+        self.committees = defaultdict(set)
+        for committee in models.Committee.objects.all():
+            self.committees[committee.slug.rsplit("-", 1)[0]].add(committee)  # Code, parliament and session, without the chamber
+        self.sittings = {}
+        self.sittings_by_number = defaultdict(list)
+        for sitting in models.Sitting.objects.all():
+            self.sittings[sitting.date] = sitting
+            self.sittings_by_number[sitting.number].append(sitting)
+
+        # Fetches run concurrently in the pool, parsing and saving stay on this thread
+        years = range(date.today().year, date.today().year - 15, -1)
+        with ThreadPoolExecutor(max_workers=options["workers"]) as self.pool:
+            for year, days in tqdm(
+                zip(years, self.pool.map(self.fetch_days, years)),
+                total=len(years),
+                desc="Fetch Recordings, ParlVu",
+                unit="year",
+            ):
+                self.fetch_year(year, days)
+        self.batcher.flush()
 
-    def fetch_year(self, year):
-        days = [
+    def fetch_days(self, year):
+        return [
             dateparse(day)
             for day in json.loads(fetch_url(
                 "http://parlvu.parl.gc.ca/XRender/en/api/Data/GetCalendarYearData/{}0101/-1".format(year),
                 use_cache=year < 2017,
             ))
         ]
-        for day in tqdm(days, desc=str(year), unit="day"):
-            self.fetch_day(day)
 
-    @transaction.atomic
-    def fetch_day(self, day):
-        events = {
+    def fetch_year(self, year, days):
+        recordings = {}
+        for day, events in tqdm(
+            zip(days, self.pool.map(self.fetch_events, days)),
+            total=len(days),
+            desc=str(year),
+            unit="day",
+        ):
+            for recording in self.parse_day(day, events):
+                recordings[recording.slug] = recording
+        self.batcher.extend(recordings.values())
+
+    def fetch_events(self, day):
+        return {
             lang: {
                 event["Id"]: event
                 for event in json.loads(fetch_url(
@@ -114,6 +143,8 @@ class Command(BaseCommand):
             }
             for lang in (EN, FR)
         }
+
+    def parse_day(self, day, events):
         for event_id, event in events[EN].items():
             event = {EN: event, FR: events[FR][event_id]}
             recording = models.Recording(
@@ -141,17 +172,22 @@ class Command(BaseCommand):
             match = COMMITTEE_CODE.search(title)
             if match:
                 code = match.groups()[0]
-                session = Session.objects.filter(date_start__lte=day).filter(Q(date_end__gte=day) | Q(date_end__isnull=True)).get()
-                prefix = "-".join((code.lower(), session.slug, ""))
-                recording.committee = models.Committee.objects.get(Q(slug__startswith=prefix) | Q(slug__startswith=prefix.replace("aano-", "inan-").replace("saan-", "sina-")))
+                prefix = "-".join((code.lower(), self.sessions[day].slug))
+                committees = self.committees[prefix] | self.committees[prefix.replace("aano-", "inan-").replace("saan-", "sina-")]
+                assert len(committees) == 1, "Expected one committee for {}, got {}".format(prefix, committees)
+                recording.committee = next(iter(committees))
 
             if recording.status != models.Recording.STATUS_CANCELLED:
                 for regex in (HOC_SITTING_NO, HOC_QUESTION_PERIOD_NO):
                     match = regex.search(title)
                     if match:
                         number = "".join(reversed(match.groups()[0].split("-"))).lstrip("0")
-                        sitting_number = models.Sitting.objects.filter(date__gt=day - timedelta(days=120), date__lt=day + timedelta(days=120), number=number).first()
-                        sitting_day = models.Sitting.objects.filter(date=day).first()
+                        sitting_number = next((
+                            sitting
+                            for sitting in self.sittings_by_number[number]
+                            if day - timedelta(days=120) < sitting.date < day + timedelta(days=120)
+                        ), None)
+                        sitting_day = self.sittings.get(day, None)
                         if sitting_day and sitting_day.number == number:
                             recording.sitting = sitting_day
                         elif day < date.today():
@@ -171,4 +207,4 @@ class Command(BaseCommand):
                                 ) if sitting_number else "#{} doesn't exist".format(number),
                             ))
 
-                recording.save()
+                yield recording
@@ -1,9 +1,8 @@
 from bs4 import BeautifulSoup
 from datetime import timedelta
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from federal_common import sources
+from federal_common.bulk import BatchedCommand
 from federal_common.sources import EN, FR
 from federal_common.utils import fetch_url, url_tweak, dateparse, one_or_none, get_french_parl_url
 from parliaments.models import Session
@@ -20,7 +19,7 @@ CACHE_BEFORE = timedelta(days=7 if settings.DEBUG else 90)
 NUMBERS = re.compile(r"([0-9]+)")
 
 
-class Command(BaseCommand):
+class Command(BatchedCommand):
 
     def handle(self, *args, **options):
         if options["verbosity"] > 1:
@@ -40,8 +39,8 @@ class Command(BaseCommand):
                 number=session_link.attrs["data-session"],
             )
             self.parse_session(session)
+        self.batcher.flush()
 
-    @transaction.atomic
     def parse_session(self, session):
         session_url = url_tweak(
             "http://www.ourcommons.ca/DocumentViewer/en/SessionPublicationCalendarsWidget?organization=HOC&publicationTypeId=37",
@@ -85,6 +84,6 @@ class Command(BaseCommand):
                     sitting.links[lang][sources.NAME_HOC_HANSARD_XML[lang]] = urljoin(sitting_url, xml_button.attrs["href"])
                 if lang == EN:
                     sitting_url = get_french_parl_url(sitting_url, soup)
-            sitting.save()
+            self.batcher.add(sitting)
         except Exception as e:
             logger.exception(e)
@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, When, Value
+from federal_common.sources import EN
+from itertools import groupby
+from proceedings import models
+from tqdm import tqdm
+import logging
+import re
+
+
+logger = logging.getLogger(__name__)
+DIVISION_NUMBER = re.compile(r"(\d+)")
+SUBJECT_METADATA = (
+    "OrderOfBusiness-OrderOfBusinessTitle",
+    "SubjectOfBusiness-SubjectOfBusinessTitle",
+    "SubjectOfBusiness-SubjectOfBusinessQualifier",
+)
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+
+    def handle(self, *args, **options):
+        if options["verbosity"] > 1:
+            logger.setLevel(logging.DEBUG)
+
+        house_votes = {
+            (sitting_id, number): slug
+            for slug, sitting_id, number in models.HouseVote.objects.values_list("slug", "sitting_id", "number")
+        }
+
+        # One pass over the blocks of every sitting with votes, in the order they were spoken
+        self.links = {}
+        self.debates = {}
+        blocks = models.PublicationBlock.objects.filter(
+            sitting_id__in=set(sitting_id for sitting_id, number in house_votes),
+            committee__isnull=True,
+        ).order_by("sitting", "number").values_list("slug", "sitting_id", "category", "metadata").iterator()
+        for sitting_id, group in tqdm(
+            groupby(blocks, key=lambda block: block[1]),
+            desc="Link House Votes",
+            unit="sitting",
+        ):
+            self.link_sitting(sitting_id, list(group), house_votes)
+
+        self.save()
+
+    def link_sitting(self, sitting_id, blocks, house_votes):
+        for index, (slug, sitting_id, category, metadata) in enumerate(blocks):
+            if category != models.PublicationBlock.CATEGORY_DIVISION or "Division-DivisionNumber" not in metadata:
+                continue
+            match = DIVISION_NUMBER.search(metadata["Division-DivisionNumber"][EN])
+            house_vote = house_votes.get((sitting_id, int(match.groups()[0]))) if match else None
+            if not house_vote:
+                logger.warning("No house vote for division block {} ({})".format(slug, metadata["Division-DivisionNumber"][EN]))
+                continue
+            self.links[slug] = house_vote
+
+            # The debate runs back to where the subject of business last changed
+            subject = get_subject(metadata)
+            start = index
+            while start > 0 and any(subject) and get_subject(blocks[start - 1][3]) == subject:
+                start -= 1
+            self.debates[house_vote] = (blocks[start][0], blocks[index - 1][0]) if start < index else (None, None)
+
+    @transaction.atomic
+    def save(self):
+        models.PublicationBlock.objects.filter(house_vote__isnull=False).update(house_vote=None)
+        models.HouseVote.objects.update(debate_start=None, debate_end=None)
+        links = list(self.links.items())
+        for offset in range(0, len(links), BATCH_SIZE):
+            batch = links[offset:offset + BATCH_SIZE]
+            models.PublicationBlock.objects.filter(slug__in=[slug for slug, house_vote in batch]).update(house_vote=Case(*[
+                When(slug=slug, then=Value(house_vote))
+                for slug, house_vote in batch
+            ]))
+        debates = [(house_vote, debate) for house_vote, debate in self.debates.items() if debate[0]]
+        for offset in range(0, len(debates), BATCH_SIZE):
+            batch = debates[offset:offset + BATCH_SIZE]
+            models.HouseVote.objects.filter(slug__in=[house_vote for house_vote, debate in batch]).update(**{
+                field_name: Case(*[
+                    When(slug=house_vote, then=Value(debate[index]))
+                    for house_vote, debate in batch
+                ])
+                for index, field_name in enumerate(("debate_start", "debate_end"))
+            })
+
+
+def get_subject(metadata):
+    return [metadata.get(key) for key in SUBJECT_METADATA]
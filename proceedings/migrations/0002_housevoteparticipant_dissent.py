@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.1 on 2026-10-19 03:06
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proceedings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='housevoteparticipant',
+            name='dissent',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
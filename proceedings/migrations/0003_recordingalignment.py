@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.1 on 2026-10-19 03:11
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proceedings', '0002_housevoteparticipant_dissent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecordingAlignment',
+            fields=[
+                ('slug', models.SlugField(max_length=200, primary_key=True, serialize=False)),
+                ('offset', models.PositiveIntegerField()),
+                ('publication_block', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recording_alignment', to='proceedings.PublicationBlock')),
+                ('recording', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recording_alignments', to='proceedings.Recording')),
+            ],
+            options={
+                'ordering': ('recording', 'offset'),
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='recordingalignment',
+            index_together=set([('recording', 'offset')]),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.1 on 2026-10-19 03:24
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proceedings', '0003_recordingalignment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='housevote',
+            name='debate_end',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='proceedings.PublicationBlock'),
+        ),
+        migrations.AddField(
+            model_name='housevote',
+            name='debate_start',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='proceedings.PublicationBlock'),
+        ),
+    ]
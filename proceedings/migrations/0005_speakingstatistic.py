@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.1 on 2026-10-19 03:31
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parliaments', '0001_initial'),
+        ('proceedings', '0004_housevote_debate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpeakingStatistic',
+            fields=[
+                ('slug', models.SlugField(max_length=200, primary_key=True, serialize=False)),
+                ('interventions', models.PositiveIntegerField(db_index=True, default=0)),
+                ('words_en', models.PositiveIntegerField(db_index=True, default=0)),
+                ('words_fr', models.PositiveIntegerField(db_index=True, default=0)),
+                ('duration', models.PositiveIntegerField(db_index=True, default=0, help_text='Seconds')),
+                ('parliamentarian', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='speaking_statistics', to='parliaments.Parliamentarian')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='speaking_statistics', to='parliaments.Session')),
+                ('sitting', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='speaking_statistics', to='proceedings.Sitting')),
+            ],
+            options={
+                'ordering': ('sitting', 'parliamentarian'),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='speakingstatistic',
+            unique_together=set([('parliamentarian', 'sitting')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='speakingstatistic',
+            index_together=set([('session', 'parliamentarian')]),
+        ),
+    ]
@@ -21,6 +21,7 @@ class Committee(SlugMixin, NamesMixin, LinksMixin, models.Model):
         (CHAMBER_SEN, "Senate"),
         (CHAMBER_JOINT, "Joint committee"),
     ), db_index=True)
+    name_indexed = True
 
     class Meta:
         ordering = ("slug", )
@@ -120,6 +121,10 @@ class HouseVote(SlugMixin, LinksMixin, models.Model):
         ## Data sources
 
         * [House of Commons' Votes (38th Parliament onwards)](http://www.ourcommons.ca/parliamentarians/en/votes)
+
+        ## Notes
+
+        * `debate_start` and `debate_end` bound the publication blocks leading up to the division on the same subject of business, as linked by `link_house_votes`. The blocks themselves are listed under `/house-votes/<slug>/debate/`.
     """
     RESULT_NEGATIVED = 1
     RESULT_AGREED_TO = 2
@@ -134,6 +139,8 @@ class HouseVote(SlugMixin, LinksMixin, models.Model):
         (RESULT_AGREED_TO, "Agreed To"),
         (RESULT_TIE, "Tie"),
     ), db_index=True)
+    debate_start = models.ForeignKey("PublicationBlock", null=True, blank=True, on_delete=models.SET_NULL, related_name="+", db_index=True)
+    debate_end = models.ForeignKey("PublicationBlock", null=True, blank=True, on_delete=models.SET_NULL, related_name="+", db_index=True)
 
     class Meta:
         ordering = ("sitting__date", "slug")
@@ -148,6 +155,11 @@ class HouseVoteParticipant(SlugMixin, models.Model):
         ## Notes
 
         * The records provide MP party affiliation outside of elections, which can be used to track party affiliation changes between elections.
+        * A participant dissents when they voted yea or nay against the majority of their party's yeas and nays on that vote. Ties and independents never dissent.
+
+        ## Filtering examples
+
+        * [Participants who voted against their party](?dissent=true)
     """
     VOTE_NAY = 1
     VOTE_YEA = 2
@@ -163,6 +175,7 @@ class HouseVoteParticipant(SlugMixin, models.Model):
         (VOTE_PAIRED, "Paired"),
         (VOTE_ABSTAINED, "Abstained"),
     ), db_index=True)
+    dissent = models.BooleanField(default=False, db_index=True)
 
     class Meta:
         unique_together = ("house_vote", "parliamentarian")
@@ -212,3 +225,59 @@ class PublicationBlock(SlugMixin, models.Model):
     class Meta:
         unique_together = ("sitting", "committee", "number")
         ordering = ("date_start", )
+
+
+class RecordingAlignment(SlugMixin, models.Model):
+    """
+        ## Data sources
+
+        * Derived from publication blocks and recordings, after both have been fetched
+
+        ## Notes
+
+        * Maps each publication block to the recording of its sitting (or committee meeting) and to how many seconds into that recording it begins.
+        * Hansard timestamps are only precise to the minute, so offsets may be up to a minute early. Blocks between two timestamps share the offset of the first.
+        * Blocks whose timestamp falls outside every recording's actual start and end aren't aligned.
+
+        ## Filtering examples
+
+        * [Blocks within the first ten minutes of a recording](?recording=2017-05-10-hoc-sitting-no-176&offset__lt=600)
+    """
+    publication_block = models.OneToOneField(PublicationBlock, related_name="recording_alignment", db_index=True)
+    recording = models.ForeignKey(Recording, related_name="recording_alignments", db_index=True)
+    offset = models.PositiveIntegerField()
+
+    class Meta:
+        index_together = ("recording", "offset")
+        ordering = ("recording", "offset")
+
+
+class SpeakingStatistic(SlugMixin, models.Model):
+    """
+        ## Data sources
+
+        * Derived from publication blocks as fetch_hansards writes them
+
+        ## Notes
+
+        * One row per parliamentarian per sitting they intervened in. Totals across sittings and sessions are available under `/speaking-statistics/totals/`.
+        * Words are counted on the text of each intervention, with its markup stripped.
+        * Durations are estimated as the time between the start of an intervention and the start of the next block, so they're only as precise as Hansard's minute-level timestamps.
+
+        ## Filtering examples
+
+        * [Sittings where a parliamentarian spoke for over an hour](?duration__gt=3600)
+        * [Most words spoken in English at a single sitting](?ordering=-words_en)
+    """
+    parliamentarian = models.ForeignKey(parliament_models.Parliamentarian, related_name="speaking_statistics", db_index=True)
+    sitting = models.ForeignKey(Sitting, related_name="speaking_statistics", db_index=True)
+    session = models.ForeignKey(parliament_models.Session, related_name="speaking_statistics", db_index=True)
+    interventions = models.PositiveIntegerField(default=0, db_index=True)
+    words_en = models.PositiveIntegerField(default=0, db_index=True)
+    words_fr = models.PositiveIntegerField(default=0, db_index=True)
+    duration = models.PositiveIntegerField(default=0, db_index=True, help_text="Seconds")
+
+    class Meta:
+        unique_together = ("parliamentarian", "sitting")
+        index_together = ("session", "parliamentarian")
+        ordering = ("sitting", "parliamentarian")
@@ -0,0 +1,449 @@
+from datetime import date, datetime, timezone
+from django.core.management import call_command, get_commands, load_command_class
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from federal_common import sources
+from federal_common.bulk import Batcher
+from federal_common.pagination import KeysetPagination
+from federal_common.sources import EN, FR
+from io import StringIO
+from parliaments.models import Parliament, Parliamentarian, Party, Session
+from proceedings import models
+from proceedings.management.commands import fetch_hansards, fetch_house_votes
+from proceedings.vote_matrix import VoteMatrix
+from unittest.mock import patch
+from urllib.parse import urlparse
+import numpy as np
+import shutil
+import tempfile
+
+
+class StartupTestCase(TestCase):
+    APPS = ("federal_common", "parliaments", "elections", "proceedings")
+
+    def test_startup_issues_no_queries(self):
+        # Defining a command (e.g. its module constants and class attributes) mustn't touch the database, only running it
+        with self.assertNumQueries(0):
+            for name, app_name in get_commands().items():
+                if app_name in self.APPS:
+                    load_command_class(app_name, name)
+            call_command("check")
+
+
+class ListQueryCountTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        session = Session.objects.create(
+            slug="42-1",
+            parliament=Parliament.objects.create(number=42),
+            number=1,
+            date_start=date(2015, 12, 3),
+            sittings_house=0,
+            sittings_senate=0,
+        )
+        cls.sitting = models.Sitting.objects.create(slug="42-1-176", number="176", session=session, date=date(2017, 5, 10))
+        cls.house_vote = models.HouseVote.objects.create(slug="42-1-176-1", sitting=cls.sitting, number=1, context={}, result=1)
+
+    def add_participants(self, count):
+        for index in range(models.HouseVoteParticipant.objects.count(), count):
+            parliamentarian = Parliamentarian.objects.create(
+                slug="parliamentarian-{}".format(index),
+                birthdate="1960",
+                lop_item_code="lop-{}".format(index),
+                constituency_offices={},
+                hill_phone="",
+                hill_fax="",
+            )
+            models.HouseVoteParticipant.objects.create(
+                slug="{}-{}".format(self.house_vote.slug, parliamentarian.slug),
+                house_vote=self.house_vote,
+                parliamentarian=parliamentarian,
+                recorded_vote=models.HouseVoteParticipant.VOTE_YEA,
+            )
+
+    def count_queries(self, path):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path, {"format": "json"})
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_lists_models_with_many_to_many_relations(self):
+        Party.objects.create(slug="liberal", color="red")
+        models.Bill.objects.create(slug="42-1-c-1", session=self.sitting.session)
+        for path in ("/parties/", "/bills/"):
+            self.count_queries(path)
+
+    def test_list_query_count_is_constant(self):
+        for path in ("/house-vote-participants/", "/parliamentarians/{}/house-vote-participants/".format("parliamentarian-0")):
+            self.add_participants(2)
+            few = self.count_queries(path)
+            self.add_participants(20)
+            self.assertEqual(self.count_queries(path), few, path)
+
+
+class KeysetPaginationTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        session = Session.objects.create(
+            slug="42-1",
+            parliament=Parliament.objects.create(number=42),
+            number=1,
+            date_start=date(2015, 12, 3),
+            sittings_house=0,
+            sittings_senate=0,
+        )
+        sitting = models.Sitting.objects.create(slug="42-1-176", number="176", session=session, date=date(2017, 5, 10))
+        for number in range(1, 8):  # All starting at once, so that date_start can't place a cursor
+            models.PublicationBlock.objects.create(
+                slug="42-1-176-{}".format(number),
+                sitting=sitting,
+                number=number,
+                date_start=datetime(2017, 5, 10, 14, tzinfo=timezone.utc),
+                metadata={},
+                content={},
+                name="",
+                category=models.PublicationBlock.CATEGORY_UNEXPECTED,
+            )
+        cls.slugs = sorted(models.PublicationBlock.objects.values_list("slug", flat=True))
+
+    def get_slugs(self, **params):
+        slugs = []
+        response = self.client.get("/publication-blocks/", dict(params, format="json", limit=2, fields="slug"))
+        for _ in self.slugs:  # At most one page per row, were the cursor to go round in circles
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page["results"]), 2)
+            slugs.extend(result["slug"] for result in page["results"])
+            if not page["next"]:
+                break
+            response = self.client.get(page["next"])
+        return slugs
+
+    @patch.object(KeysetPagination, "offset_cutoff", 1)  # i.e. rows sharing a cursor position are too many to skip over
+    def test_pages_through_every_row_once(self):
+        self.assertEqual(self.get_slugs(), self.slugs)
+        self.assertEqual(self.get_slugs(ordering="-slug"), self.slugs[::-1])
+
+    @patch.object(KeysetPagination, "offset_cutoff", 1)
+    def test_only_orders_by_unique_columns(self):
+        self.assertEqual(self.get_slugs(ordering="date_start"), self.slugs)
+
+
+class VoteMatrixTestCase(TestCase):
+    BALLOTS = (
+        # a and b sit for x, c for y
+        ("a", "x", models.HouseVoteParticipant.VOTE_YEA, models.HouseVoteParticipant.VOTE_YEA),
+        ("b", "x", models.HouseVoteParticipant.VOTE_YEA, models.HouseVoteParticipant.VOTE_NAY),
+        ("c", "y", models.HouseVoteParticipant.VOTE_NAY, models.HouseVoteParticipant.VOTE_NAY),
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.session = Session.objects.create(
+            slug="42-1",
+            parliament=Parliament.objects.create(number=42),
+            number=1,
+            date_start=date(2015, 12, 3),
+            sittings_house=0,
+            sittings_senate=0,
+        )
+        cls.sitting = models.Sitting.objects.create(slug="42-1-176", number="176", session=cls.session, date=date(2017, 5, 10))
+        for slug in ("x", "y"):
+            Party.objects.create(slug=slug, color="")
+        for index, (slug, party, first, second) in enumerate(cls.BALLOTS):
+            Parliamentarian.objects.create(slug=slug, birthdate="1960", lop_item_code="lop-{}".format(index), constituency_offices={}, hill_phone="", hill_fax="")
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def add_vote(self, number):
+        house_vote = models.HouseVote.objects.create(slug="42-1-{}".format(number), sitting=self.sitting, number=number, context={}, result=1)
+        for slug, party, *recorded_votes in self.BALLOTS:
+            models.HouseVoteParticipant.objects.create(
+                slug="{}-{}".format(house_vote.slug, slug),
+                house_vote=house_vote,
+                parliamentarian_id=slug,
+                party_id=party,
+                recorded_vote=recorded_votes[number - 1],
+            )
+
+    def test_statistics(self):
+        self.add_vote(1)
+        self.add_vote(2)
+        matrix = VoteMatrix.build(self.session)
+        self.assertEqual(matrix.ballots.tolist(), [[2, 2], [2, 1], [1, 1]])
+
+        members, votes, cohesion = matrix.get_party_cohesion()
+        self.assertEqual(members.tolist(), [2, 1])
+        self.assertEqual(votes.tolist(), [2, 2])
+        self.assertEqual(cohesion.tolist(), [0.5, 1.0])  # x split on the second vote
+
+        # x took no position on the second vote, so only the first counts towards agreeing with it
+        agreement = matrix.get_party_agreement()
+        self.assertEqual(agreement.tolist(), [[1.0, 0.0], [1.0, 0.5], [0.0, 1.0]])
+
+        similarity = matrix.get_similarity()
+        self.assertEqual(similarity.tolist(), [[1.0, 0.5, 0.0], [0.5, 1.0, 0.5], [0.0, 0.5, 1.0]])
+
+    def test_update_appends_new_votes(self):
+        with override_settings(VOTE_MATRIX_ROOT=self.root):
+            self.add_vote(1)
+            VoteMatrix.update(self.session).save()
+            self.add_vote(2)
+            with self.assertNumQueries(2):  # The votes and the new vote's participants
+                updated = VoteMatrix.update(self.session)
+        built = VoteMatrix.build(self.session)
+        for key in ("parliamentarians", "votes", "parties", "party_indexes", "ballots"):
+            np.testing.assert_array_equal(getattr(updated, key), getattr(built, key))
+
+
+class VoteParticipantsXMLTestCase(SimpleTestCase):
+    ROW = "<voteparticipant><personofficialfirstname>Elizabeth</personofficialfirstname><personofficiallastname>May</personofficiallastname><personid>2897</personid><constituencyname>Saanich--Gulf Islands</constituencyname><caucusshortname>{}</caucusshortname><isvoteyea>True</isvoteyea><isvotenay>False</isvotenay><isvotepaired>False</isvotepaired></voteparticipant>"
+
+    def setUp(self):
+        self.vote = models.HouseVote(number=1, links={
+            lang: {sources.NAME_HOC_VOTE_DETAILS[lang]: "http://www.ourcommons.ca/Parliamentarians/{}/votes/42/1/1/".format(sources.LANG_HOC_UI[lang])}
+            for lang in (EN, FR)
+        })
+        self.session = Session(parliament=Parliament(number=42), number=1)
+
+    def parse(self, *caucuses):
+        xml = "<list>{}</list>".format("".join(self.ROW.format(caucus) for caucus in caucuses))
+        with patch("proceedings.management.commands.fetch_house_votes.fetch_url", return_value=xml):
+            return fetch_house_votes.Command().parse_vote_participants_xml(self.vote, self.session)
+
+    def test_parses_rows(self):
+        mp_name, mp_link, riding_name, party_name, recorded_votes = self.parse("Green Party")[0]
+        self.assertEqual(mp_name, {EN: "Elizabeth May", FR: "Elizabeth May"})
+        self.assertEqual(mp_link[EN], "http://www.ourcommons.ca/Parliamentarians/en/members/Elizabeth-May(2897)")
+        self.assertEqual((riding_name, party_name, recorded_votes), ("Saanich--Gulf Islands", "Green Party", (True, False, False)))
+
+    def test_rejects_exports_missing_any_caucus(self):
+        self.assertIsNone(self.parse("Green Party", ""))
+
+
+class SpeakingStatisticsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        session = Session.objects.create(
+            slug="42-1",
+            parliament=Parliament.objects.create(number=42),
+            number=1,
+            date_start=date(2015, 12, 3),
+            sittings_house=0,
+            sittings_senate=0,
+        )
+        cls.sitting = models.Sitting.objects.create(slug="42-1-176", number="176", session=session, date=date(2017, 5, 10))
+        cls.parliamentarians = [
+            Parliamentarian.objects.create(slug=slug, birthdate="1960", lop_item_code=slug, constituency_offices={}, hill_phone="", hill_fax="")
+            for slug in ("a", "b")
+        ]
+
+    def setUp(self):
+        self.command = fetch_hansards.Command()
+        self.command.batcher = Batcher()
+        self.command.sitting = self.sitting
+        self.command.speaking = None
+        self.command.speaking_statistics = {}
+
+    def at(self, minute):
+        return datetime(2017, 5, 10, 14, minute, tzinfo=timezone.utc)
+
+    def add_block(self, minute, parliamentarian=None, en="", fr="", category=models.PublicationBlock.CATEGORY_INTERVENTION):
+        self.command.hansard_block = models.PublicationBlock(
+            date_start=self.at(minute),
+            category=category,
+            parliamentarian=parliamentarian,
+            content={EN: en, FR: fr},
+        )
+        self.command.update_speaking_statistics()
+
+    def add_recording(self, scheduled_end, actual_end=None):
+        models.Recording.objects.create(
+            slug="recording-{}".format(scheduled_end),
+            scheduled_start=self.at(0),
+            scheduled_end=self.at(scheduled_end),
+            actual_end=actual_end and self.at(actual_end),
+            location={},
+            category=models.Recording.CATEGORY_TELEVISED,
+            status=models.Recording.STATUS_ADJOURNED,
+            sitting=self.sitting,
+        )
+
+    def save(self):
+        self.command.save_speaking_statistics()
+        self.command.batcher.flush()
+        return {
+            statistic.parliamentarian_id: (statistic.interventions, statistic.words_en, statistic.words_fr, statistic.duration)
+            for statistic in models.SpeakingStatistic.objects.filter(sitting=self.sitting)
+        }
+
+    def test_counts_interventions_and_words_per_language(self):
+        a, b = self.parliamentarians
+        self.add_block(0, a, en="<p>Mr. Speaker, <b>I</b> rise</p>")
+        self.add_block(1, b, fr="Monsieur le Président")
+        self.add_block(2, a, en="Thank you", fr="Merci")
+        self.add_block(3, category=models.PublicationBlock.CATEGORY_DIVISION)
+        self.assertEqual(self.save(), {"a": (2, 6, 1, 120), "b": (1, 0, 3, 60)})
+
+    def test_lasts_until_the_next_block_starts(self):
+        a, b = self.parliamentarians
+        self.add_block(0, a, en="First")
+        self.add_block(5, en="Some hon. members: Hear, hear!", category=models.PublicationBlock.CATEGORY_ASIDES)
+        self.add_block(7, b, en="Second")
+        self.add_block(10, category=models.PublicationBlock.CATEGORY_DIVISION)
+        self.assertEqual(self.save(), {"a": (1, 1, 0, 300), "b": (1, 1, 0, 180)})
+
+    def test_last_intervention_lasts_until_the_recording_ends(self):
+        a, b = self.parliamentarians
+        self.add_block(0, a, en="First")
+        self.add_block(1, b, en="Last")
+        self.add_recording(scheduled_end=30, actual_end=20)
+        self.add_recording(scheduled_end=10)
+        self.assertEqual(self.save()["b"], (1, 1, 0, 19 * 60))  # The latest of the actual end, or else the scheduled one
+
+    def test_last_intervention_is_unmeasured_without_a_recording(self):
+        a = self.parliamentarians[0]
+        self.add_block(0, a, en="Last")
+        self.assertEqual(self.save(), {"a": (1, 1, 0, 0)})
+
+    def test_deletes_stale_rows_of_a_reparsed_sitting(self):
+        a, b = self.parliamentarians
+        self.add_block(0, a, en="First")
+        self.add_block(1, b, en="Second")
+        self.add_block(2, category=models.PublicationBlock.CATEGORY_DIVISION)
+        self.save()
+
+        self.setUp()
+        self.add_block(0, b, en="Corrected")
+        self.add_block(2, category=models.PublicationBlock.CATEGORY_DIVISION)
+        self.assertEqual(self.save(), {"b": (1, 1, 0, 120)})
+
+
+class LinkHouseVotesTestCase(TestCase):
+    SUBJECTS = {
+        "budget": {"SubjectOfBusiness-SubjectOfBusinessTitle": {EN: "Budget Implementation Act", FR: "Loi d'exécution du budget"}},
+        "ethics": {"SubjectOfBusiness-SubjectOfBusinessTitle": {EN: "Ethics", FR: "Éthique"}},
+        None: {},
+    }
+    BLOCKS = (
+        # Subject, and the vote of division blocks
+        (None, None),
+        ("budget", None),
+        ("budget", None),
+        ("budget", 10),
+        (None, None),
+        ("ethics", None),
+        ("ethics", 11),
+        (None, 12),
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        session = Session.objects.create(
+            slug="42-1",
+            parliament=Parliament.objects.create(number=42),
+            number=1,
+            date_start=date(2015, 12, 3),
+            sittings_house=0,
+            sittings_senate=0,
+        )
+        sitting = models.Sitting.objects.create(slug="42-1-176", number="176", session=session, date=date(2017, 5, 10))
+        for number, (subject, vote_number) in enumerate(cls.BLOCKS, 1):
+            metadata = dict(cls.SUBJECTS[subject])
+            if vote_number:
+                models.HouseVote.objects.create(slug="42-1-{}".format(vote_number), sitting=sitting, number=vote_number, context={}, result=1)
+                metadata["Division-DivisionNumber"] = {EN: "(Division No. {})".format(vote_number), FR: "(Vote no {})".format(vote_number)}
+            models.PublicationBlock.objects.create(
+                slug="42-1-176-{}".format(number),
+                sitting=sitting,
+                number=number,
+                date_start=datetime(2017, 5, 10, 14, number, tzinfo=timezone.utc),
+                metadata=metadata,
+                content={EN: "", FR: ""},
+                category=models.PublicationBlock.CATEGORY_DIVISION if vote_number else models.PublicationBlock.CATEGORY_INTERVENTION,
+            )
+
+    def test_links_divisions_and_debates(self):
+        call_command("link_house_votes", stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(
+            dict(models.PublicationBlock.objects.filter(house_vote__isnull=False).values_list("number", "house_vote__number")),
+            {4: 10, 7: 11, 8: 12},
+        )
+        self.assertEqual(
+            {vote.number: (vote.debate_start_id, vote.debate_end_id) for vote in models.HouseVote.objects.all()},
+            {
+                10: ("42-1-176-2", "42-1-176-3"),  # Back to where the subject changed, and short of the division itself
+                11: ("42-1-176-6", "42-1-176-6"),
+                12: (None, None),  # No subject, so no debate to speak of
+            },
+        )
+
+
+class FlagDissentTestCase(SimpleTestCase):
+    YEA = models.HouseVoteParticipant.VOTE_YEA
+    NAY = models.HouseVoteParticipant.VOTE_NAY
+    PAIRED = models.HouseVoteParticipant.VOTE_PAIRED
+
+    def flag(self, *ballots):
+        participants = [models.HouseVoteParticipant(party_id=party, recorded_vote=recorded_vote) for party, recorded_vote in ballots]
+        fetch_house_votes.flag_dissent(participants)
+        return [hvp.dissent for hvp in participants]
+
+    def test_flags_the_minority(self):
+        self.assertEqual(self.flag(("x", self.YEA), ("x", self.YEA), ("x", self.NAY), ("y", self.NAY)), [False, False, True, False])
+
+    def test_ties_arent_dissent(self):
+        self.assertEqual(self.flag(("x", self.YEA), ("x", self.NAY)), [False, False])
+
+    def test_paired_votes_and_independents_arent_dissent(self):
+        self.assertEqual(
+            self.flag(("x", self.YEA), ("x", self.YEA), ("x", self.PAIRED), (None, self.NAY), (None, self.YEA), (None, self.YEA)),
+            [False, False, False, False, False, False],
+        )
+
+
+class OverlappingRecordingsTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for slug, start, end, actual_end in (
+            ("house", 14, 18, 19),  # Ran an hour late
+            ("committee", 13, 15, None),
+            ("evening", 20, 21, None),
+        ):
+            models.Recording.objects.create(
+                slug=slug,
+                scheduled_start=datetime(2017, 5, 10, start, tzinfo=timezone.utc),
+                scheduled_end=datetime(2017, 5, 10, end, tzinfo=timezone.utc),
+                actual_end=actual_end and datetime(2017, 5, 10, actual_end, tzinfo=timezone.utc),
+                location={},
+                category=models.Recording.CATEGORY_TELEVISED,
+                status=models.Recording.STATUS_ADJOURNED,
+            )
+
+    def get(self, **params):
+        return self.client.get("/recordings/overlapping/", dict(params, format="json"))
+
+    def get_slugs(self, **params):
+        response = self.get(**params)
+        self.assertEqual(response.status_code, 200)
+        return [urlparse(recording["url"]).path.rstrip("/").rsplit("/", 1)[1] for recording in response.data]
+
+    def test_finds_recordings_at_an_instant(self):
+        self.assertEqual(self.get_slugs(at="2017-05-10T11:00"), ["committee", "house"])  # In Ottawa, i.e. 15:00 UTC
+        self.assertEqual(self.get_slugs(at="2017-05-10T18:30Z"), ["house"])
+        self.assertEqual(self.get_slugs(at="2017-05-10T19:30Z"), [])
+
+    def test_finds_recordings_overlapping_a_window(self):
+        self.assertEqual(self.get_slugs(start="2017-05-10T18:30Z", end="2017-05-10T20:30Z"), ["house", "evening"])
+        self.assertEqual(self.get_slugs(start="2017-05-10T00:00Z", end="2017-05-10T12:59Z"), [])
+
+    def test_refuses_windows_ending_before_they_start(self):
+        self.assertEqual(self.get(start="2017-05-10T20:30Z", end="2017-05-10T18:30Z").status_code, 400)
+        self.assertEqual(self.get(start="2017-05-10T18:30Z").status_code, 400)
@@ -0,0 +1,308 @@
+from dateutil.parser import parse as dateutil_parse
+from django.db.models import Count, Max, Sum
+from django.http import Http404
+from django.utils.timezone import is_aware, make_aware
+from federal_common.caching import BuildCachingMixin, get_build
+from federal_common.intervals import IntervalTree
+from proceedings import models
+from proceedings.vote_matrix import VoteMatrix
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+import numpy as np
+import os
+
+
+vote_matrices = {}
+recording_tree = {}
+
+
+def get_vote_matrix(session_slug):
+    try:
+        modified = os.path.getmtime(VoteMatrix.get_path(session_slug))
+    except OSError:
+        raise Http404("No vote matrix for session {}".format(session_slug))
+    if session_slug not in vote_matrices or vote_matrices[session_slug][0] != modified:
+        vote_matrices[session_slug] = (modified, VoteMatrix.load(session_slug))
+    return vote_matrices[session_slug][1]
+
+
+def get_recording_tree():
+    # Rebuilt with each published build or, where none is, whenever an ingest has added or moved recordings
+    build = get_build()
+    signature = build["version"] if build else models.Recording.objects.aggregate(
+        Count("slug"),
+        Max("scheduled_start"),
+        Max("actual_start"),
+        Max("actual_end"),
+    )
+    if recording_tree.get("signature") != signature:
+        recording_tree["tree"] = IntervalTree(
+            (start, max(start, end), slug)
+            for slug, start, end in (
+                (slug, actual_start or scheduled_start, actual_end or scheduled_end)
+                for slug, scheduled_start, scheduled_end, actual_start, actual_end in models.Recording.objects.values_list(
+                    "slug",
+                    "scheduled_start",
+                    "scheduled_end",
+                    "actual_start",
+                    "actual_end",
+                ).iterator()
+            )
+        )
+        recording_tree["signature"] = signature
+    return recording_tree["tree"]
+
+
+def parse_datetime(request, name):
+    try:
+        value = dateutil_parse(request.query_params[name])
+    except KeyError:
+        raise ParseError("Missing parameter: {}".format(name))
+    except (ValueError, OverflowError):
+        raise ParseError("Unrecognized datetime for {}: {}".format(name, request.query_params[name]))
+    return value if is_aware(value) else make_aware(value)
+
+
+def parse_offset(value):
+    # Either seconds or [hh:]mm:ss
+    try:
+        parts = [int(part) for part in value.split(":")]
+    except ValueError:
+        raise ParseError("Unrecognized offset: {}".format(value))
+    if len(parts) > 3 or any(part < 0 for part in parts):
+        raise ParseError("Unrecognized offset: {}".format(value))
+    return sum(part * 60 ** power for power, part in enumerate(reversed(parts)))
+
+
+def rounded(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+class VoteMatrixView(BuildCachingMixin, APIView):
+    permission_classes = (AllowAny, )  # Read-only, there's no model to check permissions against
+
+    def get(self, request, session):
+        matrix = get_vote_matrix(session)
+        parliamentarian = request.query_params.get("parliamentarian", None)
+        if parliamentarian is None:
+            rows = None
+        else:
+            try:
+                rows = [matrix.get_parliamentarian_index(parliamentarian)]
+            except KeyError:
+                raise Http404("{} has no recorded votes in session {}".format(parliamentarian, session))
+        return Response(self.summarize(matrix, rows))
+
+
+class PartyCohesionView(VoteMatrixView):
+    view_name = "Party Cohesion"
+    view_description = """
+The mean [Rice index](https://en.wikipedia.org/wiki/Rice_index) of each party across a session's house votes, where 1 means every member voted together every time.
+"""
+
+    def summarize(self, matrix, rows):
+        members, votes, cohesion = matrix.get_party_cohesion()
+        return [
+            {
+                "party": party,
+                "members": int(members[index]),
+                "votes": int(votes[index]),
+                "cohesion": rounded(cohesion[index]),
+            }
+            for index, party in enumerate(matrix.parties)
+        ]
+
+
+class PartyAgreementView(VoteMatrixView):
+    view_name = "Party Agreement"
+    view_description = """
+How often each parliamentarian voted with the majority of each party during a session.
+
+* [Filter to a single parliamentarian](?parliamentarian=may-elizabeth)
+"""
+
+    def summarize(self, matrix, rows):
+        agreement = matrix.get_party_agreement()
+        return [
+            {
+                "parliamentarian": matrix.parliamentarians[row],
+                "party": matrix.parties[matrix.party_indexes[row]] if matrix.party_indexes[row] >= 0 else None,
+                "agreement": {
+                    party: rounded(agreement[row, index])
+                    for index, party in enumerate(matrix.parties)
+                },
+            }
+            for row in (range(len(matrix.parliamentarians)) if rows is None else rows)
+        ]
+
+
+class ParliamentarianSimilarityView(VoteMatrixView):
+    view_name = "Parliamentarian Similarity"
+    view_description = """
+How often two parliamentarians voted the same way on the house votes of a session they both took part in.
+
+* [Parliamentarians most similar to a given parliamentarian](?parliamentarian=may-elizabeth)
+"""
+
+    def summarize(self, matrix, rows):
+        similarity = matrix.get_similarity(rows)
+        if rows is None:
+            return {
+                "parliamentarians": matrix.parliamentarians.tolist(),
+                "similarity": [[rounded(value) for value in row] for row in similarity],
+            }
+        return [
+            {
+                "parliamentarian": matrix.parliamentarians[index],
+                "similarity": rounded(similarity[0, index]),
+            }
+            for index in np.argsort(-np.nan_to_num(similarity[0]), kind="mergesort")
+            if index != rows[0]
+        ]
+
+
+class OverlappingRecordingsView(BuildCachingMixin, APIView):
+    permission_classes = (AllowAny, )
+    view_name = "Overlapping Recordings"
+    view_description = """
+Every recording (House sittings, committee meetings, etc) taking place at a given instant or overlapping a given window, ordered by start. Recordings are considered to span their actual start and end where known and their scheduled ones otherwise. Datetimes without a timezone are assumed to be in Ottawa.
+
+* [Recordings at a given instant](?at=2017-05-10T15:00)
+* [Recordings overlapping a given window](?start=2017-05-10T09:00&end=2017-05-10T11:00)
+"""
+
+    def get(self, request):
+        if "at" in request.query_params:
+            start = end = parse_datetime(request, "at")
+        else:
+            start, end = parse_datetime(request, "start"), parse_datetime(request, "end")
+            if end < start:
+                raise ParseError("The end of the window precedes its start")
+        slugs = get_recording_tree().overlapping(start, end)
+        recordings = models.Recording.objects.in_bulk(slugs)
+        return Response([
+            {
+                "url": reverse("recording-detail", kwargs={"pk": slug}, request=request),
+                "names": recordings[slug].names,
+                "start": recordings[slug].actual_start or recordings[slug].scheduled_start,
+                "end": recordings[slug].actual_end or recordings[slug].scheduled_end,
+                "committee": recordings[slug].committee_id,
+                "sitting": recordings[slug].sitting_id,
+            }
+            for slug in slugs
+            if slug in recordings
+        ])
+
+
+class RecordingTranscriptView(BuildCachingMixin, APIView):
+    permission_classes = (AllowAny, )
+    view_name = "Recording Transcript"
+    view_description = """
+The publication blocks being spoken at a given offset into a recording, as aligned by `align_recordings`. Offsets are either seconds or `hh:mm:ss`.
+
+* [Transcript at 01:23:45](?at=01:23:45)
+"""
+
+    def get(self, request, recording):
+        if "at" not in request.query_params:
+            raise ParseError("Missing parameter: at")
+        alignments = models.RecordingAlignment.objects.filter(recording_id=recording)
+        offset = alignments.filter(
+            offset__lte=parse_offset(request.query_params["at"]),
+        ).order_by("-offset").values_list("offset", flat=True).first()
+        if offset is None:
+            raise Http404("No aligned transcript at that point of {}".format(recording))
+        return Response({
+            "recording": reverse("recording-detail", kwargs={"pk": recording}, request=request),
+            "offset": offset,
+            "publication_blocks": [
+                {
+                    "url": reverse("publicationblock-detail", kwargs={"pk": alignment.publication_block.slug}, request=request),
+                    "category": alignment.publication_block.get_category_display(),
+                    "parliamentarian": alignment.publication_block.parliamentarian_id,
+                    "content": alignment.publication_block.content,
+                }
+                for alignment in alignments.filter(offset=offset).select_related("publication_block").order_by("publication_block__number")
+            ],
+        })
+
+
+class HouseVoteDebateView(BuildCachingMixin, APIView):
+    permission_classes = (AllowAny, )
+    view_name = "House Vote Debate"
+    view_description = """
+The publication blocks leading up to a house vote on the same subject of business, as linked by `link_house_votes`.
+"""
+
+    def get(self, request, house_vote):
+        try:
+            house_vote = models.HouseVote.objects.select_related("debate_start", "debate_end").get(slug=house_vote)
+        except models.HouseVote.DoesNotExist:
+            raise Http404("No house vote {}".format(house_vote))
+        if house_vote.debate_start is None:
+            raise Http404("No debate linked to {}".format(house_vote.slug))
+        return Response({
+            "house_vote": reverse("housevote-detail", kwargs={"pk": house_vote.slug}, request=request),
+            "publication_blocks": [
+                {
+                    "url": reverse("publicationblock-detail", kwargs={"pk": block.slug}, request=request),
+                    "category": block.get_category_display(),
+                    "parliamentarian": block.parliamentarian_id,
+                    "date_start": block.date_start,
+                    "content": block.content,
+                }
+                for block in models.PublicationBlock.objects.filter(
+                    sitting_id=house_vote.sitting_id,
+                    committee__isnull=True,
+                    number__gte=house_vote.debate_start.number,
+                    number__lte=house_vote.debate_end.number,
+                ).order_by("number")
+            ],
+        })
+
+
+class SpeakingTotalsView(BuildCachingMixin, APIView):
+    permission_classes = (AllowAny, )
+    view_name = "Speaking Totals"
+    view_description = """
+Speaking statistics summed per parliamentarian across every sitting, optionally restricted to a session or parliamentarian and sorted by any total.
+
+* [Who spoke the most during a session](?session=42-1&ordering=-duration)
+* [A parliamentarian's totals per session](?parliamentarian=may-elizabeth&group_by=session)
+"""
+    TOTALS = ("sittings", "interventions", "words_en", "words_fr", "duration")
+    GROUPINGS = ("parliamentarian", "session")
+
+    def get(self, request):
+        statistics = models.SpeakingStatistic.objects.all()
+        for field_name in ("session", "parliamentarian"):
+            if field_name in request.query_params:
+                statistics = statistics.filter(**{"{}_id".format(field_name): request.query_params[field_name]})
+
+        group_by = request.query_params.get("group_by", "parliamentarian")
+        if group_by not in self.GROUPINGS:
+            raise ParseError("group_by must be one of {}".format(", ".join(self.GROUPINGS)))
+        group_fields = ["parliamentarian"] + (["session"] if group_by == "session" else [])
+
+        ordering = request.query_params.get("ordering", "-duration")
+        descending, total = ordering.startswith("-"), ordering.lstrip("-")
+        if total not in self.TOTALS:
+            raise ParseError("ordering must be one of {}, optionally prefixed by -".format(", ".join(self.TOTALS)))
+
+        # Annotations can't share their names with model fields, hence the prefix
+        return Response([
+            dict(
+                {field_name: row[field_name] for field_name in group_fields},
+                **{total: row["total_{}".format(total)] for total in self.TOTALS}
+            )
+            for row in statistics.values(*group_fields).annotate(
+                total_sittings=Count("sitting"),
+                total_interventions=Sum("interventions"),
+                total_words_en=Sum("words_en"),
+                total_words_fr=Sum("words_fr"),
+                total_duration=Sum("duration"),
+            ).order_by("{}total_{}".format("-" if descending else "", total), *group_fields)
+        ])
@@ -0,0 +1,170 @@
+from django.conf import settings
+from proceedings import models
+import numpy as np
+import os
+
+
+NO_PARTY = -1
+SIGNS = np.zeros(max(choice for choice, label in models.HouseVoteParticipant._meta.get_field("recorded_vote").choices) + 1, dtype=np.int8)
+SIGNS[models.HouseVoteParticipant.VOTE_YEA] = 1
+SIGNS[models.HouseVoteParticipant.VOTE_NAY] = -1
+
+
+class VoteMatrix(object):
+    """
+        A session's recorded votes as a parliamentarian × vote array.
+
+        Ballots are stored as their HouseVoteParticipant.recorded_vote codes
+        (0 where a parliamentarian didn't participate) alongside the party
+        each parliamentarian last voted with during the session.
+    """
+
+    def __init__(self, session_slug, parliamentarians, votes, parties, party_indexes, ballots):
+        self.session_slug = session_slug
+        self.parliamentarians = parliamentarians
+        self.votes = votes
+        self.parties = parties
+        self.party_indexes = party_indexes
+        self.ballots = ballots
+        self.signs = SIGNS[ballots]
+
+    @classmethod
+    def build(cls, session):
+        empty = cls(
+            session.slug,
+            np.array([], dtype=str),
+            np.array([], dtype=str),
+            np.array([], dtype=str),
+            np.array([], dtype=np.int16),
+            np.zeros((0, 0), dtype=np.int8),
+        )
+        votes = list(models.HouseVote.objects.filter(sitting__session=session).order_by("sitting__date", "number").values_list("slug", flat=True))
+        return empty.extend(votes, get_participant_rows(house_vote__sitting__session=session))
+
+    @classmethod
+    def update(cls, session):
+        """
+            Adds the votes held since the stored matrix was built, reading
+            only their participants. Where there's no stored matrix, or votes
+            other than the latest ones changed, it's rebuilt.
+        """
+        try:
+            matrix = cls.load(session.slug)
+        except OSError:
+            return cls.build(session)
+        votes = list(models.HouseVote.objects.filter(sitting__session=session).order_by("sitting__date", "number").values_list("slug", flat=True))
+        if votes[:len(matrix.votes)] != matrix.votes.tolist():
+            return cls.build(session)
+        added = votes[len(matrix.votes):]
+        return matrix.extend(added, get_participant_rows(house_vote__slug__in=added) if added else [])
+
+    def extend(self, votes, rows):
+        # A copy with the given votes appended, from (vote, parliamentarian, party, recorded vote) rows in the order they were held
+        parliamentarians = sorted(set(self.parliamentarians.tolist()) | set(row[1] for row in rows))
+        parties = sorted(set(self.parties.tolist()) | set(row[2] for row in rows if row[2]))
+        all_votes = self.votes.tolist() + votes
+        vote_indexes = {slug: index for index, slug in enumerate(all_votes)}
+        parliamentarian_indexes = {slug: index for index, slug in enumerate(parliamentarians)}
+        party_indexes = {slug: index for index, slug in enumerate(parties)}
+
+        ballots = np.zeros((len(parliamentarians), len(all_votes)), dtype=np.int8)
+        parliamentarian_parties = np.full(len(parliamentarians), NO_PARTY, dtype=np.int16)
+        kept = [parliamentarian_indexes[slug] for slug in self.parliamentarians.tolist()]
+        ballots[kept, :len(self.votes)] = self.ballots
+        parliamentarian_parties[kept] = [
+            party_indexes[self.parties[index]] if index != NO_PARTY else NO_PARTY
+            for index in self.party_indexes
+        ]
+        for vote_slug, parliamentarian_slug, party_slug, recorded_vote in rows:
+            ballots[parliamentarian_indexes[parliamentarian_slug], vote_indexes[vote_slug]] = recorded_vote
+            parliamentarian_parties[parliamentarian_indexes[parliamentarian_slug]] = party_indexes.get(party_slug, NO_PARTY)
+
+        return type(self)(
+            self.session_slug,
+            np.array(parliamentarians, dtype=str),
+            np.array(all_votes, dtype=str),
+            np.array(parties, dtype=str),
+            parliamentarian_parties,
+            ballots,
+        )
+
+    @staticmethod
+    def get_path(session_slug):
+        return os.path.join(settings.VOTE_MATRIX_ROOT, "{}.npz".format(session_slug))
+
+    @classmethod
+    def load(cls, session_slug):
+        with np.load(cls.get_path(session_slug)) as stored:
+            return cls(session_slug, *(
+                stored[key]
+                for key in ("parliamentarians", "votes", "parties", "party_indexes", "ballots")
+            ))
+
+    def save(self):
+        os.makedirs(settings.VOTE_MATRIX_ROOT, exist_ok=True)
+        np.savez_compressed(
+            self.get_path(self.session_slug),
+            parliamentarians=self.parliamentarians,
+            votes=self.votes,
+            parties=self.parties,
+            party_indexes=self.party_indexes,
+            ballots=self.ballots,
+        )
+
+    def get_parliamentarian_index(self, slug):
+        indexes = np.flatnonzero(self.parliamentarians == slug)
+        if not len(indexes):
+            raise KeyError(slug)
+        return indexes[0]
+
+    def get_party_tallies(self):
+        # party × vote counts of yeas and nays, via a one-hot membership matrix
+        membership = (self.party_indexes[np.newaxis, :] == np.arange(len(self.parties))[:, np.newaxis]).astype(np.int32)
+        yeas = membership @ (self.signs == 1).astype(np.int32)
+        nays = membership @ (self.signs == -1).astype(np.int32)
+        return membership.sum(axis=1), yeas, nays
+
+    def get_party_positions(self):
+        members, yeas, nays = self.get_party_tallies()
+        return np.sign(yeas - nays).astype(np.int8)
+
+    def get_party_cohesion(self):
+        # Mean Rice index, |yeas - nays| / (yeas + nays), over the votes each party took part in
+        members, yeas, nays = self.get_party_tallies()
+        voting = yeas + nays
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rice = np.abs(yeas - nays) / voting
+        participated = voting > 0
+        cohesion = np.where(participated, rice, 0).sum(axis=1) / np.maximum(participated.sum(axis=1), 1)
+        return members, participated.sum(axis=1), cohesion
+
+    def get_party_agreement(self):
+        # Fraction of votes where a parliamentarian sided with a party's majority.
+        # With ballots as ±1, agreements = (signs · positions + votes in common) / 2.
+        positions = self.get_party_positions()
+        signs = self.signs.astype(np.int32)
+        both = (signs != 0).astype(np.int32) @ (positions != 0).astype(np.int32).T
+        agreed = ((signs @ positions.astype(np.int32).T) + both) // 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(both > 0, agreed / both, np.nan)
+
+    def get_similarity(self, rows=None):
+        # Fraction of votes in common where two parliamentarians voted the same way
+        signs = self.signs.astype(np.int32)
+        selected = signs if rows is None else signs[rows]
+        both = (selected != 0).astype(np.int32) @ (signs != 0).astype(np.int32).T
+        agreed = ((selected @ signs.T) + both) // 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(both > 0, agreed / both, np.nan)
+
+
+def get_participant_rows(**filters):
+    return list(models.HouseVoteParticipant.objects.filter(**filters).order_by(
+        "house_vote__sitting__date",
+        "house_vote__number",
+    ).values_list(
+        "house_vote__slug",
+        "parliamentarian__slug",
+        "party__slug",
+        "recorded_vote",
+    ))
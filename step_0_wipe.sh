@@ -6,9 +6,11 @@ mysql -e "CREATE DATABASE parliamentary_data CHARACTER SET utf8 COLLATE utf8_gen
 rm -rf parliaments/migrations && \
 rm -rf proceedings/migrations && \
 rm -rf elections/migrations && \
+rm -rf federal_common/migrations && \
 ./manage.py makemigrations parliaments && \
 ./manage.py makemigrations proceedings && \
 ./manage.py makemigrations elections && \
+./manage.py makemigrations federal_common && \
 ./manage.py migrate && \
 echo "from django.contrib.auth.models import User; User.objects.create_superuser('admin', 'admin@example.com', 'pass')" | python manage.py shell &&
 mysqldump parliamentary_data > after-step-0.sql
@@ -9,4 +9,5 @@ mysql parliamentary_data < after-step-0.sql && \
 ./manage.py fetch_ridings && \
 ./manage.py fetch_parliamentarians && \
 ./manage.py fetch_election_ridings riding-populations-electors-and-rejected-ballots.ods && \
+./manage.py rebuild_name_index && \
 mysqldump parliamentary_data > after-step-1.sql
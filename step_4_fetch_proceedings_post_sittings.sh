@@ -5,4 +5,6 @@ mysql parliamentary_data < after-step-3.sql && \
 ./manage.py fetch_recordings && \
 ./manage.py fetch_house_votes && \
 ./manage.py fetch_hansards && \
+./manage.py link_house_votes && \
+./manage.py align_recordings && \
 mysqldump parliamentary_data > after-step-4.sql